@@ -0,0 +1,216 @@
+# -*- coding: UTF-8 -*-
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from pyspatialopt import analysis
+from pyspatialopt.analysis import synthetic
+
+# The size of each tier: demand units, facilities and the average number of service areas covering a point
+TIERS = {
+    "small": {"numDemand": 200, "numFacilities": 20, "overlap": 2.0},
+    "medium": {"numDemand": 2000, "numFacilities": 100, "overlap": 3.0},
+    "large": {"numDemand": 20000, "numFacilities": 500, "overlap": 4.0}
+}
+
+FUNCTIONS = ["generate_binary_coverage", "generate_partial_coverage", "generate_serviceable_demand",
+             "generate_traumah_coverage", "get_covered_demand"]
+
+
+class ArcpyBackend(object):
+    """
+    Loads the synthetic shapefiles as arcpy feature layers
+    """
+    name = "arcpy"
+
+    def __init__(self):
+        import arcpy
+        self.arcpy = arcpy
+        self.analysis = analysis.get_backend("arcpy")
+
+    def load(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return self.arcpy.MakeFeatureLayer_management(path, "{}_fl".format(name)).getOutput(0)
+
+
+class PyqgisBackend(object):
+    """
+    Loads the synthetic shapefiles as QGIS vector layers. QGIS_PATH must point to the QGIS install (apps/qgis)
+    """
+    name = "pyqgis"
+
+    def __init__(self):
+        import qgis
+        import qgis.core
+        self.qgis = qgis
+        self.analysis = analysis.get_backend("qgis")
+        self.application = qgis.core.QgsApplication(sys.argv, True)
+        self.application.setPrefixPath(os.path.expandvars(r"$QGIS_PATH"), True)
+        self.application.initQgis()
+
+    def load(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return self.qgis.core.QgsVectorLayer(path, "{}_fl".format(name), "ogr")
+
+
+BACKENDS = {
+    "arcpy": ArcpyBackend,
+    "pyqgis": PyqgisBackend
+}
+
+
+def get_backends(names):
+    """
+    :param names: (list) The backend names to try
+    :return: (list) The backends that could be imported
+    """
+    backends = []
+    for name in names:
+        try:
+            backends.append(BACKENDS[name]())
+        except ImportError as e:
+            logging.getLogger().info("Skipping {}: {}".format(name, e))
+    return backends
+
+
+def calls(backend, layers, layout):
+    """
+    The calls to benchmark and the number of geometry pairs each one tests
+
+    :param backend: The backend
+    :param layers: (dictionary) The loaded layers keyed by name
+    :param layout: (dictionary) The layout returned by synthetic.generate_layers
+    :return: (list) A (name, function, pairs tested) tuple for each call
+    """
+    analysis = backend.analysis
+    num_demand = layout["numDemand"]
+    num_facilities = layout["numFacilities"]
+    num_ad = layout["numAirDepots"]
+    return [
+        ("generate_binary_coverage",
+         lambda: analysis.generate_binary_coverage(layers["demand_polygon"], layers["facility_service_areas"],
+                                                   "Population", "GEOID10", "ORIG_ID"),
+         num_demand * num_facilities),
+        ("generate_partial_coverage",
+         lambda: analysis.generate_partial_coverage(layers["demand_polygon"], layers["facility_service_areas"],
+                                                    "Population", "GEOID10", "ORIG_ID"),
+         num_demand * num_facilities),
+        ("generate_serviceable_demand",
+         lambda: analysis.generate_serviceable_demand(layers["demand_polygon"], "Population", "GEOID10",
+                                                      layers["facility_service_areas"]),
+         num_demand),
+        ("generate_traumah_coverage",
+         lambda: analysis.generate_traumah_coverage(layers["demand_point"], layers["demand_service_areas"],
+                                                    layers["facility"], layers["air_depot"], "Population",
+                                                    layout["airDistanceThreshold"], "GEOID10", "ID", "ID"),
+         num_demand * num_facilities * (1 + num_ad)),
+        ("get_covered_demand",
+         lambda: analysis.get_covered_demand(layers["demand_polygon"], "Population", "partial",
+                                             layers["facility_service_areas"]),
+         num_demand)
+    ]
+
+
+def _max_rss():
+    """
+    :return: (int) The peak resident set size of the process in bytes, None if unknown
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def benchmark(tiers, backend_names=None, functions=None, seed=0, directory=None):
+    """
+    Times each coverage generation function with each available backend on synthetic layers
+
+    :param tiers: (list) The names of the tiers to run (keys of TIERS)
+    :param backend_names: (list) The backends to run, defaults to every backend
+    :param functions: (list) The functions to time, defaults to FUNCTIONS
+    :param seed: (int) The random seed of the synthetic layers
+    :param directory: (string) The directory to write the layers to, defaults to a temporary directory
+    :return: (list) A result dictionary for each tier, backend and function
+    """
+    if backend_names is None:
+        backend_names = sorted(BACKENDS.keys())
+    if functions is None:
+        functions = FUNCTIONS
+    if directory is None:
+        directory = tempfile.mkdtemp()
+    backends = get_backends(backend_names)
+    results = []
+    for tier_name in tiers:
+        tier = TIERS[tier_name]
+        start = time.time()
+        layout = synthetic.generate_layers(os.path.join(directory, tier_name), tier["numDemand"],
+                                           tier["numFacilities"], tier["overlap"], seed=seed)
+        logging.getLogger().info("Wrote {} layers in {:.2f}s".format(tier_name, time.time() - start))
+        for backend in backends:
+            layers = dict((name, backend.load(path)) for name, path in layout["paths"].items())
+            for name, function, pairs in calls(backend, layers, layout):
+                if name not in functions:
+                    continue
+                # tracemalloc only sees allocations made through Python, the GIS libraries allocate natively
+                tracemalloc.start()
+                start = time.time()
+                function()
+                elapsed = time.time() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results.append({
+                    "tier": tier_name,
+                    "backend": backend.name,
+                    "function": name,
+                    "seed": seed,
+                    "numDemand": layout["numDemand"],
+                    "numFacilities": layout["numFacilities"],
+                    "numAirDepots": layout["numAirDepots"],
+                    "overlap": tier["overlap"],
+                    "time": elapsed,
+                    "pairs": pairs,
+                    "pairsPerSecond": pairs / elapsed if elapsed > 0 else None,
+                    "peakPythonMemory": peak,
+                    "maxRss": _max_rss()
+                })
+                logging.getLogger().info("{} {} {}: {:.2f}s, {:.0f} pairs/s".format(
+                    tier_name, backend.name, name, elapsed, results[-1]["pairsPerSecond"] or 0))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks coverage generation on synthetic shapefiles")
+    parser.add_argument("--tiers", nargs="+", default=["small"], choices=sorted(TIERS.keys()))
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS.keys()), choices=sorted(BACKENDS.keys()))
+    parser.add_argument("--functions", nargs="+", default=FUNCTIONS, choices=FUNCTIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", help="The directory to write the synthetic layers to")
+    parser.add_argument("--output", help="The JSON file to write the results to, defaults to stdout")
+    args = parser.parse_args()
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    sh = logging.StreamHandler(sys.stderr)
+    sh.setFormatter(logging.Formatter('%(asctime)s %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p'))
+    logger.addHandler(sh)
+
+    output = {
+        "python": sys.version.split()[0],
+        "results": benchmark(args.tiers, args.backends, args.functions, args.seed, args.directory)
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
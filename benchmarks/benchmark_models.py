@@ -0,0 +1,209 @@
+# -*- coding: UTF-8 -*-
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pulp
+
+from pyspatialopt import memory
+from pyspatialopt.models import covering, synthetic
+
+# The size of each tier: demand units, facilities (trauma centers), air depots and coverage density
+TIERS = {
+    "small": {"numDemand": 500, "numFacilities": 50, "numAirDepots": 10, "density": 0.05},
+    "medium": {"numDemand": 5000, "numFacilities": 300, "numAirDepots": 30, "density": 0.02},
+    "large": {"numDemand": 50000, "numFacilities": 1500, "numAirDepots": 100, "density": 0.01}
+}
+
+MODELS = ["mclp", "mclp_cc", "threshold", "cc_threshold", "backup", "bclpcc", "lscp", "traumah"]
+
+# The coverage type each model is built from
+COVERAGE_TYPES = {
+    "mclp": "binary",
+    "threshold": "binary",
+    "backup": "binary",
+    "lscp": "binary",
+    "mclp_cc": "partial",
+    "cc_threshold": "partial",
+    "bclpcc": "partial",
+    "traumah": "traumah"
+}
+
+
+def get_solver(name, time_limit):
+    """
+    :param name: (string) 'glpk' or 'cbc'
+    :param time_limit: (float) The time limit in seconds
+    :return: (Pulp solver) The solver, None if it isn't installed
+    """
+    if name == "glpk":
+        solver = pulp.GLPK(msg=0, timeLimit=time_limit)
+    elif name == "cbc":
+        solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit)
+    else:
+        raise ValueError("'{}' is not a supported solver".format(name))
+    if not solver.available():
+        return None
+    return solver
+
+
+def create_model(model_type, coverage, tier):
+    """
+    Creates a model with parameters scaled to the tier
+
+    :param model_type: (string) One of MODELS
+    :param coverage: (dictionary) The coverage of the model's type
+    :param tier: (dictionary) The tier sizes
+    :return: (Pulp problem) The problem
+    """
+    num_fac = {"total": max(1, tier["numFacilities"] // 10)}
+    if model_type == "mclp":
+        return covering.create_mclp_model(coverage, num_fac)
+    elif model_type == "mclp_cc":
+        return covering.create_mclp_cc_model(coverage, num_fac)
+    elif model_type == "threshold":
+        return covering.create_threshold_model(coverage, 50)
+    elif model_type == "cc_threshold":
+        return covering.create_cc_threshold_model(coverage, 50)
+    elif model_type == "backup":
+        # Every demand unit must be covered once, allowing every facility keeps the model feasible
+        return covering.create_backup_model(coverage, {"total": tier["numFacilities"]})
+    elif model_type == "bclpcc":
+        return covering.create_bclpcc_model(coverage, num_fac, 0.5)
+    elif model_type == "lscp":
+        return covering.create_lscp_model(coverage)
+    elif model_type == "traumah":
+        return covering.create_traumah_model(coverage, max(1, tier["numAirDepots"] // 4),
+                                             max(1, tier["numFacilities"] // 4))
+    raise ValueError("'{}' is not a valid model type".format(model_type))
+
+
+def generate_coverages(tier, seed):
+    """
+    :param tier: (dictionary) The tier sizes
+    :param seed: (int) The random seed
+    :return: (dictionary) The binary, partial and traumah coverages of the tier
+    """
+    return {
+        "binary": synthetic.generate_coverage(tier["numDemand"], tier["numFacilities"], tier["density"], "binary",
+                                              cover_all=True, seed=seed),
+        "partial": synthetic.generate_coverage(tier["numDemand"], tier["numFacilities"], tier["density"], "partial",
+                                               seed=seed),
+        "traumah": synthetic.generate_traumah_coverage(tier["numDemand"], tier["numFacilities"],
+                                                       tier["numAirDepots"], tier["density"], tier["density"],
+                                                       seed=seed)
+    }
+
+
+def benchmark(tiers, models=None, solvers=None, time_limit=60, seed=0, write=True, measure_memory=False):
+    """
+    Times building, writing (.lp) and solving each model for each tier
+
+    :param tiers: (list) The names of the tiers to run (keys of TIERS)
+    :param models: (list) The models to run, defaults to MODELS
+    :param solvers: (list) 'glpk' and/or 'cbc', None or empty to only build the models
+    :param time_limit: (float) The time limit of each solve in seconds
+    :param seed: (int) The random seed of the synthetic coverages
+    :param write: (bool) Time writing each model to an .lp file
+    :param measure_memory: (bool) Measure the peak and retained memory of building each model (slower)
+    :return: (list) A result dictionary for each tier, model and solver
+    """
+    if models is None:
+        models = MODELS
+    if solvers is None:
+        solvers = []
+    results = []
+    for tier_name in tiers:
+        tier = TIERS[tier_name]
+        start = time.time()
+        coverages = generate_coverages(tier, seed)
+        logging.getLogger().info("Generated {} coverages in {:.2f}s".format(tier_name, time.time() - start))
+        for model_type in models:
+            coverage = coverages[COVERAGE_TYPES[model_type]]
+            report = None
+            if measure_memory:
+                prob, report = memory.measure(create_model, model_type, coverage, tier)
+                build_time = report["wallTime"]
+            else:
+                start = time.time()
+                prob = create_model(model_type, coverage, tier)
+                build_time = time.time() - start
+            record = {
+                "tier": tier_name,
+                "model": model_type,
+                "seed": seed,
+                "numDemand": tier["numDemand"],
+                "numFacilities": tier["numFacilities"],
+                "density": tier["density"],
+                "variables": prob.numVariables(),
+                "constraints": prob.numConstraints(),
+                "nonzeros": sum(len(constraint) for constraint in prob.constraints.values()),
+                "buildTime": build_time,
+                "writeTime": None,
+                "memory": report
+            }
+            if write:
+                fd, path = tempfile.mkstemp(suffix=".lp")
+                os.close(fd)
+                try:
+                    start = time.time()
+                    prob.writeLP(path)
+                    record["writeTime"] = time.time() - start
+                finally:
+                    os.remove(path)
+            logging.getLogger().info("{} {}: {} variables, {} constraints built in {:.2f}s".format(
+                tier_name, model_type, record["variables"], record["constraints"], build_time))
+            if not solvers:
+                results.append(record)
+            for solver_name in solvers:
+                solver = get_solver(solver_name, time_limit)
+                result = dict(record)
+                result["solver"] = solver_name
+                if solver is None:
+                    result.update({"status": "Unavailable", "objective": None, "solveTime": None})
+                else:
+                    start = time.time()
+                    prob.solve(solver)
+                    result["solveTime"] = time.time() - start
+                    result["status"] = pulp.LpStatus[prob.status]
+                    result["objective"] = pulp.value(prob.objective)
+                    logging.getLogger().info("{} {} {}: {} in {:.2f}s".format(
+                        tier_name, model_type, solver_name, result["status"], result["solveTime"]))
+                results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks building, writing and solving the covering models "
+                                                 "on synthetic coverages")
+    parser.add_argument("--tiers", nargs="+", default=["small"], choices=sorted(TIERS.keys()))
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--solvers", nargs="*", default=["glpk", "cbc"], choices=["glpk", "cbc"])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-write", action="store_true", help="Don't time writing .lp files")
+    parser.add_argument("--memory", action="store_true", help="Measure the memory of building each model")
+    parser.add_argument("--output", help="The JSON file to write the results to, defaults to stdout")
+    args = parser.parse_args()
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    sh = logging.StreamHandler(sys.stderr)
+    sh.setFormatter(logging.Formatter('%(asctime)s %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p'))
+    logger.addHandler(sh)
+
+    output = {
+        "pulp": pulp.__version__ if hasattr(pulp, "__version__") else None,
+        "python": sys.version.split()[0],
+        "results": benchmark(args.tiers, args.models, args.solvers, args.time_limit, args.seed, not args.no_write,
+                             args.memory)
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
@@ -1 +1,85 @@
-# -*- coding: UTF-8 -*-
\ No newline at end of file
+# -*- coding: UTF-8 -*-
+import importlib
+import importlib.util
+import threading
+
+# The registered backends: the module implementing the analysis functions and the GIS package it needs.
+# Nothing is imported until a backend is requested with get_backend
+_backends = {}
+_aliases = {}
+_loaded = {}
+_lock = threading.Lock()
+
+
+def register_backend(name, module, requires=None, aliases=None):
+    """
+    Registers an analysis backend. The module is only imported by get_backend
+
+        analysis.register_backend("shapely", "mypackage.shapely_analysis", requires="shapely")
+
+    :param name: (string) The backend name
+    :param module: (string) The full name of the module implementing the backend
+    :param requires: (string) The top level package the backend needs, used by available_backends
+    :param aliases: (list) Other names the backend can be requested by
+    """
+    if not isinstance(name, str) or not isinstance(module, str):
+        raise TypeError("name and module must be strings")
+    with _lock:
+        _backends[name] = {"module": module, "requires": requires}
+        _loaded.pop(name, None)
+        for alias in aliases or []:
+            _aliases[alias] = name
+
+
+def _resolve(name):
+    name = _aliases.get(name, name)
+    if name not in _backends:
+        raise ValueError("Unknown backend '{}', expected one of: {}".format(name, sorted(_backends.keys())))
+    return name
+
+
+def get_backend(name):
+    """
+    Imports (on first use) and returns an analysis backend module
+
+        arcpy_analysis = analysis.get_backend("arcpy")
+        coverage = arcpy_analysis.generate_binary_coverage(demand_layer, facility_layer, "Population", "GEOID10",
+                                                           "ORIG_ID")
+
+    :param name: (string) The backend name or alias ('arcpy', 'qgis'...)
+    :return: (module) The backend module
+    """
+    name = _resolve(name)
+    backend = _loaded.get(name)
+    if backend is not None:
+        return backend
+    with _lock:
+        if name not in _loaded:
+            try:
+                _loaded[name] = importlib.import_module(_backends[name]["module"])
+            except ImportError as e:
+                raise ImportError("Backend '{}' could not be loaded: {}".format(name, e))
+        return _loaded[name]
+
+
+def available_backends():
+    """
+    Finds the backends whose GIS package is installed without importing them
+
+    :return: (list) The names of the available backends
+    """
+    available = []
+    for name, backend in sorted(_backends.items()):
+        if name in _loaded:
+            available.append(name)
+            continue
+        try:
+            if backend["requires"] is None or importlib.util.find_spec(backend["requires"]) is not None:
+                available.append(name)
+        except (ImportError, ValueError):
+            pass
+    return available
+
+
+register_backend("arcpy", "pyspatialopt.analysis.arcpy_analysis", requires="arcpy")
+register_backend("qgis", "pyspatialopt.analysis.pyqgis_analysis", requires="qgis", aliases=["pyqgis"])
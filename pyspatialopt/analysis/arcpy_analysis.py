@@ -5,7 +5,7 @@ import os
 
 import arcpy
 
-from pyspatialopt import version
+from pyspatialopt import profiling, version
 
 
 def generate_query(unique_ids, unique_field_name, wrap_values_in_quotes=False):
@@ -37,6 +37,22 @@ def reset_layers(*args):
         layer.definitionQuery = ""
 
 
+def dissolve(*args):
+    """
+    Unions every feature of the layers into one geometry
+    :param args: (Feature Layers) The polygon layers to dissolve
+    :return: (Geometry) The dissolved geometry, None if the layers have no features
+    """
+    dissolved_geom = None
+    for layer in args:
+        with arcpy.da.SearchCursor(layer, ['SHAPE@']) as fcursor:
+            for f in fcursor:
+                if dissolved_geom is None:
+                    dissolved_geom = f[0]
+                dissolved_geom = dissolved_geom.union(f[0])
+    return dissolved_geom
+
+
 def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
     """
     Finds to total serviceable coverage when 2 facility layers are used
@@ -66,7 +82,9 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
     if fl is None:
         raise ValueError("No facility service area feature layers specified")
     dl_desc = arcpy.Describe(dl)
+    phases = profiling.phases("arcpy_analysis.generate_serviceable_demand")
     logging.getLogger().info("Initializing output...")
+    phases.next("initialize")
     if dl_desc.shapeType == "Polygon":
         output = {
             "version": version.__version__,
@@ -86,14 +104,10 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
     else:
         raise TypeError("Demand layer must be point or polygon")
     logging.getLogger().info("Combining facilities...")
-    dissovled_geom = None
-    for layer in args:
-        with arcpy.da.SearchCursor(layer, ['SHAPE@']) as fcursor:
-            for f in fcursor:
-                if dissovled_geom is None:
-                    dissovled_geom = f[0]
-                dissovled_geom = dissovled_geom.union(f[0])
+    phases.next("dissolve")
+    dissovled_geom = dissolve(*args)
     logging.getLogger().info("Determining possible service coverage for each demand unit...")
+    phases.next("pairTests")
     with arcpy.da.SearchCursor(dl, [dl_id_field, dl_demand_field, "SHAPE@"]) as dcursor:
         if arcpy.Describe(dl).shapeType == "Polygon":
             for d in dcursor:
@@ -120,11 +134,118 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
                     serviceable_demand = 0.0
                 output["demand"][str(d[0])] = {"serviceableDemand": serviceable_demand}
     logging.getLogger().info("Serviceable demand successfully created.")
+    phases.next("totals")
     reset_layers(dl)
     reset_layers(*args)
+    phases.count("demand", len(output["demand"]))
+    phases.end()
     return output
 
 
+class ServiceableDemandCache(object):
+    """
+    Finds the serviceable demand (see generate_serviceable_demand) of many combinations of facility layers.
+    Each facility layer is dissolved once and the part of each demand unit it covers is kept, so the serviceable
+    demand of a new combination only unions the cached parts of the demand units covered by several layers.
+    Layers are identified by their catalog path, call invalidate if a layer changes
+    """
+
+    def __init__(self, dl, dl_demand_field, dl_id_field):
+        """
+        :param dl: (Feature Layer) The demand polygon or point layer
+        :param dl_demand_field: (string) The field representing demand
+        :param dl_id_field: (string) The name of the unique field for the demand layer
+        """
+        reset_layers(dl)
+        self.shape_type = arcpy.Describe(dl).shapeType
+        if self.shape_type not in ["Polygon", "Point"]:
+            raise TypeError("Demand layer must have polygon or point geometry")
+        dl_field_names = [f.name for f in arcpy.Describe(dl).fields]
+        if dl_demand_field not in dl_field_names:
+            raise ValueError("'{}' field not found in demand layer".format(dl_demand_field))
+        if dl_id_field not in dl_field_names:
+            raise ValueError("'{}' field not found in demand layer".format(dl_id_field))
+        # The demand and geometry of each demand unit
+        self.demand = {}
+        with arcpy.da.SearchCursor(dl, [dl_id_field, dl_demand_field, "SHAPE@"]) as dcursor:
+            for d in dcursor:
+                self.demand[str(d[0])] = (d[1], d[2])
+        self.layers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def layer_coverage(self, layer):
+        """
+        Dissolves a facility layer and clips each demand unit it covers, unless it was done before
+
+        :param layer: (Feature Layer) The facility service area layer
+        :return: (dictionary) The covered part (polygons) or True (points) of each demand unit covered by the layer
+        """
+        key = arcpy.Describe(layer).catalogPath
+        if key in self.layers:
+            self.hits += 1
+            return self.layers[key]
+        self.misses += 1
+        if arcpy.Describe(layer).shapeType != "Polygon":
+            raise TypeError("{} is not a polygon layer".format(key))
+        reset_layers(layer)
+        dissolved_geom = dissolve(layer)
+        covered = {}
+        if dissolved_geom is not None:
+            for demand_id, (demand, geom) in self.demand.items():
+                if dissolved_geom.disjoint(geom):
+                    continue
+                if self.shape_type == "Polygon":
+                    intersected = dissolved_geom.intersect(geom, 4)
+                    if intersected.area > 0:
+                        covered[demand_id] = intersected
+                else:
+                    covered[demand_id] = True
+        self.layers[key] = covered
+        return covered
+
+    def generate(self, *args):
+        """
+        The serviceable demand when the facility layers are used
+
+        :param args: (Feature Layer) The facility layers to use
+        :return: (dictionary) A dictionary of the same format as generate_serviceable_demand
+        """
+        if not args:
+            raise ValueError("No facility service area feature layers specified")
+        layer_coverages = [self.layer_coverage(layer) for layer in args]
+        output = {
+            "version": version.__version__,
+            "demand": {},
+            "type": {
+                "mode": "serviceableDemand",
+                "type": "partial" if self.shape_type == "Polygon" else "binary"}
+        }
+        for demand_id, (demand, geom) in self.demand.items():
+            parts = [covered[demand_id] for covered in layer_coverages if demand_id in covered]
+            serviceable_demand = 0.0
+            if parts and self.shape_type == "Polygon":
+                intersected = parts[0]
+                for part in parts[1:]:
+                    intersected = intersected.union(part)
+                serviceable_demand = min(math.ceil(float(intersected.area / geom.area) * demand), demand)
+            elif parts:
+                serviceable_demand = demand
+            output["demand"][demand_id] = {"serviceableDemand": serviceable_demand}
+        return output
+
+    def invalidate(self, layer=None):
+        """
+        Removes the cached coverage of a layer
+
+        :param layer: (Feature Layer) The layer to remove, None to remove every layer
+        """
+        if layer is None:
+            self.layers = {}
+        else:
+            self.layers.pop(arcpy.Describe(layer).catalogPath, None)
+
+
 def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field, fl_variable_name=None):
     """
     Generates a dictionary representing the binary coverage of a facility to demand points
@@ -152,7 +273,9 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
     reset_layers(dl, fl)
     if fl_variable_name is None:
         fl_variable_name = os.path.splitext(os.path.basename(arcpy.Describe(fl).name))[0]
+    phases = profiling.phases("arcpy_analysis.generate_binary_coverage")
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     output = {
         "version": version.__version__,
         "type": {
@@ -178,6 +301,7 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
                 "coverage": {fl_variable_name: {}}
             }
     logging.getLogger().info("Determining binary coverage for each demand unit...")
+    phases.next("pairTests")
     with arcpy.da.SearchCursor(fl, [fl_id_field, "SHAPE@"]) as fcursor:
         if arcpy.Describe(dl).shapeType == "Point":
             for f in fcursor:
@@ -202,6 +326,10 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
             output["totalDemand"] += row[1]
     logging.getLogger().info("Binary coverage successfully generated.")
     reset_layers(dl, fl)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 
@@ -235,7 +363,9 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field="OBJECTID", f
     if fl_variable_name is None:
         fl_variable_name = os.path.splitext(os.path.basename(arcpy.Describe(fl).name))[0]
     # Create the initial data structure
+    phases = profiling.phases("arcpy_analysis.generate_partial_coverage")
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     output = {
         "version": version.__version__,
         "type": {
@@ -253,6 +383,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field="OBJECTID", f
             output["facilities"][fl_variable_name].append(str(row[0]))
     # populate the coverage dictionary with all demand areas (i)
     logging.getLogger().info("Initializing demand in output...")
+    phases.next("loadDemand")
     with arcpy.da.SearchCursor(dl, [dl_id_field, dl_demand_field, "SHAPE@AREA"]) as cursor:
         for row in cursor:
             output["demand"][str(row[0])] = {
@@ -263,6 +394,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field="OBJECTID", f
             }
     # Dissolve all facility service areas so we can find the total serviceable area
     logging.getLogger().info("Combining facilities...")
+    phases.next("dissolve")
     dissovled_geom = None
     with arcpy.da.SearchCursor(fl, ['SHAPE@']) as fcursor:
         for f in fcursor:
@@ -270,6 +402,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field="OBJECTID", f
                 dissovled_geom = f[0]
             dissovled_geom = dissovled_geom.union(f[0])
     logging.getLogger().info("Determining partial coverage for each demand unit...")
+    phases.next("pairTests")
     with arcpy.da.SearchCursor(dl, [dl_id_field, dl_demand_field, "SHAPE@"]) as dcursor:
         for d in dcursor:
             if not dissovled_geom.disjoint(d[2]):
@@ -303,6 +436,10 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field="OBJECTID", f
             output["totalDemand"] += row[1]
     logging.getLogger().info("Partial coverage successfully generated.")
     reset_layers(dl, fl)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand_field, air_distance_threshold, dl_id_field="OBJECTID", tc_layer_id_field="OBJECTID", ad_layer_id_field="OBJECTID"):
@@ -346,7 +483,9 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
     tc_variable_name = "TraumaCenter"
     ad_tc_variable_name = "ADTCPair"
 
+    phases = profiling.phases("arcpy_analysis.generate_traumah_coverage")
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     output = {
         "version": version.__version__,
         "type": {
@@ -368,6 +507,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
             output["facilities"][tc_variable_name].append(str(row[0]))
     # populate the coverage dictionary with all demand areas (i)
     logging.getLogger().info("Initializing demand in output...")
+    phases.next("loadDemand")
     with arcpy.da.SearchCursor(dl, [dl_id_field, dl_demand_field, "SHAPE@AREA"]) as cursor:
         for row in cursor:
             output["demand"][str(row[0])] = {
@@ -379,6 +519,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                 }
             }
     logging.getLogger().info("Determining binary coverage (using ground transport service area) for each demand unit...")
+    phases.next("groundPairTests")
     with arcpy.da.SearchCursor(tc_layer, [tc_layer_id_field, "SHAPE@"]) as fcursor:
         for f in fcursor:
             with arcpy.da.SearchCursor(dl_service_area, [dl_id_field, "SHAPE@"]) as dcursor:
@@ -389,6 +530,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                         })
 
     logging.getLogger().info("Determining binary coverage (using air transportation) for each demand unit...")
+    phases.next("airPairTests")
     with arcpy.da.SearchCursor(dl, [dl_id_field, "SHAPE@"]) as dcursor:
         for d in dcursor:
             distances = {}
@@ -407,6 +549,10 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                              })
     logging.getLogger().info("Binary traumah coverage successfully generated.")
     reset_layers(dl, tc_layer, ad_layer)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 
@@ -437,7 +583,9 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
             raise TypeError("{} is not a polygon layer".format(fl.desc.name))
     if fl is None:
         raise ValueError("No facility service area feature layers specified")
+    phases = profiling.phases("arcpy_analysis.get_covered_demand")
     logging.getLogger().info("Combining facilities...")
+    phases.next("dissolve")
     dissovled_geom = None
     for layer in args:
         with arcpy.da.SearchCursor(layer, ['SHAPE@']) as fcursor:
@@ -447,6 +595,7 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
                 dissovled_geom = dissovled_geom.union(f[0])
     total_coverage = 0
     logging.getLogger().info("Summing service coverage for each demand unit...")
+    phases.next("pairTests")
     with arcpy.da.SearchCursor(dl, [dl_demand_field, "SHAPE@"]) as dcursor:
         if arcpy.Describe(dl).shapeType == "Polygon" and mode == "partial":
             for d in dcursor:
@@ -473,4 +622,5 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
                 total_coverage += serviceable_demand
     logging.getLogger().info("Covered demand is: {}".format(total_coverage))
     reset_layers(dl)
+    phases.end()
     return total_coverage
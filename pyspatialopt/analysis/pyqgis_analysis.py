@@ -5,7 +5,7 @@ import os
 import qgis
 import qgis.core
 import qgis.utils
-from pyspatialopt import version
+from pyspatialopt import profiling, version
 
 
 def generate_query(unique_ids, unique_field_name, wrap_values_in_quotes=False):
@@ -37,6 +37,21 @@ def reset_layers(*args):
         layer.removeSelection()
 
 
+def dissolve(*args):
+    """
+    Combines every feature of the layers into one geometry
+    :param args: (Feature Layers) The polygon layers to dissolve
+    :return: (QgsGeometry) The dissolved geometry, None if the layers have no features
+    """
+    dissolved_geom = None
+    for layer in args:
+        for feature in layer.getFeatures():
+            if dissolved_geom is None:
+                dissolved_geom = feature.geometry()
+            dissolved_geom = dissolved_geom.combine(feature.geometry())
+    return dissolved_geom
+
+
 def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
     """
     Finds to total serviceable coverage when 2 facility layers are used
@@ -60,7 +75,9 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
         raise ValueError("'{}' field not found in demand layer".format(dl_demand_field))
     if dl_id_field not in dl_field_names:
         raise ValueError("'{}' field not found in demand layer".format(dl_id_field))
+    phases = profiling.phases("pyqgis_analysis.generate_serviceable_demand")
     logging.getLogger().info("Initializing output...")
+    phases.next("initialize")
     if dl.wkbType() == qgis.utils.QGis.WKBPolygon:
         output = {
             "version": version.__version__,
@@ -80,13 +97,10 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
 
     # Merge all of facility layers together
     logging.getLogger().info("Combining facilities...")
-    dissolved_geom = None
-    for layer in args:
-        for feature in layer.getFeatures():
-            if dissolved_geom is None:
-                dissolved_geom = feature.geometry()
-            dissolved_geom = dissolved_geom.combine(feature.geometry())
+    phases.next("dissolve")
+    dissolved_geom = dissolve(*args)
     logging.getLogger().info("Determining possible service coverage for each demand unit...")
+    phases.next("pairTests")
     for feature in dl.getFeatures():
         if dl.wkbType() == qgis.utils.QGis.WKBPolygon:
             if dissolved_geom.intersects(feature.geometry()):
@@ -97,7 +111,7 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
                 else:
                     serviceable_demand = 0.0
             else:
-                serviceable_demand = feature[dl_demand_field]
+                serviceable_demand = 0.0
         else:
             if dissolved_geom.contains(feature.geometry()):
                 serviceable_demand = feature[dl_demand_field]
@@ -110,11 +124,117 @@ def generate_serviceable_demand(dl, dl_demand_field, dl_id_field, *args):
         else:
             output["demand"][str(feature[dl_id_field])]["serviceableDemand"] = feature[dl_demand_field]
     logging.getLogger().info("Serviceable demand successfully created.")
+    phases.next("totals")
     reset_layers(dl)
     reset_layers(*args)
+    phases.count("demand", len(output["demand"]))
+    phases.end()
     return output
 
 
+class ServiceableDemandCache(object):
+    """
+    Finds the serviceable demand (see generate_serviceable_demand) of many combinations of facility layers.
+    Each facility layer is dissolved once and the part of each demand unit it covers is kept, so the serviceable
+    demand of a new combination only unions the cached parts of the demand units covered by several layers.
+    Layers are identified by their source, call invalidate if a layer changes
+    """
+
+    def __init__(self, dl, dl_demand_field, dl_id_field):
+        """
+        :param dl: (Feature Layer) The demand polygon or point layer
+        :param dl_demand_field: (string) The field representing demand
+        :param dl_id_field: (string) The name of the unique field for the demand layer
+        """
+        reset_layers(dl)
+        if dl.wkbType() not in [qgis.utils.QGis.WKBPoint, qgis.utils.QGis.WKBPolygon]:
+            raise TypeError("Demand layer must have polygon or point geometry")
+        self.shape_type = "Polygon" if dl.wkbType() == qgis.utils.QGis.WKBPolygon else "Point"
+        dl_field_names = [field.name() for field in dl.pendingFields()]
+        if dl_demand_field not in dl_field_names:
+            raise ValueError("'{}' field not found in demand layer".format(dl_demand_field))
+        if dl_id_field not in dl_field_names:
+            raise ValueError("'{}' field not found in demand layer".format(dl_id_field))
+        # The demand and geometry of each demand unit
+        self.demand = {}
+        for feature in dl.getFeatures():
+            self.demand[str(feature[dl_id_field])] = (feature[dl_demand_field],
+                                                      qgis.core.QgsGeometry(feature.geometry()))
+        self.layers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def layer_coverage(self, layer):
+        """
+        Dissolves a facility layer and clips each demand unit it covers, unless it was done before
+
+        :param layer: (Feature Layer) The facility service area layer
+        :return: (dictionary) The covered part (polygons) or True (points) of each demand unit covered by the layer
+        """
+        key = layer.source()
+        if key in self.layers:
+            self.hits += 1
+            return self.layers[key]
+        self.misses += 1
+        if layer.wkbType() != qgis.utils.QGis.WKBPolygon:
+            raise TypeError("{} is not a polygon layer".format(key))
+        reset_layers(layer)
+        dissolved_geom = dissolve(layer)
+        covered = {}
+        if dissolved_geom is not None:
+            for demand_id, (demand, geom) in self.demand.items():
+                if self.shape_type == "Polygon":
+                    if dissolved_geom.intersects(geom):
+                        intersected = dissolved_geom.intersection(geom)
+                        if intersected.area() > 0:
+                            covered[demand_id] = intersected
+                elif dissolved_geom.contains(geom):
+                    covered[demand_id] = True
+        self.layers[key] = covered
+        return covered
+
+    def generate(self, *args):
+        """
+        The serviceable demand when the facility layers are used
+
+        :param args: (Feature Layer) The facility layers to use
+        :return: (dictionary) A dictionary of the same format as generate_serviceable_demand
+        """
+        if not args:
+            raise ValueError("No facility service area feature layers specified")
+        layer_coverages = [self.layer_coverage(layer) for layer in args]
+        output = {
+            "version": version.__version__,
+            "demand": {},
+            "type": {
+                "mode": "serviceableDemand",
+                "type": "partial" if self.shape_type == "Polygon" else "binary"}
+        }
+        for demand_id, (demand, geom) in self.demand.items():
+            parts = [covered[demand_id] for covered in layer_coverages if demand_id in covered]
+            serviceable_demand = 0.0
+            if parts and self.shape_type == "Polygon":
+                intersected = parts[0]
+                for part in parts[1:]:
+                    intersected = intersected.combine(part)
+                serviceable_demand = min(math.ceil(float(intersected.area() / geom.area()) * demand), demand)
+            elif parts:
+                serviceable_demand = demand
+            output["demand"][demand_id] = {"serviceableDemand": serviceable_demand}
+        return output
+
+    def invalidate(self, layer=None):
+        """
+        Removes the cached coverage of a layer
+
+        :param layer: (Feature Layer) The layer to remove, None to remove every layer
+        """
+        if layer is None:
+            self.layers = {}
+        else:
+            self.layers.pop(layer.source(), None)
+
+
 def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field, fl_variable_name=None):
     """
     Generates a dictionary representing the binary coverage of a facility to demand points
@@ -142,6 +262,7 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
     reset_layers(dl, fl)
     if fl_variable_name is None:
         fl_variable_name = os.path.basename(os.path.abspath(fl.dataProvider().dataSourceUri())).split(".")[0]
+    phases = profiling.phases("pyqgis_analysis.generate_binary_coverage")
     logging.getLogger().info("Initializing facilities in output...")
     output = {
         "version": version.__version__,
@@ -156,10 +277,12 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
     }
     # List all of the facilities
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     for feature in fl.getFeatures():
         output["facilities"][fl_variable_name].append(str(feature[fl_id_field]))
     # Build empty data structure
     logging.getLogger().info("Initializing demand in output...")
+    phases.next("loadDemand")
     for feature in dl.getFeatures():
         output["demand"][str(feature[dl_id_field])] = {
             "area": round(feature.geometry().area()),
@@ -168,6 +291,7 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
             "coverage": {fl_variable_name: {}}
         }
     logging.getLogger().info("Determining binary coverage for each demand unit...")
+    phases.next("pairTests")
     for feature in fl.getFeatures():
         if dl.wkbType() == qgis.utils.QGis.WKBPoint:
             geom = feature.geometry()
@@ -192,6 +316,10 @@ def generate_binary_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
         output["totalDemand"] += feature[dl_demand_field]
     logging.getLogger().info("Binary coverage successfully generated.")
     reset_layers(dl, fl)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 
@@ -225,7 +353,9 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
     if fl_variable_name is None:
         fl_variable_name = os.path.basename(os.path.abspath(fl.dataProvider().dataSourceUri())).split(".")[0]
     # Create the initial data structure
+    phases = profiling.phases("pyqgis_analysis.generate_partial_coverage")
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     output = {
         "version": version.__version__,
         "type": {
@@ -242,6 +372,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
         output["facilities"][fl_variable_name].append(str(feature[fl_id_field]))
     # Build empty data structure
     logging.getLogger().info("Initializing demand in output...")
+    phases.next("loadDemand")
     for feature in dl.getFeatures():
         output["demand"][str(feature[dl_id_field])] = {
             "area": round(feature.geometry().area()),
@@ -251,6 +382,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
         }
     # Dissolve all facility service areas so we can find the total serviceable area
     logging.getLogger().info("Combining facilities...")
+    phases.next("dissolve")
     dissolved_geom = None
     for feature in fl.getFeatures():
         if dissolved_geom is None:
@@ -258,6 +390,7 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
         dissolved_geom = dissolved_geom.combine(feature.geometry())
     # Iterate over each intersected polygon and areal interpolate the demand that is covered
     logging.getLogger().info("Determining partial coverage for each demand unit...")
+    phases.next("pairTests")
     for feature in dl.getFeatures():
         intersected = dissolved_geom.intersection(feature.geometry())
         if intersected.area() > 0:
@@ -286,6 +419,10 @@ def generate_partial_coverage(dl, fl, dl_demand_field, dl_id_field, fl_id_field,
         output["totalDemand"] += feature[dl_demand_field]
     logging.getLogger().info("Partial coverage successfully generated.")
     reset_layers(dl, fl)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 
@@ -324,6 +461,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
     ad_variable_name = "AirDepot"
     tc_variable_name = "TraumaCenter"
     ad_tc_variable_name = "ADTCPair"
+    phases = profiling.phases("pyqgis_analysis.generate_traumah_coverage")
     logging.getLogger().info("Initializing facilities in output...")
     output = {
         "version": version.__version__,
@@ -339,12 +477,14 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
     }
     # List all of the facilities
     logging.getLogger().info("Initializing facilities in output...")
+    phases.next("loadFacilities")
     for feature in ad_layer.getFeatures():
         output["facilities"][ad_variable_name].append(str(feature[ad_layer_id_field]))
     for feature in tc_layer.getFeatures():
         output["facilities"][tc_variable_name].append(str(feature[tc_layer_id_field]))
     # Build empty data structure
     logging.getLogger().info("Initializing demand in output...")
+    phases.next("loadDemand")
     for feature in dl.getFeatures():
         output["demand"][str(feature[dl_id_field])] = {
             "area": round(feature.geometry().area()),
@@ -354,6 +494,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                          ad_tc_variable_name: []}
         }
     logging.getLogger().info("Determining binary coverage (using ground transport service area) for each demand unit...")
+    phases.next("groundPairTests")
     for feature in tc_layer.getFeatures():
         geom = feature.geometry()
         for dl_p in dl_service_area.getFeatures():
@@ -364,6 +505,7 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                 })
 
     logging.getLogger().info("Determining binary coverage (using air transportation) for each demand unit...")
+    phases.next("airPairTests")
     for d in dl.getFeatures():
         geom = d.geometry()
         distances = {}
@@ -382,6 +524,10 @@ def generate_traumah_coverage(dl, dl_service_area, tc_layer, ad_layer, dl_demand
                     })
     logging.getLogger().info("Binary traumah coverage successfully generated.")
     reset_layers(dl, tc_layer, ad_layer)
+    phases.count("demand", len(output["demand"]))
+    for facility_type in output["facilities"]:
+        phases.count(facility_type, len(output["facilities"][facility_type]))
+    phases.end()
     return output
 
 
@@ -409,7 +555,9 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
     if dl_demand_field not in dl_field_names:
         raise ValueError("'{}' field not found in demand layer".format(dl_demand_field))
         # Merge all of facility layers together
+    phases = profiling.phases("pyqgis_analysis.get_covered_demand")
     logging.getLogger().info("Combining facilities...")
+    phases.next("dissolve")
     dissolved_geom = None
     for layer in args:
         for feature in layer.getFeatures():
@@ -418,6 +566,7 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
             dissolved_geom = dissolved_geom.combine(feature.geometry())
     total_coverage = 0
     logging.getLogger().info("Determining possible service coverage for each demand unit...")
+    phases.next("pairTests")
     for feature in dl.getFeatures():
         if dl.wkbType() == qgis.utils.QGis.WKBPolygon and mode == "partial":
             if dissolved_geom.intersects(feature.geometry()):
@@ -441,4 +590,5 @@ def get_covered_demand(dl, dl_demand_field, mode, *args):
             total_coverage += feature[dl_demand_field]
     logging.getLogger().info("Covered demand is: {}".format(total_coverage))
     reset_layers(dl)
+    phases.end()
     return total_coverage
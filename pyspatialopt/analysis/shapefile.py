@@ -0,0 +1,380 @@
+# -*- coding: UTF-8 -*-
+import datetime
+import os
+import struct
+
+import numpy as np
+
+# The shape type codes of the shapefile header
+SHAPE_TYPES = {
+    "Point": 1,
+    "Polygon": 5
+}
+
+# The shape types the reader supports, keyed by their header code
+READ_SHAPE_TYPES = {
+    1: "Point",
+    3: "PolyLine",
+    5: "Polygon"
+}
+
+
+def _bounds(coordinates):
+    xs = [c[0] for c in coordinates]
+    ys = [c[1] for c in coordinates]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _header(shape_type, file_length, bounds):
+    """
+    The 100 byte header of the .shp and .shx files, file_length is in bytes
+    """
+    return (struct.pack(">7i", 9994, 0, 0, 0, 0, 0, file_length // 2) +
+            struct.pack("<2i", 1000, shape_type) +
+            struct.pack("<8d", bounds[0], bounds[1], bounds[2], bounds[3], 0.0, 0.0, 0.0, 0.0))
+
+
+def _point_content(point):
+    return struct.pack("<i2d", 1, point[0], point[1])
+
+
+def _polygon_content(rings):
+    points = [point for ring in rings for point in ring]
+    parts = []
+    start = 0
+    for ring in rings:
+        parts.append(start)
+        start += len(ring)
+    return (struct.pack("<i4d2i", 5, *(_bounds(points) + (len(rings), len(points)))) +
+            struct.pack("<{}i".format(len(parts)), *parts) +
+            struct.pack("<{}d".format(2 * len(points)), *[c for point in points for c in point]))
+
+
+def _format_value(value, field_type, length, decimals):
+    if value is None:
+        text = ""
+    elif field_type == "N":
+        text = "{:.{}f}".format(value, decimals).rjust(length)
+    else:
+        text = str(value).ljust(length)
+    encoded = text.encode("utf-8")
+    if len(encoded) > length:
+        raise ValueError("'{}' is longer than the field length {}".format(value, length))
+    return encoded.ljust(length)
+
+
+def write_dbf(path, fields, records):
+    """
+    Writes a dBase III table
+
+    :param path: (string) The .dbf file to write
+    :param fields: (list) A (name, type 'C' or 'N', length, decimals) tuple for each field
+    :param records: (list) A list of values (one per field) for each record
+    """
+    for name, field_type, length, decimals in fields:
+        if len(name) > 10:
+            raise ValueError("Field name '{}' is longer than 10 characters".format(name))
+        if field_type not in ["C", "N"]:
+            raise ValueError("'{}' is not a supported field type".format(field_type))
+    today = datetime.date.today()
+    header_length = 32 + 32 * len(fields) + 1
+    record_length = 1 + sum(field[2] for field in fields)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4BIHH20x", 3, today.year - 1900, today.month, today.day, len(records), header_length,
+                            record_length))
+        for name, field_type, length, decimals in fields:
+            f.write(struct.pack("<11sc4xBB14x", name.encode("ascii"), field_type.encode("ascii"), length, decimals))
+        f.write(b"\r")
+        for record in records:
+            f.write(b" ")
+            for value, (name, field_type, length, decimals) in zip(record, fields):
+                f.write(_format_value(value, field_type, length, decimals))
+        f.write(b"\x1a")
+
+
+def write_shapefile(path, shape_type, geometries, fields, records, prj=None):
+    """
+    Writes a point or polygon shapefile (.shp, .shx, .dbf, .cpg and optionally .prj)
+
+    :param path: (string) The .shp file to write, the other files are written next to it
+    :param shape_type: (string) 'Point' or 'Polygon'
+    :param geometries: (list) An (x, y) tuple for each point, or a list of rings for each polygon where each
+        ring is a closed list of (x, y) tuples. Outer rings are clockwise, holes counter clockwise
+    :param fields: (list) A (name, type 'C' or 'N', length, decimals) tuple for each attribute
+    :param records: (list) A list of attribute values for each geometry
+    :param prj: (string) The projection WKT to write to the .prj file, None to not write one
+    """
+    if shape_type not in SHAPE_TYPES:
+        raise ValueError("'{}' is not a supported shape type".format(shape_type))
+    if len(geometries) != len(records):
+        raise ValueError("The number of geometries and records differ")
+    base = os.path.splitext(path)[0]
+    if shape_type == "Point":
+        contents = [_point_content(point) for point in geometries]
+        coordinates = geometries
+    else:
+        contents = [_polygon_content(rings) for rings in geometries]
+        coordinates = [point for rings in geometries for ring in rings for point in ring]
+    bounds = _bounds(coordinates) if coordinates else (0.0, 0.0, 0.0, 0.0)
+    shp_length = 100 + sum(8 + len(content) for content in contents)
+    with open(base + ".shp", "wb") as shp, open(base + ".shx", "wb") as shx:
+        shp.write(_header(SHAPE_TYPES[shape_type], shp_length, bounds))
+        shx.write(_header(SHAPE_TYPES[shape_type], 100 + 8 * len(contents), bounds))
+        offset = 100
+        for number, content in enumerate(contents):
+            shp.write(struct.pack(">2i", number + 1, len(content) // 2))
+            shp.write(content)
+            shx.write(struct.pack(">2i", offset // 2, len(content) // 2))
+            offset += 8 + len(content)
+    write_dbf(base + ".dbf", fields, records)
+    with open(base + ".cpg", "w") as f:
+        f.write("UTF-8")
+    if prj is not None:
+        with open(base + ".prj", "w") as f:
+            f.write(prj)
+
+
+def _gather(buffer, dtype, starts, counts):
+    """
+    Gathers counts[i] little endian values starting at byte starts[i] of the buffer into one array without a
+    Python loop over the records. Records are grouped by their alignment so each group is a strided view
+    """
+    dtype = np.dtype(dtype)
+    size = dtype.itemsize
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    ends = np.cumsum(counts)
+    begins = ends - counts
+    output = np.empty(int(ends[-1]) if len(ends) else 0, dtype=dtype)
+    alignments = starts % size
+    for alignment in np.unique(alignments):
+        mask = alignments == alignment
+        group_counts = counts[mask]
+        if not group_counts.sum():
+            continue
+        view = np.ndarray(((len(buffer) - alignment) // size,), dtype=dtype, buffer=buffer, offset=int(alignment))
+        # The position of each value within its record
+        local = np.arange(group_counts.sum()) - np.repeat(np.cumsum(group_counts) - group_counts, group_counts)
+        output[np.repeat(begins[mask], group_counts) + local] = \
+            view[np.repeat((starts[mask] - alignment) // size, group_counts) + local]
+    return output
+
+
+def _encoding(base):
+    """
+    The encoding named by the .cpg file, UTF-8 if there is none
+    """
+    for extension in [".cpg", ".CPG"]:
+        if os.path.exists(base + extension):
+            with open(base + extension, "r") as f:
+                name = f.read().strip()
+            if name.isdigit():
+                name = "cp" + name
+            return name or "utf-8"
+    return "utf-8"
+
+
+def read_dbf(path, fields=None, encoding="utf-8"):
+    """
+    Reads the columns of a dBase table into arrays. The table is memory mapped and each column is converted
+    in one vectorized pass: numeric fields without decimals become int64 arrays (float64 if a value is blank),
+    other numeric fields float64 arrays (NaN for blanks), logical fields bool arrays and the rest string arrays
+
+    :param path: (string) The .dbf file to read
+    :param fields: (list) The names of the fields to read, None to read every field
+    :param encoding: (string) The encoding of the character fields
+    :return: (dictionary) An array of the values of each field keyed by field name
+    """
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    num_records, header_length, record_length = struct.unpack("<IHH", data[4:12].tobytes())
+    descriptors = []
+    position = 32
+    while position < header_length - 1 and data[position] != 0x0D:
+        name, field_type, length, decimals = struct.unpack("<11sc4xBB14x", data[position:position + 32].tobytes())
+        descriptors.append((name.split(b"\x00")[0].decode("ascii"), field_type.decode("ascii"), length, decimals))
+        position += 32
+    names = [descriptor[0] for descriptor in descriptors]
+    if fields is None:
+        fields = names
+    for field in fields:
+        if field not in names:
+            raise ValueError("'{}' field not found in {}".format(field, path))
+    # A zero copy view of the raw bytes of each field
+    dtype = np.dtype({"names": ["_deleted"] + names,
+                      "formats": ["S1"] + ["S{}".format(descriptor[2]) for descriptor in descriptors],
+                      "offsets": [0] + list(np.cumsum([1] + [descriptor[2] for descriptor in descriptors])[:-1]),
+                      "itemsize": record_length})
+    records = np.ndarray((num_records,), dtype=dtype, buffer=data, offset=header_length)
+    columns = {}
+    for name, field_type, length, decimals in descriptors:
+        if name not in fields:
+            continue
+        raw = np.char.strip(records[name])
+        if field_type in ["N", "F"]:
+            blank = raw == b""
+            if decimals == 0 and not blank.any():
+                columns[name] = raw.astype(np.int64)
+            else:
+                values = np.full(num_records, np.nan)
+                values[~blank] = raw[~blank].astype(np.float64)
+                columns[name] = values
+        elif field_type == "L":
+            columns[name] = np.isin(raw, [b"T", b"t", b"Y", b"y"])
+        else:
+            columns[name] = np.char.decode(raw, encoding)
+    return columns
+
+
+class ShapefileReader(object):
+    """
+    Reads a point, polyline or polygon shapefile into arrays. The .shp and .shx files are memory mapped and
+    every array is built without a Python loop over the features
+
+        reader = shapefile.ShapefileReader("sample_data/demand_polygon.shp")
+        ids, population = reader.attributes(["GEOID10", "Population"]).values()
+        rings = reader.coordinates[reader.part_offsets[0]:reader.part_offsets[1]]
+
+    coordinates is an (n, 2) array of every vertex, part_offsets the index of the first vertex of each part
+    (ring) followed by the number of vertices and geometry_offsets the index of the first part of each feature
+    followed by the number of parts. Point coordinates and the vertices returned by shape are views of the
+    mapped file
+    """
+
+    def __init__(self, path):
+        """
+        :param path: (string) The .shp file to read, the .shx and .dbf files are read from next to it
+        """
+        self.base = os.path.splitext(path)[0]
+        self.shp = np.memmap(self.base + ".shp", dtype=np.uint8, mode="r")
+        shx = np.memmap(self.base + ".shx", dtype=np.uint8, mode="r")
+        if len(self.shp) < 100 or struct.unpack(">i", self.shp[0:4].tobytes())[0] != 9994:
+            raise ValueError("{}.shp is not a shapefile".format(self.base))
+        shape_type = struct.unpack("<i", self.shp[32:36].tobytes())[0]
+        if shape_type not in READ_SHAPE_TYPES:
+            raise ValueError("Shape type {} is not supported".format(shape_type))
+        self.shape_type = READ_SHAPE_TYPES[shape_type]
+        self.bounds = struct.unpack("<4d", self.shp[36:68].tobytes())
+        # The byte offset and length of the content of each record, from the index
+        index = np.ndarray(((len(shx) - 100) // 8, 2), dtype=">i4", buffer=shx, offset=100).astype(np.int64) * 2
+        self.offsets = index[:, 0] + 8
+        self.lengths = index[:, 1]
+        self.shape_types = _gather(self.shp, "<i4", self.offsets, np.ones(len(self.offsets), dtype=np.int64))
+        if not np.isin(self.shape_types, [0, shape_type]).all():
+            raise ValueError("{}.shp has records of another shape type".format(self.base))
+        self._arrays = {}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _null(self):
+        return self.shape_types == 0
+
+    def _counts(self):
+        """
+        The number of parts and vertices of each feature
+        """
+        if "counts" not in self._arrays:
+            counts = np.zeros((len(self), 2), dtype=np.int64)
+            if self.shape_type == "Point":
+                counts[:, :] = 1
+                counts[self._null()] = 0
+            else:
+                valid = ~self._null()
+                counts[valid] = _gather(self.shp, "<i4", self.offsets[valid] + 36,
+                                        np.full(valid.sum(), 2, dtype=np.int64)).reshape(-1, 2)
+            self._arrays["counts"] = counts
+        return self._arrays["counts"]
+
+    @property
+    def coordinates(self):
+        """
+        (array) The (x, y) of every vertex. For points without null records this is a strided view of the file
+        """
+        if "coordinates" not in self._arrays:
+            counts = self._counts()
+            if self.shape_type == "Point":
+                stride = self.lengths[0] + 8 if len(self) else 28
+                if not self._null().any() and (np.diff(self.offsets) == stride).all():
+                    coordinates = np.ndarray((len(self), 2), dtype="<f8", buffer=self.shp,
+                                             offset=int(self.offsets[0]) + 4 if len(self) else 100,
+                                             strides=(int(stride), 8))
+                else:
+                    coordinates = _gather(self.shp, "<f8", self.offsets + 4, counts[:, 1] * 2).reshape(-1, 2)
+            else:
+                starts = self.offsets + 44 + 4 * counts[:, 0]
+                coordinates = _gather(self.shp, "<f8", starts, counts[:, 1] * 2).reshape(-1, 2)
+            self._arrays["coordinates"] = coordinates
+        return self._arrays["coordinates"]
+
+    @property
+    def geometry_offsets(self):
+        """
+        (array) The index of the first part of each feature followed by the number of parts
+        """
+        if "geometryOffsets" not in self._arrays:
+            self._arrays["geometryOffsets"] = np.concatenate([[0], np.cumsum(self._counts()[:, 0])])
+        return self._arrays["geometryOffsets"]
+
+    @property
+    def part_offsets(self):
+        """
+        (array) The index of the first vertex of each part followed by the number of vertices
+        """
+        if "partOffsets" not in self._arrays:
+            counts = self._counts()
+            if self.shape_type == "Point":
+                parts = np.arange(counts[:, 1].sum() + 1, dtype=np.int64)
+            else:
+                # The part starts in the file are relative to the first vertex of each feature
+                starts = _gather(self.shp, "<i4", self.offsets + 44, counts[:, 0]).astype(np.int64)
+                first_vertex = np.cumsum(counts[:, 1]) - counts[:, 1]
+                parts = np.concatenate([starts + np.repeat(first_vertex, counts[:, 0]), [counts[:, 1].sum()]])
+            self._arrays["partOffsets"] = parts
+        return self._arrays["partOffsets"]
+
+    @property
+    def bounding_boxes(self):
+        """
+        (array) The (xmin, ymin, xmax, ymax) of each feature, NaN for null shapes
+        """
+        if "boundingBoxes" not in self._arrays:
+            null = self._null()
+            boxes = np.full((len(self), 4), np.nan)
+            if self.shape_type == "Point":
+                coordinates = _gather(self.shp, "<f8", self.offsets[~null] + 4,
+                                      np.full((~null).sum(), 2, dtype=np.int64)).reshape(-1, 2)
+                boxes[~null] = np.hstack([coordinates, coordinates])
+            else:
+                boxes[~null] = _gather(self.shp, "<f8", self.offsets[~null] + 4,
+                                       np.full((~null).sum(), 4, dtype=np.int64)).reshape(-1, 4)
+            self._arrays["boundingBoxes"] = boxes
+        return self._arrays["boundingBoxes"]
+
+    def shape(self, i):
+        """
+        The vertices of a feature as a view of the file
+
+        :param i: (int) The index of the feature
+        :return: (tuple) The part starts (relative to the first vertex) and the (n, 2) vertices
+        """
+        offset = int(self.offsets[i])
+        if self.shape_types[i] == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros((0, 2))
+        if self.shape_type == "Point":
+            return np.zeros(1, dtype=np.int32), np.ndarray((1, 2), dtype="<f8", buffer=self.shp, offset=offset + 4)
+        num_parts, num_points = struct.unpack("<2i", self.shp[offset + 36:offset + 44].tobytes())
+        parts = np.ndarray((num_parts,), dtype="<i4", buffer=self.shp, offset=offset + 44)
+        points = np.ndarray((num_points, 2), dtype="<f8", buffer=self.shp, offset=offset + 44 + 4 * num_parts)
+        return parts, points
+
+    def attributes(self, fields=None):
+        """
+        Reads the columns of the .dbf file (see read_dbf) using the encoding of the .cpg file
+
+        :param fields: (list) The names of the fields to read, None to read every field
+        :return: (dictionary) An array of the values of each field keyed by field name, in the order of fields
+        """
+        columns = read_dbf(self.base + ".dbf", fields, _encoding(self.base))
+        if fields is None:
+            return columns
+        return dict((field, columns[field]) for field in fields)
@@ -0,0 +1,234 @@
+# -*- coding: UTF-8 -*-
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from pyspatialopt.analysis import shapefile
+
+# Increment when the layout of the sidecar files changes so old sidecars are rebuilt
+FORMAT_VERSION = 1
+
+# The nodes of every level, leaves first. The index of a leaf is the feature it bounds, the index of a higher
+# node is the position of its first child
+ENTRY_DTYPE = np.dtype([("box", "<f8", (4,)), ("index", "<i8")])
+
+
+def content_hash(path, chunk_size=1024 * 1024):
+    """
+    :param path: (string) The file to hash
+    :param chunk_size: (int) The number of bytes to read at a time
+    :return: (string) The sha256 hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_description(path, description):
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "w") as f:
+        json.dump(description, f)
+    os.replace(temp_path, os.path.splitext(path)[0] + ".json")
+
+
+class SpatialIndex(object):
+    """
+    A packed R-tree of feature envelopes built with the Sort-Tile-Recursive algorithm. Queries test one level
+    of the tree at a time with array operations, so many query boxes can be answered in one call
+
+        index = spatial_index.SpatialIndex.build(reader.bounding_boxes)
+        demand_ids, facility_ids = index.query_many(facility_reader.bounding_boxes)
+    """
+
+    def __init__(self, entries, level_bounds, node_size, num_items):
+        """
+        :param entries: (array) The nodes of every level (see ENTRY_DTYPE), may be memory mapped
+        :param level_bounds: (list) The end position of each level in entries, leaves first
+        :param node_size: (int) The largest number of children of a node
+        :param num_items: (int) The number of features, including those without a box
+        """
+        self.entries = entries
+        self.level_bounds = list(level_bounds)
+        self.node_size = node_size
+        self.num_items = num_items
+
+    @classmethod
+    def build(cls, boxes, node_size=16):
+        """
+        :param boxes: (array) The (xmin, ymin, xmax, ymax) of each feature, rows with NaN are not indexed
+        :param node_size: (int) The largest number of children of a node
+        :return: (SpatialIndex) The index
+        """
+        if node_size < 2:
+            raise ValueError("node_size must be at least 2")
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        items = np.flatnonzero(~np.isnan(boxes).any(axis=1))
+        centers = (boxes[items, :2] + boxes[items, 2:]) / 2.0
+        # Sort into vertical slices by x then each slice by y so each leaf covers a compact tile
+        num_leaves = int(np.ceil(len(items) / float(node_size)))
+        slice_size = node_size * max(int(np.ceil(np.sqrt(num_leaves))), 1)
+        by_x = np.argsort(centers[:, 0], kind="stable")
+        slices = np.arange(len(items)) // slice_size
+        order = items[by_x[np.lexsort((centers[by_x, 1], slices))]]
+        level_boxes = [boxes[order]]
+        level_indices = [order]
+        level_bounds = [len(order)]
+        while len(level_boxes[-1]) > 1:
+            children = level_boxes[-1]
+            starts = np.arange(0, len(children), node_size)
+            parents = np.empty((len(starts), 4))
+            parents[:, :2] = np.minimum.reduceat(children[:, :2], starts, axis=0)
+            parents[:, 2:] = np.maximum.reduceat(children[:, 2:], starts, axis=0)
+            level_boxes.append(parents)
+            level_indices.append(starts + (level_bounds[-2] if len(level_bounds) > 1 else 0))
+            level_bounds.append(level_bounds[-1] + len(starts))
+        entries = np.empty(level_bounds[-1], dtype=ENTRY_DTYPE)
+        entries["box"] = np.concatenate(level_boxes) if level_bounds[-1] else np.empty((0, 4))
+        entries["index"] = np.concatenate(level_indices)
+        return cls(entries, level_bounds, node_size, len(boxes))
+
+    def query_many(self, boxes):
+        """
+        Finds the features whose envelope intersects each query box
+
+        :param boxes: (array) The (xmin, ymin, xmax, ymax) of each query
+        :return: (tuple) The query positions and feature indices of every intersecting pair, sorted by query
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if not self.level_bounds[-1] or not len(boxes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        entry_boxes = self.entries["box"]
+        entry_indices = self.entries["index"]
+        level = len(self.level_bounds) - 1
+        level_start = self.level_bounds[level - 1] if level > 0 else 0
+        # Every query against every node of the top level
+        num_top = self.level_bounds[level] - level_start
+        queries = np.repeat(np.arange(len(boxes)), num_top)
+        positions = np.tile(np.arange(level_start, self.level_bounds[level]), len(boxes))
+        while True:
+            node_boxes = entry_boxes[positions]
+            query_boxes = boxes[queries]
+            hit = ((node_boxes[:, 0] <= query_boxes[:, 2]) & (node_boxes[:, 2] >= query_boxes[:, 0]) &
+                   (node_boxes[:, 1] <= query_boxes[:, 3]) & (node_boxes[:, 3] >= query_boxes[:, 1]))
+            queries = queries[hit]
+            positions = positions[hit]
+            if level == 0:
+                break
+            # Expand each hit to its children in the level below
+            child_end = self.level_bounds[level - 1]
+            first = entry_indices[positions]
+            counts = np.minimum(first + self.node_size, child_end) - first
+            local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            queries = np.repeat(queries, counts)
+            positions = np.repeat(first, counts) + local
+            level -= 1
+        features = np.asarray(entry_indices[positions])
+        order = np.lexsort((features, queries))
+        return queries[order], features[order]
+
+    def query(self, box):
+        """
+        :param box: (tuple) The (xmin, ymin, xmax, ymax) to query
+        :return: (array) The sorted indices of the features whose envelope intersects the box
+        """
+        return self.query_many([box])[1]
+
+    def save(self, path, metadata=None):
+        """
+        Writes the index to a .npy file and its description to a .json file next to it. Both are written to
+        temporary files first so other processes never read a partial index
+
+        :param path: (string) The .npy file to write
+        :param metadata: (dictionary) Extra values to store in the description
+        """
+        description = dict(metadata or {})
+        description.update({"formatVersion": FORMAT_VERSION, "nodeSize": self.node_size,
+                            "numItems": self.num_items, "levelBounds": self.level_bounds})
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.asarray(self.entries))
+        os.replace(temp_path, path)
+        _write_description(path, description)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory maps an index written by save
+
+        :param path: (string) The .npy file
+        :return: (tuple) The index and its description
+        """
+        with open(os.path.splitext(path)[0] + ".json", "r") as f:
+            description = json.load(f)
+        if description.get("formatVersion") != FORMAT_VERSION:
+            raise ValueError("{} was written by another version".format(path))
+        entries = np.load(path, mmap_mode="r")
+        if entries.dtype != ENTRY_DTYPE or len(entries) != description["levelBounds"][-1]:
+            raise ValueError("{} does not match its description".format(path))
+        return cls(entries, description["levelBounds"], description["nodeSize"], description["numItems"]), description
+
+
+def sidecar_path(path, directory=None):
+    """
+    :param path: (string) The shapefile
+    :param directory: (string) The directory to keep the index in, defaults to the directory of the shapefile
+    :return: (string) The .npy file of the index of the shapefile
+    """
+    base = os.path.splitext(path)[0]
+    if directory is not None:
+        base = os.path.join(directory, os.path.basename(base))
+    return base + ".rtree.npy"
+
+
+def layer_index(path, node_size=16, directory=None, rebuild=False):
+    """
+    The spatial index of a shapefile layer. The index is built once and kept in sidecar files next to the layer,
+    later calls memory map it. A sidecar is reused while the size and modification time of the .shp file are
+    unchanged, or when they changed but the content hash still matches. Otherwise it is rebuilt
+
+        index = spatial_index.layer_index("sample_data/demand_polygon.shp")
+        candidates = index.query((410000, 4490000, 420000, 4500000))
+
+    :param path: (string) The .shp file
+    :param node_size: (int) The largest number of children of a node
+    :param directory: (string) The directory to keep the sidecar files in, defaults to the directory of the layer
+    :param rebuild: (bool) Whether to rebuild the index even if the sidecar is current
+    :return: (SpatialIndex) The index
+    """
+    shp_path = os.path.splitext(path)[0] + ".shp"
+    index_path = sidecar_path(path, directory)
+    stat = os.stat(shp_path)
+    current = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if not rebuild and os.path.exists(index_path):
+        try:
+            index, description = SpatialIndex.load(index_path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.getLogger().info("Rebuilding the index of {}: {}".format(shp_path, e))
+        else:
+            if description["nodeSize"] == node_size:
+                if description.get("file") == current:
+                    return index
+                digest = content_hash(shp_path)
+                if description.get("hash") == digest:
+                    # Touched but unchanged, remember the new modification time
+                    description["file"] = current
+                    try:
+                        _write_description(index_path, description)
+                    except OSError:
+                        pass
+                    return index
+    digest = content_hash(shp_path)
+    index = SpatialIndex.build(shapefile.ShapefileReader(shp_path).bounding_boxes, node_size)
+    try:
+        index.save(index_path, {"hash": digest, "file": current})
+        logging.getLogger().info("Saved the index of {} to {}".format(shp_path, index_path))
+    except OSError as e:
+        logging.getLogger().info("Could not save the index of {}: {}".format(shp_path, e))
+    return index
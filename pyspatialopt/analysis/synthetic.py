@@ -0,0 +1,105 @@
+# -*- coding: UTF-8 -*-
+import math
+import os
+
+import numpy as np
+
+from pyspatialopt.analysis import shapefile
+
+# The extent (xmin, ymin, xmax, ymax) and projection of the sample data (Salt Lake County, UTM zone 12N)
+EXTENT = (393372.0, 4474185.0, 453212.0, 4530577.0)
+PRJ = 'PROJCS["NAD_1983_UTM_Zone_12N",GEOGCS["GCS_North_American_1983",DATUM["D_North_American_1983",' \
+      'SPHEROID["GRS_1980",6378137.0,298.257222101]],PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]],' \
+      'PROJECTION["Transverse_Mercator"],PARAMETER["False_Easting",500000.0],PARAMETER["False_Northing",0.0],' \
+      'PARAMETER["Central_Meridian",-111.0],PARAMETER["Scale_Factor",0.9996],PARAMETER["Latitude_Of_Origin",0.0],' \
+      'UNIT["Meter",1.0]]'
+
+
+def _circle(x, y, radius, vertices):
+    # Clockwise and closed, as shapefile outer rings are
+    ring = [(x + radius * math.cos(-2 * math.pi * k / vertices), y + radius * math.sin(-2 * math.pi * k / vertices))
+            for k in range(vertices)]
+    ring.append(ring[0])
+    return [ring]
+
+
+def generate_layers(directory, num_demand, num_facilities, overlap=2.0, num_air_depots=None, vertices=32,
+                    extent=EXTENT, seed=None):
+    """
+    Writes random demand and facility layers in the layout of sample_data:
+        * demand_polygon: a grid of square cells with GEOID10 and Population fields
+        * demand_point: the centroids of the cells with the same fields
+        * facility: facility points with an ID field
+        * facility_service_areas: circular service areas around the facilities with an ORIG_ID field
+        * demand_service_areas: circular service areas around the demand points with a GEOID10 field (TRAUMAH)
+        * air_depot: air depot points with an ID field (TRAUMAH, the facilities are the trauma centers)
+
+    :param directory: (string) The directory to write the shapefiles to
+    :param num_demand: (int) The approximate number of demand units (rounded to a full grid)
+    :param num_facilities: (int) The number of facilities
+    :param overlap: (float) The average number of service areas covering a point of the extent
+    :param num_air_depots: (int) The number of air depots, defaults to a quarter of the facilities
+    :param vertices: (int) The number of vertices of each circular service area
+    :param extent: (tuple) The (xmin, ymin, xmax, ymax) extent of the layers
+    :param seed: (int) The random seed, the same seed gives the same layers
+    :return: (dictionary) The path of each layer, the layer sizes, the service area radius and an air distance
+        threshold for the TRAUMAH coverage
+    """
+    if num_demand < 1 or num_facilities < 1:
+        raise ValueError("num_demand and num_facilities must be positive")
+    if overlap <= 0:
+        raise ValueError("overlap must be positive")
+    if num_air_depots is None:
+        num_air_depots = max(1, num_facilities // 4)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = extent
+    width = xmax - xmin
+    height = ymax - ymin
+    columns = max(1, int(round(math.sqrt(num_demand * width / height))))
+    rows = max(1, int(round(float(num_demand) / columns)))
+    cell_width = width / columns
+    cell_height = height / rows
+    radius = math.sqrt(overlap * width * height / (num_facilities * math.pi))
+    paths = dict((name, os.path.join(directory, name + ".shp")) for name in
+                 ["demand_polygon", "demand_point", "facility", "facility_service_areas", "demand_service_areas",
+                  "air_depot"])
+
+    population = rng.integers(0, 5000, rows * columns)
+    cells = []
+    centroids = []
+    demand_records = []
+    for r in range(rows):
+        for c in range(columns):
+            x0 = xmin + c * cell_width
+            y0 = ymin + r * cell_height
+            x1 = x0 + cell_width
+            y1 = y0 + cell_height
+            cells.append([[(x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0)]])
+            centroids.append((x0 + cell_width / 2, y0 + cell_height / 2))
+            demand_records.append(["{:011d}".format(len(demand_records)), int(population[len(demand_records)])])
+    demand_fields = [("GEOID10", "C", 11, 0), ("Population", "N", 10, 0)]
+    shapefile.write_shapefile(paths["demand_polygon"], "Polygon", cells, demand_fields, demand_records, PRJ)
+    shapefile.write_shapefile(paths["demand_point"], "Point", centroids, demand_fields, demand_records, PRJ)
+    shapefile.write_shapefile(paths["demand_service_areas"], "Polygon",
+                              [_circle(x, y, radius, vertices) for x, y in centroids], [demand_fields[0]],
+                              [[record[0]] for record in demand_records], PRJ)
+
+    facilities = [(xmin + rng.random() * width, ymin + rng.random() * height) for _ in range(num_facilities)]
+    shapefile.write_shapefile(paths["facility"], "Point", facilities, [("ID", "N", 10, 0)],
+                              [[j] for j in range(num_facilities)], PRJ)
+    shapefile.write_shapefile(paths["facility_service_areas"], "Polygon",
+                              [_circle(x, y, radius, vertices) for x, y in facilities], [("ORIG_ID", "N", 10, 0)],
+                              [[j] for j in range(num_facilities)], PRJ)
+    air_depots = [(xmin + rng.random() * width, ymin + rng.random() * height) for _ in range(num_air_depots)]
+    shapefile.write_shapefile(paths["air_depot"], "Point", air_depots, [("ID", "N", 10, 0)],
+                              [[k] for k in range(num_air_depots)], PRJ)
+    return {
+        "paths": paths,
+        "numDemand": rows * columns,
+        "numFacilities": num_facilities,
+        "numAirDepots": num_air_depots,
+        "radius": radius,
+        "airDistanceThreshold": 4 * radius
+    }
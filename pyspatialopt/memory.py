@@ -0,0 +1,167 @@
+# -*- coding: UTF-8 -*-
+import sys
+import time
+import tracemalloc
+
+import pulp
+
+
+def _deep_size(obj, seen):
+    """
+    The size of an object and the containers/values it holds, skipping objects already counted
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_size(key, seen) + _deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_size(item, seen)
+    return size
+
+
+def _object_size(obj, seen):
+    size = _deep_size(obj, seen)
+    if hasattr(obj, "__dict__"):
+        size += _deep_size(vars(obj), seen)
+    return size
+
+
+def coverage_breakdown(coverage_dict):
+    """
+    The memory held by a coverage, split into the demand records (ids, demand, area, serviceable demand), the
+    coverage entries (the facilities covering each demand unit) and the facility lists
+
+    :param coverage_dict: (dictionary) The coverage
+    :return: (dictionary) The bytes of each structure, the total, the number of coverage entries and the
+        bytes per coverage entry
+    """
+    seen = set()
+    coverage_entries = 0
+    entries = 0
+    for record in coverage_dict["demand"].values():
+        coverage = record.get("coverage", {})
+        coverage_entries += _deep_size(coverage, seen)
+        for covered in coverage.values():
+            entries += len(covered)
+    # The coverage dictionaries are already seen, so this only counts the records themselves
+    demand_records = _deep_size(coverage_dict["demand"], seen)
+    facilities = _deep_size(coverage_dict.get("facilities", {}), seen)
+    total = _deep_size(coverage_dict, seen) + demand_records + coverage_entries + facilities
+    return {
+        "demandRecords": demand_records,
+        "coverageEntries": coverage_entries,
+        "facilities": facilities,
+        "total": total,
+        "entries": entries,
+        "bytesPerEntry": float(coverage_entries) / entries if entries else None
+    }
+
+
+def model_breakdown(prob):
+    """
+    The memory held by a pulp problem, split into the variables, the constraints and the linear expressions
+    (the objective and the left hand side of each constraint, which hold the coefficients)
+
+    :param prob: (Pulp problem) The problem
+    :return: (dictionary) The bytes of each structure, the total, the number of nonzeros (constraint
+        coefficients) and the bytes per nonzero
+    """
+    seen = set()
+    variables = 0
+    for var in prob.variables():
+        variables += _object_size(var, seen)
+    for name in ["_variables", "_variable_ids"]:
+        if hasattr(prob, name):
+            variables += _deep_size(getattr(prob, name), seen)
+    expressions = _object_size(prob.objective, seen) if prob.objective is not None else 0
+    constraints = 0
+    nonzeros = 0
+    for constraint in prob.constraints.values():
+        expression = getattr(constraint, "expr", constraint)
+        if expression is not constraint:
+            expressions += _object_size(expression, seen)
+        nonzeros += len(constraint)
+        constraints += _object_size(constraint, seen)
+    constraints += _deep_size(prob.constraints, seen)
+    total = variables + constraints + expressions + sys.getsizeof(prob)
+    return {
+        "variables": variables,
+        "constraints": constraints,
+        "expressions": expressions,
+        "total": total,
+        "numVariables": prob.numVariables(),
+        "numConstraints": prob.numConstraints(),
+        "nonzeros": nonzeros,
+        "bytesPerNonzero": float(total) / nonzeros if nonzeros else None
+    }
+
+
+class MemoryTracker(object):
+    """
+    Measures the peak and retained memory (allocations made through Python, using tracemalloc) of the body of a
+    with statement. Allocations made by native libraries (arcpy, QGIS, solvers) aren't seen
+
+        with memory.MemoryTracker() as tracker:
+            mclp = covering.create_mclp_model(coverage, {"total": 5})
+        print(tracker.report(mclp))
+    """
+
+    def __init__(self):
+        self.peak = None
+        self.retained = None
+        self.wall_time = None
+
+    def __enter__(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time = time.time() - self._start
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = peak - self._baseline
+        self.retained = current - self._baseline
+        if self._started:
+            tracemalloc.stop()
+        return False
+
+    def report(self, result=None):
+        """
+        :param result: (dictionary or Pulp problem) A coverage or problem created in the with statement, its
+            memory is broken down by structure
+        :return: (dictionary) The peak and retained bytes, the wall time and the breakdown of the result
+        """
+        report = {"peak": self.peak, "retained": self.retained, "wallTime": self.wall_time}
+        if isinstance(result, pulp.LpProblem):
+            report["model"] = model_breakdown(result)
+            if report["model"]["nonzeros"]:
+                report["peakBytesPerNonzero"] = float(self.peak) / report["model"]["nonzeros"]
+                report["retainedBytesPerNonzero"] = float(self.retained) / report["model"]["nonzeros"]
+        elif isinstance(result, dict) and "demand" in result:
+            report["coverage"] = coverage_breakdown(result)
+            if report["coverage"]["entries"]:
+                report["peakBytesPerEntry"] = float(self.peak) / report["coverage"]["entries"]
+        return report
+
+
+def measure(function, *args, **kwargs):
+    """
+    Calls a function (a coverage generator, merge_coverages, a create_*_model function...) and measures its memory
+
+    :param function: (function) The function to call
+    :param args: The arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :return: (tuple) The result of the function and the report (see MemoryTracker.report)
+    """
+    with MemoryTracker() as tracker:
+        result = function(*args, **kwargs)
+    return result, tracker.report(result)
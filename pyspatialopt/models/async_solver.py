@@ -0,0 +1,232 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import inspect
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import pulp
+from pulp import constants
+
+
+def glpk_reads_two_files(solver):
+    """
+    pulp 3.2 reads GLPK results from the printed output (-o) and the raw solution (-w) files, earlier
+    versions only from the printed output
+
+    :param solver: (Pulp solver) A GLPK command line solver
+    :return: (bool) Whether the installed pulp reads both files
+    """
+    return len(inspect.signature(solver.readsol).parameters) >= 2
+
+
+def warm_start_enabled(solver):
+    """
+    pulp 2.2 keeps the warm start setting in the warmStart attribute, later versions in optionsDict
+
+    :param solver: (Pulp solver) A CBC command line solver
+    :return: (bool) Whether the solver should be given a MIP start
+    """
+    return bool(getattr(solver, "warmStart", False) or getattr(solver, "optionsDict", {}).get("warmStart", False))
+
+
+def solver_command(solver, model_file, files, maximize=False, mip_start_file=None):
+    """
+    Builds the command line pulp uses to run a GLPK or CBC command line solver, including its time limit,
+    mip, options and CBC presolve, cuts and warm start settings
+
+    :param solver: (Pulp solver) A GLPK or CBC command line solver
+    :param model_file: (string) The model file, an LP file for GLPK and an LP or MPS file for CBC
+    :param files: (dictionary) The solution file ('sol') and for GLPK the printed output file ('out')
+    :param maximize: (bool) Pass -max to CBC (for MPS files, LP files state their sense)
+    :param mip_start_file: (string) The CBC MIP start file, None for no MIP start
+    :return: (list) The arguments
+    """
+    if isinstance(solver, pulp.GLPK_CMD):
+        args = [solver.path, "--cpxlp", model_file]
+        if glpk_reads_two_files(solver):
+            args.extend(["-o", files["out"], "-w", files["sol"]])
+        else:
+            args.extend(["-o", files["sol"]])
+        if solver.timeLimit:
+            args.extend(["--tmlim", str(int(solver.timeLimit))])
+        if not solver.mip:
+            args.append("--nomip")
+        args.extend(solver.options)
+        return args
+    args = [solver.path, model_file]
+    if maximize:
+        args.append("-max")
+    if mip_start_file is not None:
+        args.extend(["-mips", mip_start_file])
+    if solver.timeLimit is not None:
+        args.extend(["-sec", str(solver.timeLimit)])
+    options_dict = getattr(solver, "optionsDict", {})
+    if options_dict.get("presolve") is not None:
+        args.extend(["-presolve", "on" if options_dict["presolve"] else "off"])
+    if options_dict.get("cuts") is not None:
+        if options_dict["cuts"]:
+            args.extend(["-gomory", "on", "knapsack", "on", "probing", "on"])
+        else:
+            args.extend(["-cuts", "off"])
+    for option in solver.options + solver.getOptions():
+        args.extend(("-" + option).split())
+    args.append("-solve" if solver.mip else "-initialSolve")
+    args.extend(["-printingOptions", "all", "-solution", files["sol"]])
+    return args
+
+
+def read_glpk(solver, files):
+    """
+    Reads the status and variable values written by GLPK
+
+    :param solver: (Pulp solver) The GLPK command line solver
+    :param files: (dictionary) The files passed to solver_command
+    :return: (tuple) The pulp status and the values keyed by variable name (as strings)
+    """
+    if not os.path.exists(files["sol"]):
+        raise pulp.PulpSolverError("Error while executing {}".format(solver.path))
+    if glpk_reads_two_files(solver):
+        return solver.readsol(files["out"], files["sol"])
+    return solver.readsol(files["sol"])
+
+
+def _write(prob, solver, directory):
+    """
+    Writes the model (and MIP start) files and builds the command line of the solver
+    """
+    sol_file = os.path.join(directory, "model.sol")
+    if isinstance(solver, pulp.GLPK_CMD):
+        lp_file = os.path.join(directory, "model.lp")
+        files = {"out": os.path.join(directory, "model.out"), "sol": sol_file}
+        prob.writeLP(lp_file, writeSOS=0)
+        return solver_command(solver, lp_file, files), files
+    mps_file = os.path.join(directory, "model.mps")
+    vs, variables_names, constraints_names, _ = prob.writeMPS(mps_file, rename=1)
+    mst_file = None
+    if warm_start_enabled(solver):
+        mst_file = os.path.join(directory, "model.mst")
+        solver.writesol(mst_file, prob, vs, variables_names, constraints_names)
+    files = {"sol": sol_file, "vs": vs, "variablesNames": variables_names, "constraintsNames": constraints_names}
+    return solver_command(solver, mps_file, files, prob.sense == constants.LpMaximize, mst_file), files
+
+
+def _read(prob, solver, files):
+    """
+    Reads the solution files back into the problem (as pulp does)
+
+    :return: (int) The pulp status
+    """
+    if isinstance(solver, pulp.GLPK_CMD):
+        status, values = read_glpk(solver, files)
+        variables = dict((var.name, var) for var in prob.variables())
+        for name, value in values.items():
+            if name not in variables:
+                continue
+            if variables[name].cat == constants.LpInteger and solver.mip:
+                values[name] = int(value)
+            else:
+                values[name] = float(value)
+        prob.assignVarsVals(values)
+        prob.assignStatus(status)
+        return status
+    if not os.path.exists(files["sol"]):
+        raise pulp.PulpSolverError("Error while executing {}".format(solver.path))
+    status, values, reduced_costs, shadow_prices, slacks, sol_status = solver.readsol_MPS(
+        files["sol"], prob, files["vs"], files["variablesNames"], files["constraintsNames"])
+    prob.assignVarsVals(values)
+    prob.assignVarsDj(reduced_costs)
+    prob.assignConsPi(shadow_prices)
+    prob.assignConsSlack(slacks, activity=True)
+    prob.assignStatus(status, sol_status)
+    return status
+
+
+async def _kill(process):
+    if process.returncode is None:
+        process.kill()
+        await process.wait()
+
+
+async def solve(prob, solver=None, timeout=None, semaphore=None, directory=None):
+    """
+    Solves a problem with GLPK or CBC in a subprocess without blocking the event loop. The model files are
+    written and the solution read back in a worker thread. If the solve takes longer than the timeout or
+    the task is cancelled the solver process is killed
+
+        results = asyncio.run(async_solver.solve_many([mclp, lscp], pulp.PULP_CBC_CMD(), timeout=60))
+
+    :param prob: (Pulp problem) The problem to solve, its variables and status are set as by prob.solve
+    :param solver: (Pulp solver) A GLPK or CBC command line solver, defaults to GLPK. Its timeLimit,
+        mip, options and CBC presolve, cuts and warm start settings are used
+    :param timeout: (float) The wall clock seconds to allow the solver process, None for no limit
+    :param semaphore: (asyncio.Semaphore) Bounds the number of concurrent solver processes
+    :param directory: (string) The directory to write the model files to, defaults to a temporary directory
+        that is removed after solving
+    :return: (dictionary) The status, objective, solve time and whether the solve timed out
+    """
+    if solver is None:
+        solver = pulp.GLPK(msg=0)
+    if not isinstance(solver, (pulp.GLPK_CMD, pulp.COIN_CMD)):
+        raise TypeError("solver must be a GLPK or CBC command line solver")
+    if not solver.available():
+        raise pulp.PulpSolverError("Cannot execute {}".format(solver.path))
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        work_directory = directory if directory is not None else tempfile.mkdtemp(prefix="pyspatialopt-")
+        try:
+            args, files = await loop.run_in_executor(None, _write, prob, solver, work_directory)
+            start = time.time()
+            process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.DEVNULL,
+                                                           stdout=asyncio.subprocess.DEVNULL,
+                                                           stderr=asyncio.subprocess.DEVNULL)
+            timed_out = False
+            try:
+                return_code = await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                await _kill(process)
+            except asyncio.CancelledError:
+                await _kill(process)
+                raise
+            solve_time = time.time() - start
+            if timed_out:
+                logging.getLogger().info("Killed {} after {:.1f}s".format(prob.name, solve_time))
+                prob.assignStatus(constants.LpStatusNotSolved)
+                status = constants.LpStatusNotSolved
+            else:
+                if return_code != 0:
+                    raise pulp.PulpSolverError("Error while executing {} (exit code {})".format(solver.path,
+                                                                                              return_code))
+                status = await loop.run_in_executor(None, _read, prob, solver, files)
+        finally:
+            if directory is None:
+                shutil.rmtree(work_directory, ignore_errors=True)
+    return {
+        "status": constants.LpStatus[status],
+        "objective": pulp.value(prob.objective) if status == constants.LpStatusOptimal else None,
+        "solveTime": solve_time,
+        "timedOut": timed_out
+    }
+
+
+async def solve_many(problems, solver=None, timeout=None, max_concurrent=None):
+    """
+    Solves several problems concurrently, at most max_concurrent solver processes at a time
+
+    :param problems: (list) The problems to solve
+    :param solver: (Pulp solver) A GLPK or CBC command line solver, defaults to GLPK
+    :param timeout: (float) The wall clock seconds to allow each solve, None for no limit
+    :param max_concurrent: (int) The largest number of concurrent solver processes, defaults to the number of CPUs
+    :return: (list) The result of each problem (see solve), in order
+    """
+    if max_concurrent is None:
+        max_concurrent = os.cpu_count() or 1
+    if max_concurrent < 1:
+        raise ValueError("max_concurrent must be at least 1")
+    semaphore = asyncio.Semaphore(max_concurrent)
+    return await asyncio.gather(*[solve(prob, solver, timeout, semaphore) for prob in problems])
@@ -0,0 +1,210 @@
+# -*- coding: UTF-8 -*-
+import numpy as np
+
+from pyspatialopt.models import heuristics
+
+# The bits of every byte value, _BYTE_BITS[v, k] is bit k of v
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(np.float64)
+_BYTE_COUNTS = _BYTE_BITS.sum(axis=1).astype(np.int64)
+
+
+class BitsetCoverage(object):
+    """
+    A binary coverage where the demand each facility covers is a packed bit array (one bit per demand unit,
+    64 per uint64 word). Sets of demand are combined with bulk bitwise operations and weighted by demand
+    a block of words at a time with a lookup table of the demand of every byte value, so weighting many sets
+    never unpacks them. Facility and demand positions are the same as heuristics.index_coverage
+    """
+
+    def __init__(self, coverage_dict, use_serviceable_demand=False, block_words=128, block_bytes=8 * 1024 * 1024):
+        """
+        Packs a binary coverage
+
+        :param coverage_dict: (dictionary) The binary coverage
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param block_words: (int) The number of words of each demand set weighted at once
+        :param block_bytes: (int) The approximate memory used by the lookups of a block of demand sets
+        """
+        if not isinstance(coverage_dict, dict):
+            raise TypeError("coverage_dict is not a dictionary")
+        if coverage_dict["type"]["type"] != "binary":
+            raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+        index = heuristics.index_coverage(coverage_dict, use_serviceable_demand)
+        self.demand_ids = index["demandIds"]
+        self.facilities = index["facilities"]
+        self.facility_index = index["facilityIndex"]
+        self.weights = np.asarray(index["weights"], dtype=np.float64)
+        self.num_demand = len(self.demand_ids)
+        self.num_words = (self.num_demand + 63) // 64
+        # Build the bits as bytes then view them as words, bit i of the array is demand unit i
+        packed = np.zeros((len(self.facilities), self.num_words * 8), dtype=np.uint8)
+        for j, covered in enumerate(index["facilityDemand"]):
+            positions = np.fromiter((i for i, a in covered if a), dtype=np.int64)
+            np.bitwise_or.at(packed[j], positions >> 3, np.left_shift(1, positions & 7).astype(np.uint8))
+        self.bits = packed.view("<u8")
+        self.block_words = block_words
+        self.block_rows = max(1, block_bytes // (block_words * 8 * 8))
+        # The weights of the padding bits are 0
+        self._byte_weights = np.zeros(self.num_words * 64)
+        self._byte_weights[:self.num_demand] = self.weights
+        self._byte_weights = self._byte_weights.reshape(-1, 8)
+        self.type_names = list(coverage_dict["facilities"].keys())
+        type_positions = dict((facility_type, k) for k, facility_type in enumerate(self.type_names))
+        self.facility_types = np.array([type_positions[facility_type] for facility_type, facility_id in
+                                        self.facilities], dtype=np.int64)
+
+    def positions(self, ids):
+        """
+        Converts ids keyed by facility type to facility positions (repeated ids are repeated)
+
+        :param ids: (dictionary) A list of ids keyed by facility type
+        :return: (list) The facility positions
+        """
+        return [self.facility_index[(facility_type, facility_id)]
+                for facility_type, type_ids in ids.items() for facility_id in type_ids]
+
+    def empty(self):
+        """
+        :return: (numpy array) A demand set with no demand units
+        """
+        return np.zeros(self.num_words, dtype=np.uint64)
+
+    def covered(self, facilities):
+        """
+        The demand units covered by at least one of the facilities
+
+        :param facilities: (list) The facility positions
+        :return: (numpy array) The packed demand set
+        """
+        positions = np.asarray(facilities, dtype=np.int64)
+        mask = self.empty()
+        # Combine block_rows facilities at a time rather than copying the bits of all of them
+        for start in range(0, len(positions), self.block_rows):
+            mask |= np.bitwise_or.reduce(self.bits[positions[start:start + self.block_rows]], axis=0)
+        return mask
+
+    def _weigh(self, masks, within=None):
+        """
+        The total demand in each demand set, block_rows sets and block_words words at a time so the lookups
+        never take more than about block_bytes
+
+        :param masks: (numpy array) Packed demand sets, one per row
+        :param within: (numpy array) A packed demand set to intersect each set with first, None for no intersection
+        :return: (numpy array) The total demand in each set
+        """
+        totals = np.zeros(len(masks), dtype=np.float64)
+        for word_start in range(0, self.num_words, self.block_words):
+            word_end = min(word_start + self.block_words, self.num_words)
+            # table[b, v] is the demand of byte value v at byte b of the block
+            table = self._byte_weights[word_start * 8:word_end * 8].dot(_BYTE_BITS.T)
+            positions = np.arange(len(table))
+            for row_start in range(0, len(masks), self.block_rows):
+                block = masks[row_start:row_start + self.block_rows, word_start:word_end]
+                if within is not None:
+                    block = block & within[word_start:word_end]
+                block = np.ascontiguousarray(block, dtype="<u8").view(np.uint8)
+                totals[row_start:row_start + self.block_rows] += table[positions, block].sum(axis=1)
+        return totals
+
+    def count(self, mask):
+        """
+        :param mask: (numpy array) A packed demand set
+        :return: (int) The number of demand units in the set
+        """
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(mask).sum())
+        return int(_BYTE_COUNTS[np.ascontiguousarray(mask, dtype="<u8").view(np.uint8)].sum())
+
+    def weight(self, mask):
+        """
+        :param mask: (numpy array) A packed demand set
+        :return: (float) The total demand in the set
+        """
+        return float(self._weigh(mask[None, :])[0])
+
+    def weight_many(self, masks):
+        """
+        :param masks: (numpy array) Packed demand sets, one per row
+        :return: (numpy array) The total demand in each set
+        """
+        return self._weigh(masks)
+
+    def covered_demand(self, facilities):
+        """
+        :param facilities: (list) The facility positions
+        :return: (float) The total demand covered by at least one of the facilities
+        """
+        return self.weight(self.covered(facilities))
+
+    def marginal_gain(self, facility, mask):
+        """
+        :param facility: (int) The facility position
+        :param mask: (numpy array) The packed demand set that is already covered
+        :return: (float) The demand the facility covers that isn't already covered
+        """
+        return self.weight(self.bits[facility] & ~mask)
+
+    def marginal_gains(self, mask):
+        """
+        The marginal gain of every facility
+
+        :param mask: (numpy array) The packed demand set that is already covered
+        :return: (numpy array) The demand each facility covers that isn't already covered
+        """
+        return self._weigh(self.bits, ~mask)
+
+    def k_coverage(self, facilities, k):
+        """
+        The demand units covered at least 1, 2, ..., k times as bit-sliced saturating counters.
+        levels[m] holds the demand units covered at least m + 1 times
+
+        :param facilities: (list) The facility positions, repeated positions are counted multiple times
+        :param k: (int) The largest number of times to count
+        :return: (numpy array) The k packed demand sets
+        """
+        levels = np.zeros((k, self.num_words), dtype=np.uint64)
+        for j in facilities:
+            row = self.bits[j]
+            for m in range(k - 1, 0, -1):
+                levels[m] |= levels[m - 1] & row
+            levels[0] |= row
+        return levels
+
+    def k_coverage_counts(self, facilities, k):
+        """
+        :param facilities: (list) The facility positions, repeated positions are counted multiple times
+        :param k: (int) The largest number of times to count
+        :return: (dictionary) The number of demand units ('count') and total demand ('demand') covered at least
+            1, 2, ..., k times as lists
+        """
+        levels = self.k_coverage(facilities, k)
+        return {
+            "count": [self.count(level) for level in levels],
+            "demand": self.weight_many(levels).tolist()
+        }
+
+    def greedy(self, num_fac):
+        """
+        Chooses facilities one at a time by largest marginal gain, evaluating every facility's gain in bulk
+
+        :param num_fac: (dictionary) The dictionary of number of facilities to use
+        :return: (list) The chosen facility positions in the order they were chosen
+        """
+        chosen = []
+        type_totals = {}
+        mask = self.empty()
+        available = np.ones(len(self.facilities), dtype=bool)
+        while available.any() and heuristics.can_add_facility(None, num_fac, type_totals, len(chosen)):
+            gains = np.where(available, self.marginal_gains(mask), -1.0)
+            j = int(np.argmax(gains))
+            if gains[j] <= 0:
+                break
+            chosen.append(j)
+            available[j] = False
+            facility_type = self.facilities[j][0]
+            type_totals[facility_type] = type_totals.get(facility_type, 0) + 1
+            if not heuristics.can_add_facility(facility_type, num_fac, type_totals, len(chosen)):
+                # The facility type is full
+                available[self.facility_types == self.type_names.index(facility_type)] = False
+            mask |= self.bits[j]
+        return chosen
@@ -0,0 +1,538 @@
+# -*- coding: UTF-8 -*-
+import collections
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+
+import pulp
+
+from pyspatialopt.models import async_solver, sweep
+
+
+def coverage_hash(coverage_dict):
+    """
+    A stable content hash of a coverage. Equal coverages have the same hash regardless of key order
+
+    :param coverage_dict: (dictionary) The coverage
+    :return: (string) The hex digest
+    """
+    encoded = json.dumps(coverage_dict, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CompiledModel(object):
+    """
+    A covering model in the form the solvers read: the text of its LP file, the names of its variables and
+    its objective coefficients. Solving writes the LP text to a file and runs GLPK or CBC on it, so no pulp
+    objects are created. A compiled model is never changed by solving, so it can be shared and solved by
+    several callers at once
+
+        compiled = model_cache.compile_model(coverage, "mclp", {"num_fac": {"total": 5}})
+        result = compiled.solve(pulp.PULP_CBC_CMD(msg=0))
+        ids = result["ids"]["facility_service_areas"]
+    """
+
+    def __init__(self, name, lp, variables, objective, constant=0.0, initial_values=None, facility_types=None,
+                 delineator="$"):
+        """
+        :param name: (string) The problem name
+        :param lp: (string) The LP file text
+        :param variables: (list) The variable names
+        :param objective: (dictionary) The objective coefficient of each variable keyed by variable name
+        :param constant: (float) The objective constant
+        :param initial_values: (dictionary) The MIP start value of each variable keyed by variable name
+        :param facility_types: (list) The facility types of the coverage, used to report the chosen ids
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        """
+        self.name = name
+        self.lp = lp
+        self.variables = variables
+        self.objective = objective
+        self.constant = constant
+        self.initial_values = initial_values or {}
+        self.facility_types = facility_types or []
+        self.delineator = delineator
+        # The approximate memory used by the model
+        self.size = len(lp) + sum(len(variable) + 64 for variable in variables)
+
+    @classmethod
+    def from_problem(cls, prob, facility_types=None, delineator="$"):
+        """
+        :param prob: (Pulp problem) The problem to compile
+        :param facility_types: (list) The facility types of the coverage, used to report the chosen ids
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :return: (CompiledModel) The compiled model
+        """
+        directory = tempfile.mkdtemp(prefix="pyspatialopt-")
+        try:
+            lp_file = os.path.join(directory, "model.lp")
+            prob.writeLP(lp_file, writeSOS=0)
+            with open(lp_file, "r") as f:
+                lp = f.read()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        variables = prob.variables()
+        return cls(prob.name, lp, [var.name for var in variables],
+                   dict((var.name, value) for var, value in prob.objective.items()), prob.objective.constant,
+                   dict((var.name, var.varValue) for var in variables if var.varValue is not None),
+                   facility_types, delineator)
+
+    def to_dict(self):
+        """
+        :return: (dictionary) The model as a JSON serializable dictionary
+        """
+        return {
+            "name": self.name,
+            "lp": self.lp,
+            "variables": self.variables,
+            "objective": self.objective,
+            "constant": self.constant,
+            "initialValues": self.initial_values,
+            "facilityTypes": self.facility_types,
+            "delineator": self.delineator
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: (dictionary) A dictionary created by to_dict
+        :return: (CompiledModel) The compiled model
+        """
+        return cls(data["name"], data["lp"], data["variables"], data["objective"], data["constant"],
+                   data["initialValues"], data["facilityTypes"], data["delineator"])
+
+    def _read_cbc(self, solver, sol_file):
+        """
+        Reads the status and variable values written by CBC (as pulp's readsol_MPS does)
+        """
+        status, sol_status = solver.get_status(sol_file)
+        values = {}
+        with open(sol_file, "r") as f:
+            f.readline()
+            for line in f:
+                if len(line) <= 2:
+                    break
+                fields = line.split()
+                if fields[0] == "**":
+                    fields = fields[1:]
+                values[fields[1]] = float(fields[2])
+        return status, values
+
+    def _write_mip_start(self, path):
+        """
+        Writes the initial values as a CBC solution file (as pulp's writesol does)
+        """
+        with open(path, "w") as f:
+            f.write("Stopped on time - objective value 0\n")
+            for i, variable in enumerate(self.variables):
+                f.write("{:>7} {} {:>15} {:>23}\n".format(i, variable, self.initial_values.get(variable, 0), 0))
+
+    def solve(self, solver=None, directory=None):
+        """
+        Solves the model with GLPK or CBC in a subprocess
+
+        :param solver: (Pulp solver) A GLPK or CBC command line solver, defaults to GLPK. Its time limit, mip,
+            options and CBC presolve, cuts and warm start settings are used
+        :param directory: (string) The directory to write the model files to, defaults to a temporary directory
+            that is removed after solving
+        :return: (dictionary) The status, objective, chosen ids keyed by facility type, value of each variable
+            and solve time
+        """
+        if solver is None:
+            solver = pulp.GLPK(msg=0)
+        if not isinstance(solver, (pulp.GLPK_CMD, pulp.COIN_CMD)):
+            raise TypeError("solver must be a GLPK or CBC command line solver")
+        if not solver.available():
+            raise pulp.PulpSolverError("Cannot execute {}".format(solver.path))
+        work_directory = directory if directory is not None else tempfile.mkdtemp(prefix="pyspatialopt-")
+        try:
+            lp_file = os.path.join(work_directory, "model.lp")
+            files = {"out": os.path.join(work_directory, "model.out"),
+                     "sol": os.path.join(work_directory, "model.sol")}
+            with open(lp_file, "w") as f:
+                f.write(self.lp)
+            mst_file = None
+            if isinstance(solver, pulp.COIN_CMD) and async_solver.warm_start_enabled(solver) and self.initial_values:
+                mst_file = os.path.join(work_directory, "model.mst")
+                self._write_mip_start(mst_file)
+            start = time.time()
+            return_code = subprocess.call(async_solver.solver_command(solver, lp_file, files,
+                                                                      mip_start_file=mst_file),
+                                          stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                          stderr=subprocess.DEVNULL)
+            solve_time = time.time() - start
+            if return_code != 0:
+                raise pulp.PulpSolverError("Error while executing {} (exit code {})".format(solver.path,
+                                                                                          return_code))
+            if isinstance(solver, pulp.GLPK_CMD):
+                status, values = async_solver.read_glpk(solver, files)
+            else:
+                if not os.path.exists(files["sol"]):
+                    raise pulp.PulpSolverError("Error while executing {}".format(solver.path))
+                status, values = self._read_cbc(solver, files["sol"])
+        finally:
+            if directory is None:
+                shutil.rmtree(work_directory, ignore_errors=True)
+        values = dict((variable, float(values.get(variable, 0.0))) for variable in self.variables)
+        optimal = status == pulp.LpStatusOptimal
+        ids = {}
+        if optimal:
+            for facility_type in self.facility_types:
+                prefix = facility_type + self.delineator
+                ids[facility_type] = [variable[len(prefix):] for variable in self.variables
+                                      if variable.startswith(prefix) and values[variable] >= 1.0 - 1e-6]
+        return {
+            "status": pulp.LpStatus[status],
+            "objective": self.constant + sum(coefficient * values[variable]
+                                             for variable, coefficient in self.objective.items()) if optimal else None,
+            "ids": ids,
+            "values": values,
+            "solveTime": solve_time
+        }
+
+
+class ModelCache(object):
+    """
+    Caches compiled covering models (see CompiledModel) keyed by a content hash of the coverage, the model
+    type and the parameters. A hit hands back the cached compiled model without building any pulp objects.
+    Models are held in a least recently used cache bounded by their approximate size, and optionally written
+    to a directory so other processes (or later runs) can load them.
+
+    The coverage is hashed on every call, pass coverage_key to skip hashing an unchanged coverage.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, directory=None):
+        """
+        :param max_bytes: (int) The approximate memory to use for cached models
+        :param directory: (string) The directory of the on disk cache, None for no disk cache. It is not bounded
+        """
+        if directory is not None and not isinstance(directory, str):
+            raise TypeError("directory is not a string")
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._models = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, coverage_dict, model_type, parameters, delineator="$", use_serviceable_demand=False,
+            warm_start=None, coverage_key=None):
+        """
+        The cache key of a model
+
+        :param coverage_dict: (dictionary) The coverage to use to generate the model
+        :param model_type: (string) One of the keys of sweep.MODEL_PARAMETERS
+        :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility type
+        :param coverage_key: (string) A precomputed coverage hash (coverage_hash), saves hashing the coverage
+        :return: (string) The key
+        """
+        if coverage_key is None:
+            coverage_key = coverage_hash(coverage_dict)
+        arguments = json.dumps([model_type, parameters, delineator, use_serviceable_demand, warm_start],
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256((coverage_key + arguments).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, "{}.json".format(key))
+
+    def _store(self, key, compiled):
+        with self._lock:
+            if key in self._models:
+                return
+            if compiled.size > self.max_bytes:
+                return
+            self._models[key] = compiled
+            self._bytes += compiled.size
+            while self._bytes > self.max_bytes:
+                self._bytes -= self._models.popitem(last=False)[1].size
+
+    def compile_model(self, coverage_dict, model_type, parameters, delineator="$", use_serviceable_demand=False,
+                      warm_start=None, coverage_key=None):
+        """
+        Creates (see sweep.create_model) and compiles a covering model, or returns the cached compiled model
+        when the same model was compiled before
+
+        :param coverage_dict: (dictionary) The coverage to use to generate the model
+        :param model_type: (string) One of the keys of sweep.MODEL_PARAMETERS
+        :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility type
+        :param coverage_key: (string) A precomputed coverage hash (coverage_hash), saves hashing the coverage
+        :return: (CompiledModel) The compiled model, shared with other callers
+        """
+        key = self.key(coverage_dict, model_type, parameters, delineator, use_serviceable_demand, warm_start,
+                       coverage_key)
+        with self._lock:
+            compiled = self._models.get(key)
+            if compiled is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return compiled
+        if self.directory is not None and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), "r") as f:
+                    compiled = CompiledModel.from_dict(json.load(f))
+            except (ValueError, KeyError) as e:
+                # Partially written or written by an earlier version, compile it again
+                logging.getLogger().info("Ignoring cached model {}: {}".format(key, e))
+            else:
+                self._store(key, compiled)
+                with self._lock:
+                    self.disk_hits += 1
+                return compiled
+        with self._lock:
+            self.misses += 1
+        prob = sweep.create_model(coverage_dict, model_type, parameters, delineator, use_serviceable_demand,
+                                  warm_start)
+        compiled = CompiledModel.from_problem(prob, list(coverage_dict["facilities"].keys()), delineator)
+        self._store(key, compiled)
+        if self.directory is not None:
+            # Write to a temporary file first so other processes never read a partial model
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "w") as f:
+                json.dump(compiled.to_dict(), f)
+            os.replace(temp_path, self._path(key))
+            logging.getLogger().info("Cached {} model {}".format(model_type, key))
+        return compiled
+
+    def clear(self, disk=False):
+        """
+        Removes every model from the memory cache
+
+        :param disk: (bool) Also remove the models on disk
+        """
+        with self._lock:
+            self._models.clear()
+            self._bytes = 0
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def __len__(self):
+        return len(self._models)
+
+
+# The version of each solver executable, found once per process
+_solver_versions = {}
+
+# The statuses that don't depend on how long the solver ran. pulp reports a solution found before a time limit
+# as Optimal too, so an optimal result is only stored when its solution status is optimal
+_FINAL_STATUSES = ["Infeasible", "Unbounded"]
+
+
+def is_final(result, solver):
+    """
+    :param result: (dictionary) The result of sweep.solve_parameters
+    :param solver: (Pulp solver) The solver that produced it
+    :return: (bool) Whether the result would be the same with more time, so it can be stored
+    """
+    if result["status"] in _FINAL_STATUSES:
+        return True
+    if result["status"] != "Optimal" or result.get("solutionStatus") != pulp.LpSolutionOptimal:
+        return False
+    # pulp maps GLPK's INTEGER NON-OPTIMAL (stopped by the time limit) to an optimal solution
+    return not (isinstance(solver, pulp.GLPK_CMD) and solver.timeLimit)
+
+
+def solver_version(solver):
+    """
+    The version of a solver: the version printed by the GLPK/CBC executable, otherwise the solver name and
+    the pulp version
+
+    :param solver: (Pulp solver) The solver
+    :return: (string) The version
+    """
+    path = getattr(solver, "path", None)
+    if path in _solver_versions:
+        return _solver_versions[path]
+    version = "{} pulp {}".format(solver.name, getattr(pulp, "__version__", "unknown"))
+    if path is not None and isinstance(solver, (pulp.GLPK_CMD, pulp.COIN_CMD)):
+        args = [path, "--version"] if isinstance(solver, pulp.GLPK_CMD) else [path, "-quit"]
+        try:
+            output = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, timeout=10).stdout.decode("utf-8", "replace")
+            for line in output.splitlines():
+                if "version" in line.lower() or "GLPK" in line:
+                    version = "{} {}".format(solver.name, line.strip())
+                    break
+        except (OSError, subprocess.SubprocessError):
+            pass
+        _solver_versions[path] = version
+    return version
+
+
+def solver_options(solver):
+    """
+    The options of a solver that can change its result
+
+    :param solver: (Pulp solver) The solver
+    :return: (dictionary) The solver name, mip, time limit and options
+    """
+    return {
+        "name": solver.name,
+        "mip": getattr(solver, "mip", True),
+        "timeLimit": getattr(solver, "timeLimit", None),
+        "options": [str(option) for option in getattr(solver, "options", [])],
+        "optionsDict": dict((key, str(value)) for key, value in getattr(solver, "optionsDict", {}).items())
+    }
+
+
+class ResultCache(object):
+    """
+    Stores the results of solved models in a sqlite database keyed by a content hash of the coverage, the
+    model type, the parameters and the solver options, so solving the same model again (in this or another
+    process) returns the stored status, objective and ids without solving. Each result records the solver
+    version, results from another version are ignored and can be removed with invalidate. The least recently
+    used results are evicted when there are more than max_entries.
+    """
+
+    def __init__(self, path, max_entries=100000):
+        """
+        :param path: (string) The sqlite database file, created if it doesn't exist
+        :param max_entries: (int) The largest number of stored results
+        """
+        if not isinstance(path, str):
+            raise TypeError("path is not a string")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                                     "solver_version TEXT NOT NULL, result TEXT NOT NULL, "
+                                     "created REAL NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, coverage_dict, model_type, parameters, solver, delineator="$", use_serviceable_demand=False,
+            coverage_key=None):
+        """
+        The key of a model and solver
+
+        :param coverage_dict: (dictionary) The coverage to use to generate the model
+        :param model_type: (string) One of the keys of sweep.MODEL_PARAMETERS
+        :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+        :param solver: (Pulp solver) The solver
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param coverage_key: (string) A precomputed coverage hash (coverage_hash), saves hashing the coverage
+        :return: (string) The key
+        """
+        if coverage_key is None:
+            coverage_key = coverage_hash(coverage_dict)
+        arguments = json.dumps([model_type, parameters, delineator, use_serviceable_demand, solver_options(solver)],
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256((coverage_key + arguments).encode("utf-8")).hexdigest()
+
+    def get(self, key, version):
+        """
+        :param key: (string) The key
+        :param version: (string) The solver version, results stored by another version are ignored
+        :return: (dictionary) The stored result, None if there isn't one
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT result FROM results WHERE key = ? AND solver_version = ?",
+                                           (key, version)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, version, result):
+        """
+        Stores a result, evicting the least recently used results when the store is full
+
+        :param key: (string) The key
+        :param version: (string) The solver version
+        :param result: (dictionary) The result (JSON serializable)
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                                     (key, version, json.dumps(result), now, now))
+            count = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries:
+                self._connection.execute("DELETE FROM results WHERE key IN (SELECT key FROM results "
+                                         "ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+
+    def solve(self, coverage_dict, model_type, parameters, solver=None, delineator="$",
+              use_serviceable_demand=False, coverage_key=None):
+        """
+        Creates and solves a model (see sweep.solve_parameters), returning the stored result when the same
+        model was solved before with the same solver version and options. Only proven optimal, infeasible and
+        unbounded results are stored (see is_final)
+
+        :param coverage_dict: (dictionary) The coverage to use to generate the model
+        :param model_type: (string) One of the keys of sweep.MODEL_PARAMETERS
+        :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+        :param solver: (Pulp solver) The solver to use, defaults to GLPK
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param coverage_key: (string) A precomputed coverage hash (coverage_hash), saves hashing the coverage
+        :return: (dictionary) The result of sweep.solve_parameters with 'cached' set when it was stored
+        """
+        if solver is None:
+            solver = pulp.GLPK()
+        key = self.key(coverage_dict, model_type, parameters, solver, delineator, use_serviceable_demand,
+                       coverage_key)
+        version = solver_version(solver)
+        result = self.get(key, version)
+        if result is not None:
+            result["cached"] = True
+            return result
+        result = sweep.solve_parameters(coverage_dict, model_type, parameters, solver, delineator,
+                                        use_serviceable_demand)
+        if is_final(result, solver):
+            self.put(key, version, result)
+        result["cached"] = False
+        return result
+
+    def invalidate(self, version=None, keep_version=None):
+        """
+        Removes stored results
+
+        :param version: (string) Remove the results of this solver version
+        :param keep_version: (string) Remove the results of every other solver version
+        :return: (int) The number of removed results
+        """
+        with self._lock, self._connection:
+            if version is not None:
+                cursor = self._connection.execute("DELETE FROM results WHERE solver_version = ?", (version,))
+            elif keep_version is not None:
+                cursor = self._connection.execute("DELETE FROM results WHERE solver_version != ?", (keep_version,))
+            else:
+                cursor = self._connection.execute("DELETE FROM results")
+            return cursor.rowcount
+
+    def close(self):
+        """
+        Closes the database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -1,20 +1,25 @@
 # -*- coding: UTF-8 -*-
-import copy
 import pulp
 
+from pyspatialopt import profiling
+from pyspatialopt.models import heuristics
+
 
 def update_serviceable_demand(coverage, sd):
     """
     Updates a coverage with new values from a serviceable demand dict
 
     :param coverage: (dict) The coverage to update
-    :param sd: (dict) The corresponding serviceable demand to use as update
+    :param sd: (dict) The corresponding serviceable demand to use as update, such as the output of
+        generate_serviceable_demand or ServiceableDemandCache.generate
     :return: (dict) The coverage with the updated serviceable demands
     """
     total_serviceable_demand = 0.0
-    for demand in coverage["demand"].keys():
-        coverage["demand"][demand]["serviceableDemand"] = sd["demand"][demand]["serviceableDemand"]
-        total_serviceable_demand += sd["demand"][demand]["serviceableDemand"]
+    sd_demand = sd["demand"]
+    for demand_id, demand in coverage["demand"].items():
+        serviceable_demand = sd_demand[demand_id]["serviceableDemand"]
+        demand["serviceableDemand"] = serviceable_demand
+        total_serviceable_demand += serviceable_demand
     coverage["totalServiceableDemand"] = total_serviceable_demand
     return coverage
 
@@ -39,59 +44,92 @@ def validate_coverage(coverage_dict, modes, types):
         raise ValueError("Expected modes: '{}' got mode '{}'".format(modes, coverage_dict["type"]["mode"]))
 
 
-def merge_coverages(coverages):
+def _set_facility_initial_values(facility_vars, counts):
+    """
+    Sets the initial value of the facility variables from a warm start solution
+    :param facility_vars: (dictionary) The facility variables keyed by facility type and id
+    :param counts: (dictionary) The number of times each facility is used keyed by facility type and id
+    :return:
+    """
+    for facility_type in facility_vars:
+        type_counts = counts.get(facility_type, {})
+        for facility_id, var in facility_vars[facility_type].items():
+            var.setInitialValue(type_counts.get(facility_id, 0))
+
+
+def merge_coverages(coverages, in_place=False):
     """
 
     Combines multiple coverage dictionaries to form a 'master' coverage. Generally used if siting
     multiple types of facilities. Does NOT update serviceable area for partial coverage! Need to merge & dissolve all facility layers
+    For binary coverage a demand unit covered by any facility is serviceable.
+
+    The merge is a single pass over the demand. The master coverage has its own demand records, but shares the
+    coverage of each facility type (demand[id]['coverage'][type]) with the input coverages, so don't modify those
+    in place afterwards.
 
     :param coverages: (list of dicts) The coverage dictionaries to combine
+    :param in_place: (bool) Merge into the first coverage rather than creating a new one
     :return: (dict) A nested dictionary storing the coverage relationships
     """
-    facility_types = []
-    demand_keys = []
-    coverage_type = None
+    if not coverages:
+        raise ValueError("No coverages to merge")
+    coverage_type = coverages[0]["type"]["type"]
+    facility_types = set()
+    demand_keys = coverages[0]["demand"].keys()
     for coverage in coverages:
         # make sure all coverages are of the same type (binary, partial)
-        if coverage_type is None:
-            coverage_type = coverage["type"]["type"]
         validate_coverage(coverage, ["coverage"], [coverage_type])
         # make sure all coverages contain unique facility types
-        for facility_type in coverage["facilities"].items():
-            if facility_type not in facility_types:
-                facility_types.append(facility_type)
-            else:
+        for facility_type in coverage["facilities"]:
+            if facility_type in facility_types:
                 raise ValueError("Conflicting facility types")
-        demand_keys.append(set(coverage["demand"].keys()))
-    # Check to make sure all demand indicies are present in all coverages
-    for keys in demand_keys:
-        for keys2 in demand_keys:
-            if keys != keys2:
-                raise ValueError("Demand Keys Invalid")
-
-    master_coverage = copy.deepcopy(coverages[0])
-    for c in coverages[1:]:
-        coverage = copy.deepcopy(c)
-        for facility_type in coverage["facilities"].keys():
-            if facility_type not in master_coverage["facilities"]:
-                master_coverage["facilities"][facility_type] = {}
-            master_coverage["facilities"][facility_type] = coverage["facilities"][facility_type]
-
-        for demand in coverage["demand"].keys():
-            for facility_type in coverage["demand"][demand]["coverage"].keys():
-                if facility_type not in master_coverage["demand"][demand]["coverage"]:
-                    master_coverage["demand"][demand]["coverage"][facility_type] = {}
-                for fac in coverage["demand"][demand]["coverage"][facility_type].keys():
-                    master_coverage["demand"][demand]["coverage"][facility_type][fac] = \
-                        coverage["demand"][demand]["coverage"][facility_type][fac]
-                    # Update serviceable demand for binary coverage
-                    if coverage_type == "Binary" and coverage["demand"][demand]["coverage"][facility_type][fac] == 1:
-                        master_coverage["demand"][demand]["serviceableDemand"] = coverage["demand"][demand]["coverage"][
-                            "demand"]
+            facility_types.add(facility_type)
+        # Check to make sure all demand indicies are present in all coverages
+        if coverage["demand"].keys() != demand_keys:
+            raise ValueError("Demand Keys Invalid")
+
+    first = coverages[0]
+    if in_place:
+        master_coverage = first
+    else:
+        master_coverage = dict(first)
+        master_coverage["type"] = dict(first["type"])
+        master_coverage["facilities"] = dict(first["facilities"])
+        master_coverage["demand"] = {}
+    for coverage in coverages[1:]:
+        master_coverage["facilities"].update(coverage["facilities"])
+
+    others = coverages[1:]
+    total_serviceable_demand = 0.0
+    for demand_id, first_record in first["demand"].items():
+        if in_place:
+            record = first_record
+        else:
+            record = dict(first_record)
+            record["coverage"] = dict(first_record["coverage"])
+            master_coverage["demand"][demand_id] = record
+        for coverage in others:
+            for facility_type, covered in coverage["demand"][demand_id]["coverage"].items():
+                if facility_type in record["coverage"]:
+                    merged = dict(record["coverage"][facility_type])
+                    merged.update(covered)
+                    covered = merged
+                record["coverage"][facility_type] = covered
+        # Update serviceable demand for binary coverage
+        if coverage_type == "binary" and record["serviceableDemand"] != record["demand"]:
+            for covered in record["coverage"].values():
+                if any(value == 1 for value in covered.values()):
+                    record["serviceableDemand"] = record["demand"]
+                    break
+        total_serviceable_demand += record["serviceableDemand"]
+    if coverage_type == "binary":
+        master_coverage["totalServiceableDemand"] = total_serviceable_demand
     return master_coverage
 
 
-def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False):
+def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False,
+                      warm_start=None):
     """
 
     Creates an MCLP model using the provided coverage and parameters
@@ -105,6 +143,8 @@ def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", u
     :param model_file: (string) The model file to output
     :param delineator: (string) The character/symbol used to delineate facility and id
     :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The problem to solve
     """
     if use_serviceable_demand:
@@ -120,6 +160,8 @@ def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", u
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
     validate_coverage(coverage_dict, ["coverage"], ["binary"])
+    phases = profiling.phases("covering.create_mclp_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     for demand_id in coverage_dict["demand"]:
@@ -130,6 +172,7 @@ def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", u
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = \
                 pulp.LpVariable("{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("MCLP", pulp.LpMaximize)
     # add objective
@@ -155,12 +198,26 @@ def create_mclp_model(coverage_dict, num_fac, model_file=None, delineator="$", u
             for facility_id in coverage_dict["facilities"][facility_type]:
                 to_sum.append(facility_vars[facility_type][facility_id])
             prob += pulp.lpSum(to_sum) <= num_fac[facility_type], "Num{}".format(facility_type)
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "mclp", {"num_fac": num_fac}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand_vars[demand_id].setInitialValue(1 if sums[demand_id] >= 1 else 0)
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False):
+def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False,
+                         warm_start=None):
     """
 
         Creates an MCLPCC model using the provided coverage and parameters
@@ -174,6 +231,8 @@ def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$"
         :param model_file: (string) The model file to output
         :param delineator: (string) The character/symbol used to delineate facility and id
         :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+            type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
         :return: (Pulp problem) The problem to solve
         """
     if use_serviceable_demand:
@@ -189,6 +248,8 @@ def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$"
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
     validate_coverage(coverage_dict, ["coverage"], ["partial"])
+    phases = profiling.phases("covering.create_mclp_cc_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     for demand_id in coverage_dict["demand"]:
@@ -199,6 +260,7 @@ def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$"
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = \
                 pulp.LpVariable("{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("MCLP", pulp.LpMaximize)
     # add objective
@@ -226,12 +288,27 @@ def create_mclp_cc_model(coverage_dict, num_fac, model_file=None, delineator="$"
             for facility_id in coverage_dict["facilities"][facility_type]:
                 to_sum.append(facility_vars[facility_type][facility_id])
             prob += pulp.lpSum(to_sum) <= num_fac[facility_type], "Num{}".format(facility_type)
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "mclp_cc", {"num_fac": num_fac}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand_vars[demand_id].setInitialValue(
+                    min(sums[demand_id], coverage_dict["demand"][demand_id][demand_var]))
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$", use_serviceable_demand=False):
+def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$", use_serviceable_demand=False,
+                           warm_start=None):
     """
     Creates a threshold model using the provided coverage and parameters
     Writes a .lp file which can be solved with Gurobi
@@ -244,6 +321,8 @@ def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$",
     :param model_file: (string) The model file to output
     :param delineator: (string) The character/symbol used to delineate facility and ids
     :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The problem to solve
     """
     if use_serviceable_demand:
@@ -263,6 +342,8 @@ def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$",
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
 
+    phases = profiling.phases("covering.create_threshold_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     for demand_id in coverage_dict["demand"]:
@@ -273,6 +354,7 @@ def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$",
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = pulp.LpVariable(
                 "{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("ThresholdModel", pulp.LpMinimize)
     # Create objective, minimize number of facilities
@@ -297,13 +379,27 @@ def create_threshold_model(coverage_dict, psi, model_file=None, delineator="$",
         # divide the demand by total demand to get percentage
         scaled_demand = float(100 / sum_demand) * coverage_dict["demand"][demand_id][demand_var]
         to_sum.append(scaled_demand * demand_vars[demand_id])
-    prob += pulp.lpSum(to_sum) >= psi
+    prob += pulp.lpSum(to_sum) >= psi, "Threshold"
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "threshold", {"psi": psi}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand_vars[demand_id].setInitialValue(1 if sums[demand_id] >= 1 else 0)
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$", use_serviceable_demand=False):
+def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$", use_serviceable_demand=False,
+                              warm_start=None):
     """
 
     Creates a complementary coverage threshold model using the provided coverage and parameters
@@ -317,6 +413,8 @@ def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$
     :param model_file: (string) The model file to output
     :param delineator: (string) The character/symbol used to delineate facility and ids
     :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The generated problem to solve
     """
     if use_serviceable_demand:
@@ -335,6 +433,8 @@ def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$
         raise TypeError("model_file is not a string")
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
+    phases = profiling.phases("covering.create_cc_threshold_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     for demand_id in coverage_dict["demand"]:
@@ -345,6 +445,7 @@ def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = pulp.LpVariable(
                 "{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("ThresholdModel", pulp.LpMinimize)
     # Create objective, minimize number of facilities
@@ -372,12 +473,27 @@ def create_cc_threshold_model(coverage_dict, psi, model_file=None, delineator="$
         scaled_demand = float(100 / sum_demand)
         to_sum.append(scaled_demand * demand_vars[demand_id])
     prob += pulp.lpSum(to_sum) >= psi, "Threshold"
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "cc_threshold", {"psi": psi}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand_vars[demand_id].setInitialValue(
+                    min(sums[demand_id], coverage_dict["demand"][demand_id][demand_var]))
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False):
+def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$", use_serviceable_demand=False,
+                        warm_start=None):
     """
     Creates a backup coverage model using the provided coverage and parameters
     Writes a .lp file which can be solved with Gurobi
@@ -393,6 +509,8 @@ def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$",
     :param model_file: (string) The model file to output
     :param delineator: (string) The character/symbol used to delineate facility and ids
     :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The generated problem to solve
     """
     if use_serviceable_demand:
@@ -410,6 +528,8 @@ def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$",
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
 
+    phases = profiling.phases("covering.create_backup_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     for demand_id in coverage_dict["demand"]:
@@ -420,6 +540,7 @@ def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$",
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = pulp.LpVariable(
                 "{}{}{}".format(facility_type, delineator, facility_id), 0, None, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("BCLP", pulp.LpMaximize)
     # add objective
@@ -445,12 +566,25 @@ def create_backup_model(coverage_dict, num_fac, model_file=None, delineator="$",
             for facility_id in coverage_dict["facilities"][facility_type]:
                 to_sum.append(facility_vars[facility_type][facility_id])
             prob += pulp.lpSum(to_sum) <= num_fac[facility_type], "Num{}".format(facility_type)
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "backup", {"num_fac": num_fac}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand_vars[demand_id].setInitialValue(1 if sums[demand_id] >= 2 else 0)
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
+def create_lscp_model(coverage_dict, model_file=None, delineator="$", warm_start=None, demand_ids=None):
     """
     Creates a LSCP (Location set covering problem) using the provided coverage and
     parameters. Writes a .lp file which can be solved with Gurobi
@@ -461,6 +595,10 @@ def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
     :param coverage_dict: (dictionary) The coverage to use to generate the model
     :param model_file: (string) The model file to output
     :param delineator: (string) The character(s) to use to delineate the layer from the ids
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
+    :param demand_ids: (list) The ids of the demand to add covering constraints for, defaults to all demand.
+        Used to start row generation (see row_generation.solve_lscp) with a subset of the constraints
     :return: (Pulp problem) The generated problem to solve
     """
     validate_coverage(coverage_dict, ["coverage"], ["binary"])
@@ -470,9 +608,16 @@ def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
         raise TypeError("model_file is not a string")
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
-        # create the variables
+    if demand_ids is None:
+        demand_ids = list(coverage_dict["demand"].keys())
+    for demand_id in demand_ids:
+        if demand_id not in coverage_dict["demand"]:
+            raise ValueError("'{}' is not a demand id".format(demand_id))
+    phases = profiling.phases("covering.create_lscp_model")
+    phases.next("variables")
+    # create the variables
     demand_vars = {}
-    for demand_id in coverage_dict["demand"]:
+    for demand_id in demand_ids:
         demand_vars[demand_id] = pulp.LpVariable("Y{}{}".format(delineator, demand_id), 0, 1, pulp.LpInteger)
     facility_vars = {}
     for facility_type in coverage_dict["facilities"]:
@@ -480,6 +625,7 @@ def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = pulp.LpVariable(
                 "{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("LSCP", pulp.LpMinimize)
     # Create objective, minimize number of facilities
@@ -489,7 +635,7 @@ def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
             to_sum.append(facility_vars[facility_type][facility_id])
     prob += pulp.lpSum(to_sum)
     # add coverage constraints
-    for demand_id in coverage_dict["demand"]:
+    for demand_id in demand_ids:
         to_sum = []
         for facility_type in coverage_dict["demand"][demand_id]["coverage"]:
             for facility_id in coverage_dict["demand"][demand_id]["coverage"][facility_type]:
@@ -500,12 +646,21 @@ def create_lscp_model(coverage_dict, model_file=None, delineator="$", ):
         if not to_sum:
             to_sum = [pulp.LpVariable("__dummy{}{}".format(delineator, demand_id), 0, 0, pulp.LpInteger)]
         prob += pulp.lpSum(to_sum) >= 1, "D{}".format(demand_id)
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "lscp", {}, warm_start)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
-def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delineator="$"):
+def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delineator="$", warm_start=None):
     """
     Creates a TRAUMAH (Trauma center and air depot location model) using the provided coverage and
     parameters. Writes a .lp file which can be solved with Gurobi
@@ -518,6 +673,8 @@ def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delinea
     :param num_tc: (integer) The number of trauma centers to use
     :param model_file: (string) The path of the model file to output
     :param delineator: (string) The character(s) to use to delineate the layer from the ids
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The generated problem to solve
     """
     demand_var = "demand"
@@ -532,11 +689,12 @@ def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delinea
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
     validate_coverage(coverage_dict, ["coverage"], ["traumah"])
+    phases = profiling.phases("covering.create_traumah_model")
+    phases.next("variables")
     # create the variables
     demand_vars = {}
     ground_vars = {}
     air_vars = {}
-    adtc_vars = {}
     for demand_id in coverage_dict["demand"]:
         demand_vars[demand_id] = pulp.LpVariable("Y{}{}".format(delineator, demand_id), 0, 1, pulp.LpInteger)
         ground_vars[demand_id] = pulp.LpVariable("V{}{}".format(delineator, demand_id), 0, 1, pulp.LpInteger)
@@ -548,11 +706,19 @@ def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delinea
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = \
                 pulp.LpVariable("{}{}{}".format(facility_type, delineator, facility_id), 0, 1, pulp.LpInteger)
-    # create the AD/TC veriables (zjk)
-    for ad_id in coverage_dict["facilities"]["AirDepot"]:
-        for tc_id in coverage_dict["facilities"]["TraumaCenter"]:
-            adtc_vars["Z{}{}{}{}".format(delineator,ad_id,delineator,tc_id)] = \
-                pulp.LpVariable("Z{}{}{}{}".format(delineator, ad_id,delineator, tc_id), 0, 1, pulp.LpInteger)
+    # create the AD/TC variables (zjk), only for the pairs that cover some demand
+    adtc_vars = {}
+    demand_pairs = {}
+    for demand_id in coverage_dict["demand"]:
+        pairs = []
+        for adtc_pair in coverage_dict["demand"][demand_id]["coverage"]["ADTCPair"]:
+            pair = (adtc_pair["AirDepot"], adtc_pair["TraumaCenter"])
+            if pair not in adtc_vars:
+                adtc_vars[pair] = pulp.LpVariable("Z{}{}{}{}".format(delineator, pair[0], delineator, pair[1]), 0, 1,
+                                                  pulp.LpInteger)
+            pairs.append(adtc_vars[pair])
+        demand_pairs[demand_id] = pairs
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("TRAUMAH", pulp.LpMaximize)
     # add objective
@@ -582,28 +748,44 @@ def create_traumah_model(coverage_dict, num_ad, num_tc, model_file=None, delinea
 
     # add air constraints
     for demand_id in coverage_dict["demand"]:
-        to_sum = []
-        for adtc_pair in coverage_dict["demand"][demand_id]["coverage"]["ADTCPair"]:
-            ad_id = adtc_pair["AirDepot"]
-            tc_id = adtc_pair["TraumaCenter"]
-            to_sum.append(adtc_vars["Z{}{}{}{}".format(delineator,ad_id,delineator,tc_id)])
-        prob += air_vars[demand_id] - pulp.lpSum(to_sum) <= 0, "AIR_{}".format(demand_id)
-
+        prob += air_vars[demand_id] - pulp.lpSum(demand_pairs[demand_id]) <= 0, "AIR_{}".format(demand_id)
 
     # add ground and air logical constraints
-    for adtc_id in adtc_vars.keys():
+    for (ad_id, tc_id), adtc_var in adtc_vars.items():
         # ground constraints
-        prob += adtc_vars[adtc_id] - facility_vars["TraumaCenter"][adtc_id.split("$")[2]] <= 0, "GND_{}".format(adtc_id)
+        prob += adtc_var - facility_vars["TraumaCenter"][tc_id] <= 0, "GND_{}".format(adtc_var.name)
         # air constraints
-        prob += adtc_vars[adtc_id] - facility_vars["AirDepot"][adtc_id.split("$")[1]] <= 0, "AIR_{}".format(adtc_id)
-
+        prob += adtc_var - facility_vars["AirDepot"][ad_id] <= 0, "AIR_{}".format(adtc_var.name)
+
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "traumah", {"num_ad": num_ad, "num_tc": num_tc},
+                                              warm_start)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            ads = counts.get("AirDepot", {})
+            tcs = counts.get("TraumaCenter", {})
+            for (ad_id, tc_id), adtc_var in adtc_vars.items():
+                adtc_var.setInitialValue(1 if ad_id in ads and tc_id in tcs else 0)
+            for demand_id in coverage_dict["demand"]:
+                demand_coverage = coverage_dict["demand"][demand_id]["coverage"]
+                ground = any(tc["TraumaCenter"] in tcs for tc in demand_coverage["TraumaCenter"])
+                air = any(pair["AirDepot"] in ads and pair["TraumaCenter"] in tcs
+                          for pair in demand_coverage["ADTCPair"])
+                ground_vars[demand_id].setInitialValue(1 if ground else 0)
+                air_vars[demand_id].setInitialValue(1 if air else 0)
+                demand_vars[demand_id].setInitialValue(1 if ground or air else 0)
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
 
 
 def create_bclpcc_model(coverage_dict, num_fac, backup_weight, model_file=None, delineator="$",
-                            use_serviceable_demand=False):
+                            use_serviceable_demand=False, warm_start=None):
     """
     Creates a bclpcc coverage model using the provided coverage dictionary
     and parameters. Writes a .lp file that can be solved with Gurobi
@@ -614,6 +796,8 @@ def create_bclpcc_model(coverage_dict, num_fac, backup_weight, model_file=None,
     :param model_file: (string) The model file to output
     :param delineator: (string) The character/symbol used to delineate facility and ids
     :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility
+        type. Sets the initial values of the variables so solvers supporting MIP starts (CBC) can use them
     :return: (Pulp problem) The generated problem to solve
     """
     if use_serviceable_demand:
@@ -634,6 +818,8 @@ def create_bclpcc_model(coverage_dict, num_fac, backup_weight, model_file=None,
         raise TypeError("model_file is not a string")
     if not isinstance(delineator, str):
         raise TypeError("delineator is not a string")
+    phases = profiling.phases("covering.create_bclpcc_model")
+    phases.next("variables")
     primary_weight = 1 - backup_weight
     primary_vars = {}
     backup_vars = {}
@@ -648,6 +834,7 @@ def create_bclpcc_model(coverage_dict, num_fac, backup_weight, model_file=None,
         for facility_id in coverage_dict["facilities"][facility_type]:
             facility_vars[facility_type][facility_id] = pulp.LpVariable(
                 "{}{}{}".format(facility_type, delineator, facility_id), 0, None, pulp.LpInteger)
+    phases.next("constraints")
     # create the problem
     prob = pulp.LpProblem("BCLPCC", pulp.LpMaximize)
     to_sum = []
@@ -684,6 +871,24 @@ def create_bclpcc_model(coverage_dict, num_fac, backup_weight, model_file=None,
             for facility_id in coverage_dict["facilities"][facility_type]:
                 to_sum.append(facility_vars[facility_type][facility_id])
             prob += pulp.lpSum(to_sum) <= num_fac[facility_type], "Num{}".format(facility_type)
+    if warm_start is not None:
+        phases.next("warmStart")
+        counts = heuristics.warm_start_counts(coverage_dict, "bclpcc",
+                                              {"num_fac": num_fac, "backup_weight": backup_weight}, warm_start,
+                                              use_serviceable_demand)
+        if counts is not None:
+            _set_facility_initial_values(facility_vars, counts)
+            sums = heuristics.coverage_sums(coverage_dict, counts)
+            for demand_id in coverage_dict["demand"]:
+                demand = coverage_dict["demand"][demand_id][demand_var]
+                overall = min(sums[demand_id], 2 * demand)
+                overall_vars[demand_id].setInitialValue(overall)
+                backup_vars[demand_id].setInitialValue(overall - demand)
+                primary_vars[demand_id].setInitialValue(min(overall, demand))
+    phases.count("variables", prob.numVariables())
+    phases.count("constraints", prob.numConstraints())
     if model_file:
+        phases.next("write")
         prob.writeLP(model_file)
+    phases.end()
     return prob
\ No newline at end of file
@@ -0,0 +1,308 @@
+# -*- coding: UTF-8 -*-
+import logging
+import multiprocessing
+
+from pyspatialopt.models import heuristics, pareto, sweep
+
+
+def connected_components(coverage_dict):
+    """
+    Splits a coverage into the connected components of the graph linking each demand unit to the
+    facilities that cover it. No facility covers demand in two components so each component can be
+    solved on its own. Demand that no facility covers and facilities that cover no demand are left out
+
+    :param coverage_dict: (dictionary) The binary or partial coverage
+    :return: (list) The coverage of each component, largest (by number of demand units) first. The demand
+        entries are shared with coverage_dict, not copied
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    index = heuristics.index_coverage(coverage_dict)
+    num_demand = len(index["demandIds"])
+    # Union-find over the demand (0..num_demand - 1) and facility (num_demand + j) nodes
+    parent = list(range(num_demand + len(index["facilities"])))
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for i, covering_facilities in enumerate(index["demandFacilities"]):
+        for j, a in covering_facilities:
+            root_demand = find(i)
+            root_facility = find(num_demand + j)
+            if root_demand != root_facility:
+                parent[root_facility] = root_demand
+    components = {}
+    for i, covering_facilities in enumerate(index["demandFacilities"]):
+        if covering_facilities:
+            components.setdefault(find(i), ([], []))[0].append(i)
+    for j, covered in enumerate(index["facilityDemand"]):
+        if covered:
+            components[find(num_demand + j)][1].append(j)
+    result = []
+    for demand_positions, facility_positions in sorted(components.values(), key=lambda c: -len(c[0])):
+        component = {
+            "type": coverage_dict["type"],
+            "demand": {},
+            "facilities": {facility_type: [] for facility_type in coverage_dict["facilities"]},
+            "totalDemand": 0.0,
+            "totalServiceableDemand": 0.0
+        }
+        if "version" in coverage_dict:
+            component["version"] = coverage_dict["version"]
+        for i in demand_positions:
+            demand = coverage_dict["demand"][index["demandIds"][i]]
+            component["demand"][index["demandIds"][i]] = demand
+            component["totalDemand"] += demand["demand"]
+            component["totalServiceableDemand"] += demand.get("serviceableDemand", 0)
+        for j in facility_positions:
+            facility_type, facility_id = index["facilities"][j]
+            component["facilities"][facility_type].append(facility_id)
+        result.append(component)
+    return result
+
+
+def _map(function, tasks, processes):
+    """
+    Maps the function over the tasks with a pool of processes (in process if processes is 1)
+    """
+    if processes == 1 or len(tasks) <= 1:
+        return [function(task) for task in tasks]
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(function, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _solve_lscp_component(task):
+    """
+    Solves the LSCP for one component
+    """
+    component, solver, delineator = task
+    return sweep.solve_parameters(component, "lscp", {}, solver, delineator)
+
+
+def solve_lscp(coverage_dict, solver=None, processes=None, delineator="$"):
+    """
+    Solves the LSCP for each connected component of the coverage in parallel
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param processes: (int) The number of worker processes, defaults to the number of cpus. 1 solves in process
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :return: (dictionary) The status, ids keyed by facility type, objective and number of components
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if coverage_dict["type"]["type"] != "binary":
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    components = connected_components(coverage_dict)
+    covered = sum(len(component["demand"]) for component in components)
+    if covered < len(coverage_dict["demand"]):
+        logging.getLogger().info("Some demand is not covered by any facility")
+        return {"status": "Infeasible", "ids": {}, "objective": None, "components": len(components)}
+    logging.getLogger().info("Solving the LSCP for {} components...".format(len(components)))
+    results = _map(_solve_lscp_component, [(component, solver, delineator) for component in components], processes)
+    ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    status = "Optimal"
+    for result in results:
+        if result["status"] != "Optimal":
+            status = result["status"]
+            break
+        for facility_type, type_ids in result["ids"].items():
+            ids[facility_type].extend(type_ids)
+    if status != "Optimal":
+        return {"status": status, "ids": {}, "objective": None, "components": len(components)}
+    for facility_type in ids:
+        ids[facility_type].sort()
+    return {
+        "status": status,
+        "ids": ids,
+        "objective": sum(len(type_ids) for type_ids in ids.values()),
+        "components": len(components)
+    }
+
+
+def _component_curve(task):
+    """
+    Computes the coverage curve of one component, expanded to every number of facilities up to the last
+    point where the coverage increases
+    """
+    component, max_facilities, solver, delineator, use_serviceable_demand, unit_weights = task
+    if component["type"]["type"] == "binary":
+        model_type = "mclp"
+    elif unit_weights:
+        model_type = "cc_threshold"
+    else:
+        model_type = "mclp_cc"
+    curve = pareto.CoverageCurve(component, model_type, solver, delineator, use_serviceable_demand)
+    rows = curve.table(max_facilities)
+    if rows is None:
+        return {"status": curve.status, "objectives": [0.0], "ids": [{}]}
+    objectives = []
+    ids = []
+    for row, next_row in zip(rows, rows[1:] + [None]):
+        last = row["p"] + 1 if next_row is None else next_row["p"]
+        for k in range(row["p"], last):
+            objectives.append(row["coverage"])
+            ids.append(row["ids"])
+    return {"status": "Optimal", "objectives": objectives, "ids": ids}
+
+
+def coverage_curves(coverage_dict, max_facilities=None, solver=None, processes=None, delineator="$",
+                    use_serviceable_demand=False, unit_weights=False):
+    """
+    Computes the optimal coverage of each connected component for 0, 1, 2, ... facilities in parallel.
+    A curve stops once more facilities can't increase the coverage of its component
+
+    :param coverage_dict: (dictionary) The binary (MCLP) or partial (MCLPCC) coverage
+    :param max_facilities: (int) The most facilities to use per component, None to solve until the coverage
+        can't improve
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param processes: (int) The number of worker processes, defaults to the number of cpus. 1 solves in process
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param unit_weights: (bool) For partial coverage, maximize the covered demand (as the complementary
+        coverage threshold model does) rather than the MCLPCC objective
+    :return: (list) The status, objectives and ids for each number of facilities of each component
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if coverage_dict["type"]["type"] not in ["binary", "partial"]:
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary", "partial"],
+                                                                     coverage_dict["type"]["type"]))
+    components = connected_components(coverage_dict)
+    logging.getLogger().info("Computing coverage curves for {} components...".format(len(components)))
+    return _map(_component_curve, [(component, max_facilities, solver, delineator, use_serviceable_demand,
+                                    unit_weights) for component in components], processes)
+
+
+def allocate(curves, total):
+    """
+    Splits a number of facilities between components to maximize the total coverage, a knapsack over the
+    coverage curves solved by dynamic programming
+
+    :param curves: (list) The coverage curves (coverage_curves)
+    :param total: (int) The number of facilities to allocate
+    :return: (tuple) The best total coverage for 0, 1, ..., total facilities and, for each of these, the
+        number of facilities given to each component
+    """
+    best = [0.0] * (total + 1)
+    # choices[c][t] is the number of facilities given to component c when components 0..c share t facilities
+    choices = []
+    for curve in curves:
+        objectives = curve["objectives"]
+        new_best = list(best)
+        choice = [0] * (total + 1)
+        for t in range(total + 1):
+            for k in range(1, min(t, len(objectives) - 1) + 1):
+                value = best[t - k] + objectives[k]
+                if value > new_best[t]:
+                    new_best[t] = value
+                    choice[t] = k
+        best = new_best
+        choices.append(choice)
+    allocations = []
+    for t in range(total + 1):
+        allocation = [0] * len(curves)
+        remaining = t
+        for c in range(len(curves) - 1, -1, -1):
+            allocation[c] = choices[c][remaining]
+            remaining -= allocation[c]
+        allocations.append(allocation)
+    return best, allocations
+
+
+def _combine(coverage_dict, curves, allocation):
+    """
+    Combines the ids of each component's solution for its allocated number of facilities
+    """
+    ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    for curve, k in zip(curves, allocation):
+        for facility_type, type_ids in curve["ids"][k].items():
+            ids[facility_type].extend(type_ids)
+    for facility_type in ids:
+        ids[facility_type].sort()
+    return ids
+
+
+def solve_mclp(coverage_dict, num_fac, solver=None, processes=None, delineator="$", use_serviceable_demand=False):
+    """
+    Solves the MCLP (binary) or MCLPCC (partial) by solving each connected component for every number of
+    facilities it can use and allocating the facilities between the components
+
+    :param coverage_dict: (dictionary) The binary or partial coverage
+    :param num_fac: (dictionary) The dictionary of number of facilities to use, only 'total' is supported
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param processes: (int) The number of worker processes, defaults to the number of cpus. 1 solves in process
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The status, ids keyed by facility type, objective, number of facilities per component
+        ('allocation') and the number of components
+    """
+    if not isinstance(num_fac, dict):
+        raise TypeError("num_fac is not a dictionary")
+    if "total" not in num_fac or len(num_fac) > 1:
+        raise ValueError("Only a total number of facilities is supported")
+    curves = coverage_curves(coverage_dict, num_fac["total"], solver, processes, delineator, use_serviceable_demand)
+    for curve in curves:
+        if curve["status"] != "Optimal":
+            return {"status": curve["status"], "ids": {}, "objective": None, "allocation": [],
+                    "components": len(curves)}
+    best, allocation = allocate(curves, num_fac["total"])
+    return {
+        "status": "Optimal",
+        "ids": _combine(coverage_dict, curves, allocation[-1]),
+        "objective": best[-1],
+        "allocation": allocation[-1],
+        "components": len(curves)
+    }
+
+
+def solve_threshold(coverage_dict, psi, solver=None, processes=None, delineator="$", use_serviceable_demand=False):
+    """
+    Solves the threshold (binary) or complementary coverage threshold (partial) model, the fewest facilities
+    covering at least psi percent of the demand, from the coverage curves of the connected components
+
+    :param coverage_dict: (dictionary) The binary or partial coverage
+    :param psi: (float or int) The percentage of demand to cover
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param processes: (int) The number of worker processes, defaults to the number of cpus. 1 solves in process
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The status, ids keyed by facility type, objective (number of facilities), percentage
+        of demand covered, number of facilities per component ('allocation') and the number of components
+    """
+    if not (isinstance(psi, float) or isinstance(psi, int)):
+        raise TypeError("psi is not a float or int")
+    if not (0 <= psi <= 100):
+        raise ValueError("psi must be between 0 and 100")
+    demand_var = "serviceableDemand" if use_serviceable_demand else "demand"
+    sum_demand = float(sum(demand[demand_var] for demand in coverage_dict["demand"].values()))
+    curves = coverage_curves(coverage_dict, None, solver, processes, delineator, use_serviceable_demand,
+                             unit_weights=True)
+    for curve in curves:
+        if curve["status"] != "Optimal":
+            return {"status": curve["status"], "ids": {}, "objective": None, "coverage": None, "allocation": [],
+                    "components": len(curves)}
+    best, allocation = allocate(curves, sum(len(curve["objectives"]) - 1 for curve in curves))
+    for k, covered in enumerate(best):
+        percentage = 100 * covered / sum_demand if sum_demand else 100.0
+        # Allow for floating point error in the scaled threshold
+        if percentage >= psi - 1e-9:
+            return {
+                "status": "Optimal",
+                "ids": _combine(coverage_dict, curves, allocation[k]),
+                "objective": k,
+                "coverage": percentage,
+                "allocation": allocation[k],
+                "components": len(curves)
+            }
+    return {"status": "Infeasible", "ids": {}, "objective": None, "coverage": None, "allocation": [],
+            "components": len(curves)}
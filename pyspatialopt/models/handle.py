@@ -0,0 +1,155 @@
+# -*- coding: UTF-8 -*-
+import pulp
+
+from pyspatialopt import profiling
+from pyspatialopt.models import utilities
+
+
+class ModelHandle(object):
+    """
+    Wraps a problem generated by the covering module so that its parameters can be changed and the
+    problem re-solved without rebuilding the variables and constraints. Only the objective or the
+    right hand side of the affected constraints is updated in place.
+
+    Supported problems:
+        * MCLP, MCLPCC, BCLP and BCLPCC: set_num_facilities
+        * MCLP and BCLP: set_demand_weights
+        * Threshold and complementary coverage threshold: set_threshold
+        * Threshold: set_demand_weights
+    """
+
+    def __init__(self, problem, coverage_dict, delineator="$", use_serviceable_demand=False):
+        """
+        :param problem: (Pulp problem) The problem generated from the coverage
+        :param coverage_dict: (dictionary) The coverage used to generate the problem
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Was the serviceable demand used rather than demand
+        """
+        if not isinstance(coverage_dict, dict):
+            raise TypeError("coverage_dict is not a dictionary")
+        if not isinstance(delineator, str):
+            raise TypeError("delineator is not a string")
+        self.problem = problem
+        self.coverage_dict = coverage_dict
+        self.delineator = delineator
+        if use_serviceable_demand:
+            self.demand_var = "serviceableDemand"
+        else:
+            self.demand_var = "demand"
+        coverage_type = coverage_dict["type"]["type"]
+        if problem.name == "BCLP":
+            self.demand_prefix = "U"
+        else:
+            self.demand_prefix = "Y"
+        self.weighted_objective = problem.name in ["MCLP", "BCLP"] and coverage_type == "binary"
+        self.weighted_threshold = problem.name == "ThresholdModel" and coverage_type == "binary"
+        # Index the variables once so that updates don't need to scan the problem
+        variables = problem.variablesDict()
+        self.facility_vars = {}
+        for facility_type in coverage_dict["facilities"]:
+            self.facility_vars[facility_type] = {}
+            for facility_id in coverage_dict["facilities"][facility_type]:
+                name = "{}{}{}".format(facility_type, delineator, facility_id)
+                if name in variables:
+                    self.facility_vars[facility_type][facility_id] = variables[name]
+        self.demand_vars = {}
+        for demand_id in coverage_dict["demand"]:
+            name = "{}{}{}".format(self.demand_prefix, delineator, demand_id)
+            if name in variables:
+                self.demand_vars[demand_id] = variables[name]
+
+    def set_num_facilities(self, total=None, per_type=None):
+        """
+        Changes the number of facilities that may be sited
+
+        :param total: (int) The total number of facilities to use, None leaves it unchanged
+        :param per_type: (dictionary) The number of facilities to use per facility type. A value of None
+            removes the limit for that type
+        :return: (ModelHandle) This handle
+        """
+        total_constraint = utilities.get_constraint(self.problem, "NumTotalFacilities")
+        if total_constraint is None:
+            raise ValueError("{} problem does not limit the number of facilities".format(self.problem.name))
+        if per_type is not None and not isinstance(per_type, dict):
+            raise TypeError("per_type is not a dictionary")
+        if total is not None:
+            total_constraint.changeRHS(total)
+        if per_type:
+            for facility_type, num in per_type.items():
+                if facility_type not in self.facility_vars:
+                    raise ValueError("'{}' is not a facility type in the coverage".format(facility_type))
+                # A limit equal to the number of facilities is never binding
+                if num is None:
+                    num = len(self.facility_vars[facility_type])
+                constraint = utilities.get_constraint(self.problem, "Num{}".format(facility_type))
+                if constraint is not None:
+                    constraint.changeRHS(num)
+                else:
+                    self.problem += pulp.lpSum(self.facility_vars[facility_type].values()) <= num, \
+                        "Num{}".format(facility_type)
+        return self
+
+    def set_demand_weights(self, weights=None):
+        """
+        Changes the weight of each demand unit. Demand units not found in weights use the value
+        from the coverage
+
+        :param weights: (dictionary) The new weight keyed by demand id
+        :return: (ModelHandle) This handle
+        """
+        if weights is None:
+            weights = {}
+        if not isinstance(weights, dict):
+            raise TypeError("weights is not a dictionary")
+        if not (self.weighted_objective or self.weighted_threshold):
+            raise ValueError("Demand weights can not be changed for the {} problem".format(self.problem.name))
+        demand = self.coverage_dict["demand"]
+        new_weights = {}
+        for demand_id in self.demand_vars:
+            new_weights[demand_id] = weights.get(demand_id, demand[demand_id][self.demand_var])
+        if self.weighted_objective:
+            self.problem.setObjective(
+                pulp.lpSum([new_weights[demand_id] * var for demand_id, var in self.demand_vars.items()]))
+        else:
+            sum_demand = float(sum(new_weights.values()))
+            constraint = utilities.get_constraint(self.problem, "Threshold")
+            expr = getattr(constraint, "expr", constraint)
+            for demand_id, var in self.demand_vars.items():
+                expr[var] = 100 / sum_demand * new_weights[demand_id]
+            constraint.modified = True
+        return self
+
+    def set_threshold(self, psi):
+        """
+        Changes the required threshold to cover
+
+        :param psi: (float or int) The required threshold to cover (0-100%)
+        :return: (ModelHandle) This handle
+        """
+        if not (isinstance(psi, float) or isinstance(psi, int)):
+            raise TypeError("psi is not float or int")
+        if psi > 100.0 or psi < 0.0:
+            raise ValueError("psi weight must be between 100 and 0")
+        constraint = utilities.get_constraint(self.problem, "Threshold")
+        if constraint is None:
+            raise ValueError("{} problem does not have a threshold".format(self.problem.name))
+        constraint.changeRHS(psi)
+        return self
+
+    def solve(self, solver=None, warm_start=False):
+        """
+        Solves the problem with its current parameters
+
+        :param solver: (Pulp solver) The solver to use
+        :param warm_start: (bool) Pass the previous solution (or the initial values) to the solver as a MIP start
+        :return: (int) The pulp status of the problem
+        """
+        if warm_start:
+            for var in self.problem.variables():
+                if var.varValue is not None:
+                    var.setInitialValue(var.varValue)
+            if solver is None:
+                solver = pulp.LpSolverDefault
+            solver = utilities.enable_warm_start(solver)
+        with profiling.phase("handle.ModelHandle.solve"):
+            return self.problem.solve(solver)
@@ -0,0 +1,549 @@
+# -*- coding: UTF-8 -*-
+import heapq
+import math
+
+
+def index_coverage(coverage_dict, use_serviceable_demand=False):
+    """
+    Indexes a binary or partial coverage so that heuristics can work with integer positions
+    rather than nested dictionary lookups
+
+    :param coverage_dict: (dictionary) The coverage to index
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The demand ids, demand weights, facilities (type, id), the position of each facility,
+        the demand (position, value) each facility covers and the facilities (position, value) covering each demand
+    """
+    if use_serviceable_demand:
+        demand_var = "serviceableDemand"
+    else:
+        demand_var = "demand"
+    if coverage_dict["type"]["type"] not in ["binary", "partial"]:
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary", "partial"],
+                                                                     coverage_dict["type"]["type"]))
+    facilities = []
+    facility_index = {}
+    for facility_type in coverage_dict["facilities"]:
+        for facility_id in coverage_dict["facilities"][facility_type]:
+            facility_index[(facility_type, facility_id)] = len(facilities)
+            facilities.append((facility_type, facility_id))
+    demand_ids = []
+    weights = []
+    facility_demand = [[] for _ in facilities]
+    demand_facilities = []
+    for demand_id, demand in coverage_dict["demand"].items():
+        i = len(demand_ids)
+        demand_ids.append(demand_id)
+        weights.append(demand[demand_var])
+        covering = []
+        for facility_type in demand["coverage"]:
+            for facility_id, value in demand["coverage"][facility_type].items():
+                j = facility_index[(facility_type, facility_id)]
+                covering.append((j, value))
+                facility_demand[j].append((i, value))
+        demand_facilities.append(covering)
+    return {
+        "demandIds": demand_ids,
+        "weights": weights,
+        "facilities": facilities,
+        "facilityIndex": facility_index,
+        "facilityDemand": facility_demand,
+        "demandFacilities": demand_facilities
+    }
+
+
+def counts_from_ids(ids):
+    """
+    Converts chosen ids (as returned by utilities.get_ids for each facility type) to facility counts
+
+    :param ids: (dictionary) A list of ids keyed by facility type. Repeated ids are counted multiple times
+    :return: (dictionary) The number of times each facility is used keyed by facility type and id
+    """
+    counts = {}
+    for facility_type, type_ids in ids.items():
+        counts[facility_type] = {}
+        for facility_id in type_ids:
+            counts[facility_type][facility_id] = counts[facility_type].get(facility_id, 0) + 1
+    return counts
+
+
+def coverage_sums(coverage_dict, counts):
+    """
+    Sums the coverage each demand unit receives from a set of facilities
+
+    :param coverage_dict: (dictionary) The binary or partial coverage
+    :param counts: (dictionary) The number of times each facility is used keyed by facility type and id
+    :return: (dictionary) The coverage received keyed by demand id
+    """
+    sums = {}
+    for demand_id, demand in coverage_dict["demand"].items():
+        total = 0
+        for facility_type in demand["coverage"]:
+            type_counts = counts.get(facility_type, {})
+            for facility_id, value in demand["coverage"][facility_type].items():
+                total += value * type_counts.get(facility_id, 0)
+        sums[demand_id] = total
+    return sums
+
+
+def can_add_facility(facility_type, num_fac, type_totals, total):
+    """
+    Checks if another facility of the given type can be sited
+
+    :param facility_type: (string) The facility type, None to only check the total
+    :param num_fac: (dictionary) The facility limits ('total' and per type), None for no limit
+    :param type_totals: (dictionary) The number of facilities sited of each type
+    :param total: (int) The number of facilities sited
+    :return: (bool) Whether the facility can be sited without exceeding the limits
+    """
+    if num_fac is None:
+        return True
+    if "total" in num_fac and total >= num_fac["total"]:
+        return False
+    if facility_type in num_fac and type_totals.get(facility_type, 0) >= num_fac[facility_type]:
+        return False
+    return True
+
+
+def greedy_add(index, value, num_fac=None, repeat=False, target=None, state=None):
+    """
+    Adds the facility with the largest gain in objective until the budget is used, no facility improves the
+    objective or the target objective is reached
+
+    :param index: (dictionary) The indexed coverage
+    :param value: (function) The objective contribution of demand i when it receives coverage s, value(i, s)
+    :param num_fac: (dictionary) The facility limits ('total' and per type), None for no limit
+    :param repeat: (bool) Can a facility be used more than once
+    :param target: (float) Stop once the objective reaches the target
+    :param state: (tuple) The coverage sums, chosen facility counts, per type totals and total to start from
+    :return: (tuple) The coverage sums, chosen facility counts, per type totals, total and objective
+    """
+    facilities = index["facilities"]
+    facility_demand = index["facilityDemand"]
+    if state is None:
+        sums = [0] * len(index["demandIds"])
+        chosen = [0] * len(facilities)
+        type_totals = {}
+        total = 0
+    else:
+        sums, chosen, type_totals, total = state
+    objective = sum(value(i, s) for i, s in enumerate(sums))
+    while target is None or objective < target:
+        best = None
+        best_gain = 0
+        for j, (facility_type, facility_id) in enumerate(facilities):
+            if (chosen[j] and not repeat) or not can_add_facility(facility_type, num_fac, type_totals, total):
+                continue
+            gain = 0
+            for i, a in facility_demand[j]:
+                gain += value(i, sums[i] + a) - value(i, sums[i])
+            if gain > best_gain:
+                best = j
+                best_gain = gain
+        if best is None:
+            break
+        for i, a in facility_demand[best]:
+            sums[i] += a
+        chosen[best] += 1
+        type_totals[facilities[best][0]] = type_totals.get(facilities[best][0], 0) + 1
+        total += 1
+        objective += best_gain
+    return sums, chosen, type_totals, total, objective
+
+
+def _greedy_cover(index, num_fac=None):
+    """
+    Greedily selects facilities until every demand unit is covered at least once
+
+    :param index: (dictionary) The indexed coverage
+    :param num_fac: (dictionary) The facility limits ('total' and per type), None for no limit
+    :return: (tuple) The coverage sums, chosen facility counts, per type totals and total. None if infeasible
+    """
+    uncovered = len(index["demandIds"])
+    for covering in index["demandFacilities"]:
+        if not covering:
+            return None
+    sums, chosen, type_totals, total, covered = greedy_add(
+        index, lambda i, s: 1 if s > 0 else 0, num_fac, target=uncovered)
+    if covered < uncovered:
+        return None
+    return sums, chosen, type_totals, total
+
+
+def _remove_redundant(index, sums, chosen):
+    """
+    Removes facilities whose demand is all covered by other chosen facilities (used for set covering)
+    """
+    for j in sorted(range(len(chosen)), key=lambda k: len(index["facilityDemand"][k])):
+        if chosen[j] and all(sums[i] > 1 for i, a in index["facilityDemand"][j]):
+            chosen[j] = 0
+            for i, a in index["facilityDemand"][j]:
+                sums[i] -= 1
+
+
+def _to_counts(index, chosen):
+    """
+    Converts a list of facility counts by position to counts keyed by facility type and id
+    """
+    counts = {}
+    for j, (facility_type, facility_id) in enumerate(index["facilities"]):
+        counts.setdefault(facility_type, {})
+        if chosen[j]:
+            counts[facility_type][facility_id] = chosen[j]
+    return counts
+
+
+def _greedy_traumah(coverage_dict, num_ad, num_tc):
+    """
+    Greedily selects exactly num_ad air depots and num_tc trauma centers maximizing covered demand
+    """
+    demand_ids = list(coverage_dict["demand"].keys())
+    weights = [coverage_dict["demand"][demand_id]["demand"] for demand_id in demand_ids]
+    tc_demand = {}
+    ad_pairs = {}
+    tc_pairs = {}
+    for i, demand_id in enumerate(demand_ids):
+        demand_coverage = coverage_dict["demand"][demand_id]["coverage"]
+        for tc in demand_coverage["TraumaCenter"]:
+            tc_demand.setdefault(tc["TraumaCenter"], []).append(i)
+        for pair in demand_coverage["ADTCPair"]:
+            ad_pairs.setdefault(pair["AirDepot"], []).append((i, pair["TraumaCenter"]))
+            tc_pairs.setdefault(pair["TraumaCenter"], []).append((i, pair["AirDepot"]))
+    covered = [False] * len(demand_ids)
+    chosen = {"AirDepot": set(), "TraumaCenter": set()}
+    remaining = {"AirDepot": num_ad, "TraumaCenter": num_tc}
+    while remaining["AirDepot"] > 0 or remaining["TraumaCenter"] > 0:
+        best = None
+        best_gain = -1
+        for facility_type in ["AirDepot", "TraumaCenter"]:
+            if remaining[facility_type] <= 0:
+                continue
+            for facility_id in coverage_dict["facilities"][facility_type]:
+                if facility_id in chosen[facility_type]:
+                    continue
+                newly = set()
+                if facility_type == "TraumaCenter":
+                    newly.update(i for i in tc_demand.get(facility_id, []) if not covered[i])
+                    newly.update(i for i, ad in tc_pairs.get(facility_id, [])
+                                 if not covered[i] and ad in chosen["AirDepot"])
+                else:
+                    newly.update(i for i, tc in ad_pairs.get(facility_id, [])
+                                 if not covered[i] and tc in chosen["TraumaCenter"])
+                gain = sum(weights[i] for i in newly)
+                if gain > best_gain:
+                    best = (facility_type, facility_id, newly)
+                    best_gain = gain
+        if best is None:
+            return None
+        facility_type, facility_id, newly = best
+        chosen[facility_type].add(facility_id)
+        remaining[facility_type] -= 1
+        for i in newly:
+            covered[i] = True
+    return {facility_type: {facility_id: 1 for facility_id in ids} for facility_type, ids in chosen.items()}
+
+
+def celf_mclp(coverage_dict, num_fac, use_serviceable_demand=False, bitset_coverage=None):
+    """
+    Solves the MCLP directly from a binary coverage using the lazy greedy (CELF) algorithm.
+    Since coverage is submodular the marginal gain of a facility can only shrink as others are added,
+    so stale gains in the priority queue are upper bounds and only the top of the queue is re-evaluated
+
+    Minoux, M. (1978). Accelerated greedy algorithms for maximizing submodular set functions.
+    Optimization Techniques, 234-243.
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param num_fac: (dictionary) The dictionary of number of facilities to use
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param bitset_coverage: (bitset.BitsetCoverage) The packed coverage_dict (built with the same
+        use_serviceable_demand) to evaluate gains with bitwise operations, faster when facilities cover a lot
+        of demand. None to evaluate gains from the demand each facility covers
+    :return: (dictionary) The chosen ids keyed by facility type (ordered as utilities.get_ids), the covered demand,
+        the approximation ratio and the resulting upper bound on the optimal coverage
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if not isinstance(num_fac, dict):
+        raise TypeError("num_fac is not a dictionary")
+    if coverage_dict["type"]["type"] != "binary":
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    if bitset_coverage is None:
+        index = index_coverage(coverage_dict, use_serviceable_demand)
+        weights = index["weights"]
+        facilities = index["facilities"]
+        facility_demand = index["facilityDemand"]
+        covered = [False] * len(weights)
+        initial_gains = [sum(weights[i] for i, a in facility_demand[j]) for j in range(len(facilities))]
+        coverable = sum(weights[i] for i in range(len(weights)) if index["demandFacilities"][i])
+
+        def marginal_gain(j):
+            return sum(weights[i] for i, a in facility_demand[j] if not covered[i])
+
+        def add(j):
+            for i, a in facility_demand[j]:
+                covered[i] = True
+    else:
+        facilities = bitset_coverage.facilities
+        mask = bitset_coverage.empty()
+        initial_gains = bitset_coverage.weight_many(bitset_coverage.bits).tolist()
+        coverable = bitset_coverage.weight(bitset_coverage.covered(range(len(facilities))))
+
+        def marginal_gain(j):
+            return bitset_coverage.marginal_gain(j, mask)
+
+        def add(j):
+            mask[:] = mask | bitset_coverage.bits[j]
+    # Entries are (-gain, position, number of facilities chosen when the gain was computed)
+    queue = [(-initial_gains[j], j, 0) for j in range(len(facilities))]
+    heapq.heapify(queue)
+    chosen = []
+    type_totals = {}
+    objective = 0
+    while queue and can_add_facility(None, num_fac, type_totals, len(chosen)):
+        gain, j, computed = heapq.heappop(queue)
+        if not can_add_facility(facilities[j][0], num_fac, type_totals, len(chosen)):
+            # The facility type is full, it can never be added
+            continue
+        if computed != len(chosen):
+            heapq.heappush(queue, (-marginal_gain(j), j, len(chosen)))
+            continue
+        if -gain <= 0:
+            break
+        chosen.append(j)
+        type_totals[facilities[j][0]] = type_totals.get(facilities[j][0], 0) + 1
+        objective += -gain
+        add(j)
+    ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    for j in chosen:
+        ids[facilities[j][0]].append(facilities[j][1])
+    for facility_type in ids:
+        ids[facility_type].sort()
+    # Greedy is within (1 - 1/e) of optimal for a cardinality constraint and 1/2 with per type limits (a matroid)
+    if any(facility_type != "total" for facility_type in num_fac):
+        ratio = 0.5
+    else:
+        ratio = 1 - 1 / math.e
+    return {
+        "ids": ids,
+        "objective": objective,
+        "approximation": ratio,
+        "bound": min(objective / ratio, coverable)
+    }
+
+
+def interchange(coverage_dict, ids, num_fac=None, model_type="mclp", use_serviceable_demand=False,
+                max_iterations=None):
+    """
+    Improves a solution to the MCLP or BCLP with vertex interchange (swap) moves. Coverage counts for each demand
+    unit and the gain (adding) and loss (removing) of each facility are updated incrementally after every swap,
+    so a swap is evaluated using only the demand covered by the facility leaving the solution
+
+    Teitz, M. B., & Bart, P. (1968). Heuristic methods for estimating the generalized vertex median of a
+    weighted graph. Operations Research, 16(5), 955-961.
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param ids: (dictionary) The starting ids keyed by facility type (as returned by utilities.get_ids)
+    :param num_fac: (dictionary) The dictionary of number of facilities to use, swaps never exceed these limits
+    :param model_type: (string) 'mclp' (maximize covered demand) or 'backup' (maximize demand covered at least
+        twice while keeping all covered demand covered)
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param max_iterations: (int) The maximum number of passes over the solution, None for no limit
+    :return: (dictionary) The improved ids keyed by facility type (ids used more than once are repeated), the
+        objective and the number of swaps made
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if not isinstance(ids, dict):
+        raise TypeError("ids is not a dictionary")
+    if coverage_dict["type"]["type"] != "binary":
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    if model_type == "mclp":
+        level = 1
+    elif model_type == "backup":
+        level = 2
+    else:
+        raise ValueError("'{}' is not a valid model type".format(model_type))
+    index = index_coverage(coverage_dict, use_serviceable_demand)
+    weights = index["weights"]
+    facilities = index["facilities"]
+    facility_demand = index["facilityDemand"]
+    demand_facilities = index["demandFacilities"]
+    chosen = [0] * len(facilities)
+    type_totals = {}
+    for facility_type, type_ids in ids.items():
+        for facility_id in type_ids:
+            chosen[index["facilityIndex"][(facility_type, facility_id)]] += 1
+            type_totals[facility_type] = type_totals.get(facility_type, 0) + 1
+    # Coverage count of each demand unit
+    counts = [0] * len(weights)
+    for j in range(len(facilities)):
+        for i, a in facility_demand[j]:
+            counts[i] += chosen[j]
+    # Gain of adding, loss of removing and the number of demand units only covered once for each facility
+    gains = [0] * len(facilities)
+    losses = [0] * len(facilities)
+    critical = [0] * len(facilities)
+    for j in range(len(facilities)):
+        for i, a in facility_demand[j]:
+            if counts[i] == level - 1:
+                gains[j] += weights[i]
+            elif counts[i] == level:
+                losses[j] += weights[i]
+            if counts[i] == 1:
+                critical[j] += 1
+
+    def update(i, change):
+        # Moves demand unit i to a new coverage count and updates the facilities covering it
+        old = counts[i]
+        counts[i] = old + change
+        for j, a in demand_facilities[i]:
+            for count, sign in [(old, -1), (counts[i], 1)]:
+                if count == level - 1:
+                    gains[j] += sign * weights[i]
+                elif count == level:
+                    losses[j] += sign * weights[i]
+                if count == 1:
+                    critical[j] += sign
+
+    def allowed(incoming, outgoing):
+        if chosen[incoming] and level == 1:
+            return False
+        if num_fac is None:
+            return True
+        in_type = facilities[incoming][0]
+        out_type = facilities[outgoing][0]
+        return in_type == out_type or in_type not in num_fac or type_totals.get(in_type, 0) < num_fac[in_type]
+
+    objective = sum(weights[i] for i in range(len(weights)) if counts[i] >= level)
+    swaps = 0
+    iteration = 0
+    improved = True
+    while improved and (max_iterations is None or iteration < max_iterations):
+        improved = False
+        iteration += 1
+        for outgoing in range(len(facilities)):
+            if not chosen[outgoing]:
+                continue
+            # Corrections for demand covered by both the outgoing and incoming facility (count doesn't change)
+            corrections = {}
+            shared_critical = {}
+            for i, a in facility_demand[outgoing]:
+                if counts[i] == level - 1:
+                    correction = -weights[i]
+                elif counts[i] == level:
+                    correction = weights[i]
+                else:
+                    correction = 0
+                for j, b in demand_facilities[i]:
+                    if correction:
+                        corrections[j] = corrections.get(j, 0) + correction
+                    if counts[i] == 1:
+                        shared_critical[j] = shared_critical.get(j, 0) + 1
+            best = None
+            best_delta = 0
+            for incoming in range(len(facilities)):
+                if incoming == outgoing or not allowed(incoming, outgoing):
+                    continue
+                # The backup model must keep every covered demand unit covered
+                if level == 2 and critical[outgoing] - shared_critical.get(incoming, 0) > 0:
+                    continue
+                delta = gains[incoming] - losses[outgoing] + corrections.get(incoming, 0)
+                if delta > best_delta:
+                    best = incoming
+                    best_delta = delta
+            if best is None:
+                continue
+            chosen[outgoing] -= 1
+            type_totals[facilities[outgoing][0]] -= 1
+            for i, a in facility_demand[outgoing]:
+                update(i, -1)
+            chosen[best] += 1
+            type_totals[facilities[best][0]] = type_totals.get(facilities[best][0], 0) + 1
+            for i, a in facility_demand[best]:
+                update(i, 1)
+            objective += best_delta
+            swaps += 1
+            improved = True
+    result_ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    for j, (facility_type, facility_id) in enumerate(facilities):
+        result_ids[facility_type].extend([facility_id] * chosen[j])
+    for facility_type in result_ids:
+        result_ids[facility_type].sort()
+    return {
+        "ids": result_ids,
+        "objective": objective,
+        "swaps": swaps
+    }
+
+
+def greedy_solution(coverage_dict, model_type, parameters, use_serviceable_demand=False):
+    """
+    Finds a fast greedy solution for a covering model that can be used as an incumbent (warm start)
+
+    :param coverage_dict: (dictionary) The coverage used to generate the model
+    :param model_type: (string) The model type (mclp, mclp_cc, threshold, cc_threshold, backup, bclpcc, lscp,
+        traumah)
+    :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The number of times each facility is used keyed by facility type and id.
+        None if no feasible solution was found
+    """
+    if model_type == "traumah":
+        return _greedy_traumah(coverage_dict, parameters["num_ad"], parameters["num_tc"])
+    if model_type == "mclp":
+        return counts_from_ids(celf_mclp(coverage_dict, parameters["num_fac"], use_serviceable_demand)["ids"])
+    index = index_coverage(coverage_dict, use_serviceable_demand)
+    weights = index["weights"]
+    if model_type == "mclp_cc":
+        chosen = greedy_add(index, lambda i, s: weights[i] * min(s, weights[i]), parameters["num_fac"])[1]
+    elif model_type in ["threshold", "cc_threshold"]:
+        sum_demand = float(sum(weights))
+        if model_type == "threshold":
+            def value(i, s):
+                return 100 / sum_demand * weights[i] if s >= 1 else 0
+        else:
+            def value(i, s):
+                return 100 / sum_demand * min(s, weights[i])
+        sums, chosen, type_totals, total, objective = greedy_add(index, value, target=parameters["psi"])
+        # Allow for floating point error in the scaled threshold
+        if objective < parameters["psi"] - 1e-9:
+            return None
+    elif model_type == "lscp":
+        state = _greedy_cover(index)
+        if state is None:
+            return None
+        sums, chosen = state[0], state[1]
+        _remove_redundant(index, sums, chosen)
+    elif model_type == "backup":
+        state = _greedy_cover(index, parameters["num_fac"])
+        if state is None:
+            return None
+        chosen = greedy_add(index, lambda i, s: weights[i] if s >= 2 else 0, parameters["num_fac"], repeat=True,
+                             state=state)[1]
+    elif model_type == "bclpcc":
+        backup_weight = parameters["backup_weight"]
+
+        def value(i, s):
+            overall = min(s, 2 * weights[i])
+            return backup_weight * (overall - weights[i]) + (1 - backup_weight) * min(overall, weights[i])
+        chosen = greedy_add(index, value, parameters["num_fac"], repeat=True)[1]
+    else:
+        raise ValueError("'{}' is not a valid model type".format(model_type))
+    return _to_counts(index, chosen)
+
+
+def warm_start_counts(coverage_dict, model_type, parameters, warm_start, use_serviceable_demand=False):
+    """
+    Resolves the warm_start option of the covering models to facility counts
+
+    :param coverage_dict: (dictionary) The coverage used to generate the model
+    :param model_type: (string) The model type
+    :param parameters: (dictionary) The model parameters
+    :param warm_start: (string or dictionary) 'greedy' or the ids chosen in a prior solution keyed by facility type
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The number of times each facility is used keyed by facility type and id or None
+    """
+    if warm_start == "greedy":
+        return greedy_solution(coverage_dict, model_type, parameters, use_serviceable_demand)
+    if isinstance(warm_start, dict):
+        return counts_from_ids(warm_start)
+    raise ValueError("warm_start must be 'greedy' or a dictionary of ids")
@@ -0,0 +1,262 @@
+# -*- coding: UTF-8 -*-
+import logging
+import math
+
+from pyspatialopt.models import bitset, heuristics
+
+
+def _select_facilities(facilities, reduced_costs, num_fac, maximize):
+    """
+    Solves the relaxed facility subproblem: the best facilities with an improving reduced cost, subject to the
+    total and per type limits. The limits form a matroid so choosing by reduced cost is optimal
+
+    :param facilities: (list) The facilities (type, id)
+    :param reduced_costs: (list) The reduced cost of each facility
+    :param num_fac: (dictionary) The facility limits ('total' and per type), None for no limit
+    :param maximize: (bool) Are positive (True) or negative (False) reduced costs improving
+    :return: (list) The positions of the chosen facilities
+    """
+    sign = 1 if maximize else -1
+    order = sorted((j for j in range(len(facilities)) if sign * reduced_costs[j] > 0),
+                   key=lambda k: -sign * reduced_costs[k])
+    chosen = []
+    type_totals = {}
+    for j in order:
+        facility_type = facilities[j][0]
+        if num_fac is not None:
+            if "total" in num_fac and len(chosen) >= num_fac["total"]:
+                break
+            if facility_type in num_fac and type_totals.get(facility_type, 0) >= num_fac[facility_type]:
+                continue
+        chosen.append(j)
+        type_totals[facility_type] = type_totals.get(facility_type, 0) + 1
+    return chosen
+
+
+def _to_ids(coverage_dict, facilities, chosen):
+    """
+    Converts facility positions to ids keyed by facility type (ordered as utilities.get_ids)
+    """
+    ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    for j in chosen:
+        ids[facilities[j][0]].append(facilities[j][1])
+    for facility_type in ids:
+        ids[facility_type].sort()
+    return ids
+
+
+def solve_mclp(coverage_dict, num_fac, use_serviceable_demand=False, gap=0.001, max_iterations=1000,
+               step_scale=2.0, patience=20, callback=None):
+    """
+    Solves the MCLP with a subgradient optimized Lagrangian relaxation of the coverage constraints.
+    Each iteration gives an upper bound on the optimal coverage and a primal solution (the facilities
+    chosen by the relaxation) whose coverage is a lower bound
+
+    Galvao, R. D., & ReVelle, C. (1996). A Lagrangean heuristic for the maximal covering location problem.
+    European Journal of Operational Research, 88(1), 114-123.
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param num_fac: (dictionary) The dictionary of number of facilities to use
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param gap: (float) Stop once the relative gap between the bound and the best solution is at most gap
+    :param max_iterations: (int) The maximum number of subgradient iterations
+    :param step_scale: (float) The initial step size scale, halved after patience iterations without improvement
+    :param patience: (int) The number of iterations without a better bound before halving the step size scale
+    :param callback: (function) Called each iteration with (iteration, bound, objective)
+    :return: (dictionary) The status ('Optimal' when the bound equals the objective, otherwise 'Feasible'), best
+        solution ids, best objective, best (upper) bound, gap and iterations
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if not isinstance(num_fac, dict):
+        raise TypeError("num_fac is not a dictionary")
+    if coverage_dict["type"]["type"] != "binary":
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    index = heuristics.index_coverage(coverage_dict, use_serviceable_demand)
+    weights = index["weights"]
+    facilities = index["facilities"]
+    facility_demand = index["facilityDemand"]
+    demand_facilities = index["demandFacilities"]
+    # Demand that no facility covers can't contribute, so it is left out of the relaxation
+    coverable = [i for i in range(len(weights)) if demand_facilities[i] and weights[i] > 0]
+    # Start from the greedy solution
+    greedy = heuristics.celf_mclp(coverage_dict, num_fac, use_serviceable_demand,
+                                  bitset.BitsetCoverage(coverage_dict, use_serviceable_demand))
+    best_ids = greedy["ids"]
+    best_objective = greedy["objective"]
+    best_bound = float(sum(weights[i] for i in coverable))
+    multipliers = [0.0] * len(weights)
+    for i in coverable:
+        multipliers[i] = weights[i] / 2.0
+    iteration = 0
+    since_improvement = 0
+    while iteration < max_iterations and best_bound - best_objective > gap * best_bound:
+        iteration += 1
+        # Solve the relaxation
+        reduced_costs = [sum(multipliers[i] for i, a in facility_demand[j]) for j in range(len(facilities))]
+        chosen = _select_facilities(facilities, reduced_costs, num_fac, True)
+        bound = sum(reduced_costs[j] for j in chosen)
+        demand_chosen = [i for i in coverable if weights[i] - multipliers[i] > 0]
+        bound += sum(weights[i] - multipliers[i] for i in demand_chosen)
+        if bound < best_bound:
+            best_bound = bound
+            since_improvement = 0
+        else:
+            since_improvement += 1
+            if since_improvement >= patience:
+                step_scale /= 2.0
+                since_improvement = 0
+        # The chosen facilities are always feasible, their coverage is a lower bound
+        counts = [0] * len(weights)
+        for j in chosen:
+            for i, a in facility_demand[j]:
+                counts[i] += 1
+        objective = sum(weights[i] for i in coverable if counts[i] > 0)
+        if objective > best_objective:
+            best_objective = objective
+            best_ids = _to_ids(coverage_dict, facilities, chosen)
+        if callback is not None:
+            callback(iteration, best_bound, best_objective)
+        # Update the multipliers along the subgradient of the relaxed constraints
+        subgradient = [0.0] * len(weights)
+        for i in coverable:
+            subgradient[i] = counts[i]
+        for i in demand_chosen:
+            subgradient[i] -= 1
+        norm = sum(g * g for g in subgradient)
+        if norm == 0 or step_scale < 1e-6:
+            break
+        step = step_scale * (bound - best_objective) / norm
+        for i in coverable:
+            multipliers[i] = max(0.0, multipliers[i] - step * subgradient[i])
+    best_bound = max(best_bound, best_objective)
+    relative_gap = (best_bound - best_objective) / best_bound if best_bound > 0 else 0.0
+    logging.getLogger().info("Lagrangian MCLP bound: {} objective: {} gap: {}".format(best_bound, best_objective,
+                                                                                      relative_gap))
+    # Stopping within the gap only proves the solution is optimal when the bound reaches it
+    optimal = best_bound - best_objective <= 1e-9 * max(1.0, abs(best_bound))
+    return {
+        "status": "Optimal" if optimal else "Feasible",
+        "ids": best_ids,
+        "objective": best_objective,
+        "bound": best_bound,
+        "gap": relative_gap,
+        "iterations": iteration
+    }
+
+
+def repair_cover(facility_demand, demand_facilities, chosen):
+    """
+    Adds facilities until every demand unit is covered then removes redundant facilities
+
+    :param facility_demand: (list) The demand (position, value) each facility covers
+    :param demand_facilities: (list) The facilities (position, value) covering each demand unit
+    :param chosen: (list) The positions of the chosen facilities
+    :return: (list) The positions of the facilities in the cover
+    """
+    counts = [0] * len(demand_facilities)
+    in_cover = set(chosen)
+    for j in in_cover:
+        for i, a in facility_demand[j]:
+            counts[i] += 1
+    for i in range(len(demand_facilities)):
+        if counts[i] == 0:
+            # Add the facility covering the most uncovered demand units
+            best = max((j for j, a in demand_facilities[i]),
+                       key=lambda k: sum(1 for d, a in facility_demand[k] if counts[d] == 0))
+            in_cover.add(best)
+            for d, a in facility_demand[best]:
+                counts[d] += 1
+    for j in sorted(in_cover, key=lambda k: len(facility_demand[k])):
+        if all(counts[i] > 1 for i, a in facility_demand[j]):
+            in_cover.remove(j)
+            for i, a in facility_demand[j]:
+                counts[i] -= 1
+    return sorted(in_cover)
+
+
+def solve_lscp(coverage_dict, gap=0.0, max_iterations=1000, step_scale=2.0, patience=20, callback=None):
+    """
+    Solves the LSCP with a subgradient optimized Lagrangian relaxation of the covering constraints.
+    Each iteration gives a lower bound on the number of facilities and a primal solution (the relaxation's
+    facilities repaired to a cover) whose size is an upper bound
+
+    Beasley, J. E. (1990). A Lagrangian heuristic for set-covering problems.
+    Naval Research Logistics, 37(1), 151-164.
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param gap: (float) Stop once the relative gap between the best solution and the bound is at most gap
+    :param max_iterations: (int) The maximum number of subgradient iterations
+    :param step_scale: (float) The initial step size scale, halved after patience iterations without improvement
+    :param patience: (int) The number of iterations without a better bound before halving the step size scale
+    :param callback: (function) Called each iteration with (iteration, bound, objective)
+    :return: (dictionary) The status ('Optimal' when the bound equals the objective, otherwise 'Feasible'), best
+        solution ids, best objective, best (lower) bound, gap and iterations
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if coverage_dict["type"]["type"] != "binary":
+        raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    index = heuristics.index_coverage(coverage_dict)
+    facilities = index["facilities"]
+    facility_demand = index["facilityDemand"]
+    demand_facilities = index["demandFacilities"]
+    if not all(demand_facilities):
+        return {
+            "status": "Infeasible",
+            "ids": {},
+            "objective": None,
+            "bound": None,
+            "gap": None,
+            "iterations": 0
+        }
+    best_chosen = repair_cover(facility_demand, demand_facilities, [])
+    best_objective = len(best_chosen)
+    best_bound = 0.0
+    multipliers = [min(1.0 / len(facility_demand[j]) for j, a in demand_facilities[i])
+                   for i in range(len(demand_facilities))]
+    iteration = 0
+    since_improvement = 0
+    # The number of facilities is integer so the bound can be rounded up
+    while iteration < max_iterations and best_objective - math.ceil(best_bound - 1e-9) > gap * best_objective:
+        iteration += 1
+        reduced_costs = [1.0 - sum(multipliers[i] for i, a in facility_demand[j]) for j in range(len(facilities))]
+        chosen = _select_facilities(facilities, reduced_costs, None, False)
+        bound = sum(multipliers) + sum(reduced_costs[j] for j in chosen)
+        if bound > best_bound:
+            best_bound = bound
+            since_improvement = 0
+        else:
+            since_improvement += 1
+            if since_improvement >= patience:
+                step_scale /= 2.0
+                since_improvement = 0
+        cover = repair_cover(facility_demand, demand_facilities, chosen)
+        if len(cover) < best_objective:
+            best_objective = len(cover)
+            best_chosen = cover
+        if callback is not None:
+            callback(iteration, best_bound, best_objective)
+        counts = [0] * len(demand_facilities)
+        for j in chosen:
+            for i, a in facility_demand[j]:
+                counts[i] += 1
+        subgradient = [1 - counts[i] for i in range(len(demand_facilities))]
+        norm = sum(g * g for g in subgradient)
+        if norm == 0 or step_scale < 1e-6:
+            break
+        step = step_scale * (best_objective - bound) / norm
+        for i in range(len(multipliers)):
+            multipliers[i] = max(0.0, multipliers[i] + step * subgradient[i])
+    best_bound = min(math.ceil(best_bound - 1e-9), best_objective)
+    relative_gap = float(best_objective - best_bound) / best_objective if best_objective > 0 else 0.0
+    logging.getLogger().info("Lagrangian LSCP bound: {} objective: {} gap: {}".format(best_bound, best_objective,
+                                                                                      relative_gap))
+    return {
+        "status": "Optimal" if best_bound == best_objective else "Feasible",
+        "ids": _to_ids(coverage_dict, facilities, best_chosen),
+        "objective": best_objective,
+        "bound": best_bound,
+        "gap": relative_gap,
+        "iterations": iteration
+    }
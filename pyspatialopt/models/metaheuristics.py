@@ -0,0 +1,214 @@
+# -*- coding: UTF-8 -*-
+import logging
+import math
+import random
+import time
+
+from pyspatialopt.models import heuristics
+
+
+def _demand_values(model_type, weights, backup_weight):
+    """
+    Creates the objective contribution of demand unit i when it receives coverage s
+
+    :param model_type: (string) 'backup' or 'bclpcc'
+    :param weights: (list) The demand weights
+    :param backup_weight: (float) The backup weight (bclpcc)
+    :return: (function) value(i, s)
+    """
+    if model_type == "backup":
+        # Every demand unit must be covered, an uncovered unit costs more than any solution is worth
+        penalty = sum(weights) + 1
+
+        def value(i, s):
+            if s >= 2:
+                return weights[i]
+            elif s >= 1:
+                return 0
+            return -penalty
+    elif model_type == "bclpcc":
+        primary_weight = 1 - backup_weight
+
+        def value(i, s):
+            overall = min(s, 2 * weights[i])
+            return backup_weight * (overall - weights[i]) + primary_weight * min(overall, weights[i])
+    else:
+        raise ValueError("'{}' is not a valid model type".format(model_type))
+    return value
+
+
+def anneal(coverage_dict, model_type, num_fac, backup_weight=None, ids=None, time_limit=10.0, max_iterations=None,
+           seed=None, initial_temperature=None, cooling=0.9995, use_serviceable_demand=False):
+    """
+    Solves the BCLP (create_backup_model) or BCLPCC (create_bclpcc_model) with simulated annealing over
+    the number of times each facility is used. Moves add a facility, remove one or move one to another
+    facility, and the change in objective is computed from the demand covered by the facilities involved
+
+    Kirkpatrick, S., Gelatt, C. D., & Vecchi, M. P. (1983). Optimization by simulated annealing.
+    Science, 220(4598), 671-680.
+
+    :param coverage_dict: (dictionary) The binary (backup) or partial (bclpcc) coverage
+    :param model_type: (string) 'backup' or 'bclpcc'
+    :param num_fac: (dictionary) The dictionary of number of facilities to use
+    :param backup_weight: (float or int) The backup weight to use (bclpcc)
+    :param ids: (dictionary) The starting ids keyed by facility type, repeated ids are used more than once.
+        Defaults to the greedy solution
+    :param time_limit: (float) The number of seconds to search, None for no limit
+    :param max_iterations: (int) The maximum number of moves, None for no limit. Set this (and time_limit to None)
+        for results that are reproducible with the same seed
+    :param seed: (int) The seed for the random number generator
+    :param initial_temperature: (float) The starting temperature, defaults to the mean change of sampled moves
+    :param cooling: (float) The factor applied to the temperature after each move
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (dictionary) The best ids keyed by facility type (ids used more than once are repeated), the
+        objective, whether the solution is feasible and the number of moves evaluated
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    if not isinstance(num_fac, dict):
+        raise TypeError("num_fac is not a dictionary")
+    if model_type == "backup":
+        if coverage_dict["type"]["type"] != "binary":
+            raise ValueError("Expected types: '{}' got type '{}'".format(["binary"], coverage_dict["type"]["type"]))
+    elif model_type == "bclpcc":
+        if coverage_dict["type"]["type"] != "partial":
+            raise ValueError("Expected types: '{}' got type '{}'".format(["partial"],
+                                                                         coverage_dict["type"]["type"]))
+        if not (isinstance(backup_weight, float) or isinstance(backup_weight, int)):
+            raise TypeError("backup weight is not float or int")
+        if backup_weight > 1.0 or backup_weight < 0.0:
+            raise ValueError("Backup weight must be between 0 and 1")
+    else:
+        raise ValueError("'{}' is not a valid model type".format(model_type))
+    if time_limit is None and max_iterations is None:
+        raise ValueError("Either time_limit or max_iterations must be specified")
+    rng = random.Random(seed)
+    index = heuristics.index_coverage(coverage_dict, use_serviceable_demand)
+    weights = index["weights"]
+    facilities = index["facilities"]
+    facility_demand = index["facilityDemand"]
+    value = _demand_values(model_type, weights, backup_weight)
+    # Demand units that no facility covers are the same in every solution
+    fixed = set(i for i in range(len(weights)) if not index["demandFacilities"][i])
+    if ids is None:
+        counts = heuristics.greedy_solution(coverage_dict, model_type,
+                                            {"num_fac": num_fac, "backup_weight": backup_weight},
+                                            use_serviceable_demand)
+        ids = {}
+        if counts is not None:
+            for facility_type in counts:
+                ids[facility_type] = [facility_id for facility_id, count in counts[facility_type].items()
+                                      for _ in range(count)]
+    chosen = [0] * len(facilities)
+    type_totals = {}
+    for facility_type, type_ids in ids.items():
+        for facility_id in type_ids:
+            chosen[index["facilityIndex"][(facility_type, facility_id)]] += 1
+            type_totals[facility_type] = type_totals.get(facility_type, 0) + 1
+    total = sum(chosen)
+    # One entry per facility unit in use so a unit to remove is picked in constant time
+    units = [j for j in range(len(facilities)) for _ in range(chosen[j])]
+    sums = [0] * len(weights)
+    for j in range(len(facilities)):
+        for i, a in facility_demand[j]:
+            sums[i] += a * chosen[j]
+    objective = sum(value(i, sums[i]) for i in range(len(weights)) if i not in fixed)
+
+    def can_add(facility_type, removed_type=None):
+        extra = 1 if facility_type != removed_type else 0
+        if "total" in num_fac and total + (1 if removed_type is None else 0) > num_fac["total"]:
+            return False
+        if facility_type in num_fac and type_totals.get(facility_type, 0) + extra > num_fac[facility_type]:
+            return False
+        return True
+
+    def propose():
+        # Returns (unit position, facility removed, facility added) with None for no facility
+        move = rng.random()
+        if move < 0.3 or not units:
+            j = rng.randrange(len(facilities))
+            if can_add(facilities[j][0]):
+                return None, None, j
+            return None, None, None
+        k = rng.randrange(len(units))
+        if move < 0.4:
+            return k, units[k], None
+        j = rng.randrange(len(facilities))
+        if j != units[k] and can_add(facilities[j][0], facilities[units[k]][0]):
+            return k, units[k], j
+        return None, None, None
+
+    def delta(outgoing, incoming):
+        changes = {}
+        if outgoing is not None:
+            for i, a in facility_demand[outgoing]:
+                changes[i] = changes.get(i, 0) - a
+        if incoming is not None:
+            for i, a in facility_demand[incoming]:
+                changes[i] = changes.get(i, 0) + a
+        return sum(value(i, sums[i] + change) - value(i, sums[i]) for i, change in changes.items())
+
+    if initial_temperature is None:
+        samples = []
+        for _ in range(100):
+            k, outgoing, incoming = propose()
+            if outgoing is not None or incoming is not None:
+                samples.append(abs(delta(outgoing, incoming)))
+        initial_temperature = (sum(samples) / len(samples) if samples else 0) or 1.0
+    temperature = initial_temperature
+    best_chosen = list(chosen)
+    best_objective = objective
+    start = time.time()
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        if time_limit is not None and iteration % 100 == 0 and time.time() - start >= time_limit:
+            break
+        iteration += 1
+        temperature *= cooling
+        k, outgoing, incoming = propose()
+        if outgoing is None and incoming is None:
+            continue
+        change = delta(outgoing, incoming)
+        if change < 0 and rng.random() >= math.exp(change / max(temperature, 1e-12)):
+            continue
+        if outgoing is not None:
+            chosen[outgoing] -= 1
+            type_totals[facilities[outgoing][0]] -= 1
+            total -= 1
+            units[k] = units[-1]
+            units.pop()
+            for i, a in facility_demand[outgoing]:
+                sums[i] -= a
+        if incoming is not None:
+            chosen[incoming] += 1
+            type_totals[facilities[incoming][0]] = type_totals.get(facilities[incoming][0], 0) + 1
+            total += 1
+            units.append(incoming)
+            for i, a in facility_demand[incoming]:
+                sums[i] += a
+        objective += change
+        if objective > best_objective:
+            best_objective = objective
+            best_chosen = list(chosen)
+    result_ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    for j, (facility_type, facility_id) in enumerate(facilities):
+        result_ids[facility_type].extend([facility_id] * best_chosen[j])
+    for facility_type in result_ids:
+        result_ids[facility_type].sort()
+    if model_type == "backup":
+        best_sums = [0] * len(weights)
+        for j in range(len(facilities)):
+            for i, a in facility_demand[j]:
+                best_sums[i] += a * best_chosen[j]
+        feasible = not fixed and all(s >= 1 for s in best_sums)
+    else:
+        # Add back the (constant) contribution of the demand units no facility covers
+        best_objective += sum(value(i, 0) for i in fixed)
+        feasible = True
+    logging.getLogger().info("Annealing finished after {} moves with objective {}".format(iteration, best_objective))
+    return {
+        "ids": result_ids,
+        "objective": best_objective,
+        "feasible": feasible,
+        "iterations": iteration
+    }
@@ -0,0 +1,271 @@
+# -*- coding: UTF-8 -*-
+import logging
+
+import pulp
+
+from pyspatialopt.models import handle, heuristics, sweep
+
+
+class CoverageCurve(object):
+    """
+    The tradeoff between the number of facilities and the optimal coverage of the MCLP (binary) or
+    MCLPCC (partial) model. One model is built and re-solved for each number of facilities p.
+
+    Points are only solved when their value isn't implied by the points already known:
+        * Coverage never decreases with p, so p lies between the values of the known points around it
+        * Dropping the facility adding the least coverage loses at most 1/p of the coverage, so
+          coverage(p) <= coverage(q) * p / q for q < p
+        * The best known solution for fewer facilities, extended greedily, is a lower bound
+    A point whose lower and upper bounds meet is taken from the greedy solution without solving, and
+    every solve starts from the greedy solution (for solvers supporting MIP starts such as CBC).
+    """
+
+    def __init__(self, coverage_dict, model_type="mclp", solver=None, delineator="$", use_serviceable_demand=False):
+        """
+        :param coverage_dict: (dictionary) The binary (mclp, threshold) or partial (mclp_cc, cc_threshold) coverage
+        :param model_type: (string) 'mclp' or 'threshold' (binary coverage), 'mclp_cc' or 'cc_threshold'
+            (partial coverage). The threshold types count each unit of covered demand once
+        :param solver: (Pulp solver) The solver to use, defaults to GLPK
+        :param delineator: (string) The character/symbol used to delineate facility and id
+        :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+        """
+        if not isinstance(coverage_dict, dict):
+            raise TypeError("coverage_dict is not a dictionary")
+        if model_type in ["mclp", "threshold"]:
+            expected = "binary"
+        elif model_type in ["mclp_cc", "cc_threshold"]:
+            expected = "partial"
+        else:
+            raise ValueError("'{}' is not a valid model type".format(model_type))
+        if coverage_dict["type"]["type"] != expected:
+            raise ValueError("Expected types: '{}' got type '{}'".format([expected], coverage_dict["type"]["type"]))
+        if solver is None:
+            solver = pulp.GLPK()
+        self.coverage_dict = coverage_dict
+        self.model_type = model_type
+        self.solver = solver
+        self.index = heuristics.index_coverage(coverage_dict, use_serviceable_demand)
+        weights = self.index["weights"]
+        if expected == "binary":
+            def value(i, s):
+                return weights[i] if s >= 1 else 0
+        elif model_type == "mclp_cc":
+            def value(i, s):
+                return weights[i] * min(s, weights[i])
+        else:
+            def value(i, s):
+                return min(s, weights[i])
+        self.value = value
+        self.sum_demand = float(sum(weights))
+        self.num_facilities = len(self.index["facilities"])
+        prob = sweep.create_model(coverage_dict, "mclp" if expected == "binary" else "mclp_cc",
+                                  {"num_fac": {"total": 0}}, delineator, use_serviceable_demand)
+        self.model = handle.ModelHandle(prob, coverage_dict, delineator, use_serviceable_demand)
+        if model_type == "cc_threshold":
+            # Complementary coverage counts each unit of covered demand once
+            prob.setObjective(pulp.lpSum(self.model.demand_vars.values()))
+        self.facility_vars = [self.model.facility_vars[facility_type][facility_id]
+                              for facility_type, facility_id in self.index["facilities"]]
+        # The coverage when every facility is used
+        self.saturation = self._evaluate([1] * self.num_facilities)[0]
+        # The best known solution (coverage, chosen facilities) for each p and the p with proven optimal coverage
+        self.best = {0: (0, [0] * self.num_facilities)}
+        self.exact = set([0])
+        self.solves = 0
+        self.status = "Optimal"
+
+    def _evaluate(self, chosen):
+        """
+        :return: (tuple) The coverage and coverage sums of the chosen facilities
+        """
+        sums = [0] * len(self.index["demandIds"])
+        for j, count in enumerate(chosen):
+            if count:
+                for i, a in self.index["facilityDemand"][j]:
+                    sums[i] += a * count
+        return sum(self.value(i, s) for i, s in enumerate(sums)), sums
+
+    def _tolerance(self, coverage):
+        return 1e-6 * max(1.0, abs(coverage))
+
+    def lower_bound(self, p):
+        """
+        The coverage of the best known solution using at most p facilities, extended greedily to p facilities
+
+        :param p: (int) The number of facilities
+        :return: (float) The lower bound
+        """
+        if p in self.exact:
+            return self.best[p][0]
+        coverage, chosen = max((self.best[q] for q in self.best if q <= p), key=lambda b: b[0])
+        chosen = list(chosen)
+        sums = self._evaluate(chosen)[1]
+        total = sum(chosen)
+        type_totals = {}
+        for j, count in enumerate(chosen):
+            if count:
+                facility_type = self.index["facilities"][j][0]
+                type_totals[facility_type] = type_totals.get(facility_type, 0) + count
+        if total < p:
+            coverage = heuristics.greedy_add(self.index, self.value, {"total": p},
+                                              state=(sums, chosen, type_totals, total))[4]
+        if p not in self.best or coverage > self.best[p][0]:
+            self.best[p] = (coverage, chosen)
+        return self.best[p][0]
+
+    def upper_bound(self, p):
+        """
+        The best bound on the coverage of p facilities implied by the points with proven coverage
+
+        :param p: (int) The number of facilities
+        :return: (float) The upper bound
+        """
+        bound = self.saturation
+        for q in self.exact:
+            if q >= p:
+                bound = min(bound, self.best[q][0])
+            elif q > 0:
+                bound = min(bound, self.best[q][0] * float(p) / q)
+        return bound
+
+    def solve(self, p):
+        """
+        The optimal coverage of p facilities, solving the model only if the bounds don't meet
+
+        :param p: (int) The number of facilities
+        :return: (float) The optimal coverage, None if the solver failed
+        """
+        p = min(p, self.num_facilities)
+        if p in self.exact:
+            return self.best[p][0]
+        lower = self.lower_bound(p)
+        if lower >= self.upper_bound(p) - self._tolerance(lower):
+            self.exact.add(p)
+            return lower
+        # Start from the greedy solution
+        coverage, chosen = self.best[p]
+        sums = self._evaluate(chosen)[1]
+        for j, var in enumerate(self.facility_vars):
+            var.setInitialValue(chosen[j])
+        for i, demand_id in enumerate(self.index["demandIds"]):
+            if self.coverage_dict["type"]["type"] == "binary":
+                self.model.demand_vars[demand_id].setInitialValue(1 if sums[i] >= 1 else 0)
+            else:
+                self.model.demand_vars[demand_id].setInitialValue(min(sums[i], self.index["weights"][i]))
+        self.model.set_num_facilities(total=p)
+        self.model.solve(self.solver, warm_start=True)
+        self.solves += 1
+        if self.model.problem.status != pulp.LpStatusOptimal:
+            self.status = pulp.LpStatus[self.model.problem.status]
+            return None
+        chosen = [int(round(var.varValue or 0)) for var in self.facility_vars]
+        coverage = self._evaluate(chosen)[0]
+        if coverage > self.best[p][0]:
+            self.best[p] = (coverage, chosen)
+        self.exact.add(p)
+        return self.best[p][0]
+
+    def _row(self, p):
+        coverage, chosen = self.best[p]
+        ids = {facility_type: [] for facility_type in self.coverage_dict["facilities"]}
+        for j, count in enumerate(chosen):
+            if count:
+                ids[self.index["facilities"][j][0]].append(self.index["facilities"][j][1])
+        for facility_type in ids:
+            ids[facility_type].sort()
+        percentage = None
+        if self.model_type != "mclp_cc":
+            percentage = 100 * coverage / self.sum_demand if self.sum_demand else 100.0
+        return {"p": p, "coverage": coverage, "percentage": percentage, "ids": ids}
+
+    def table(self, max_facilities=None):
+        """
+        Computes the curve by adaptive bisection: an interval whose end points have the same coverage
+        is flat, otherwise its middle point is solved and both halves are searched
+
+        :param max_facilities: (int) The largest number of facilities, defaults to every facility
+        :return: (list) A row (p, coverage, percentage of demand for the threshold types and ids) for each
+            p where the coverage increases, starting at p = 0. Any other p has the coverage of the row before it
+        """
+        top = self.num_facilities if max_facilities is None else min(max_facilities, self.num_facilities)
+        if self.solve(top) is None:
+            return None
+        intervals = [(0, top)]
+        while intervals:
+            low, high = intervals.pop()
+            if high - low <= 1:
+                continue
+            if self.best[low][0] >= self.best[high][0] - self._tolerance(self.best[high][0]):
+                continue
+            middle = (low + high) // 2
+            if self.solve(middle) is None:
+                return None
+            intervals.append((middle, high))
+            intervals.append((low, middle))
+        rows = []
+        for p in sorted(self.exact):
+            if p > top:
+                break
+            if not rows or self.best[p][0] > rows[-1]["coverage"] + self._tolerance(rows[-1]["coverage"]):
+                rows.append(self._row(p))
+        logging.getLogger().info("Coverage curve: {} points with {} solves".format(len(rows), self.solves))
+        return rows
+
+    def threshold(self, psi):
+        """
+        The fewest facilities covering at least psi percent of the demand (the threshold and complementary
+        coverage threshold models), found by bisection over p
+
+        :param psi: (float or int) The percentage of demand to cover
+        :return: (dictionary) The row (p, coverage, percentage and ids), None if psi can't be reached
+        """
+        if not (isinstance(psi, float) or isinstance(psi, int)):
+            raise TypeError("psi is not a float or int")
+        if self.model_type == "mclp_cc":
+            raise ValueError("The MCLPCC objective is not a percentage of demand")
+        # Allow for floating point error in the scaled threshold
+        target = psi / 100.0 * self.sum_demand - 1e-9 * max(1.0, self.sum_demand)
+        high = self.num_facilities
+        if self.upper_bound(high) < target:
+            return None
+        low = 0
+        for p in sorted(self.exact):
+            if self.best[p][0] < target:
+                low = max(low, p)
+            else:
+                high = min(high, p)
+        if self.best[0][0] >= target:
+            return self._row(0)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.lower_bound(middle) >= target:
+                high = middle
+            elif self.upper_bound(middle) < target:
+                low = middle
+            else:
+                coverage = self.solve(middle)
+                if coverage is None:
+                    return None
+                if coverage >= target:
+                    high = middle
+                else:
+                    low = middle
+        if self.lower_bound(high) < target:
+            return None
+        return self._row(high)
+
+
+def pareto_curve(coverage_dict, model_type="mclp", max_facilities=None, solver=None, delineator="$",
+                 use_serviceable_demand=False):
+    """
+    Computes the coverage versus number of facilities tradeoff (see CoverageCurve)
+
+    :param coverage_dict: (dictionary) The binary (mclp, threshold) or partial (mclp_cc, cc_threshold) coverage
+    :param model_type: (string) 'mclp', 'threshold', 'mclp_cc' or 'cc_threshold'
+    :param max_facilities: (int) The largest number of facilities, defaults to every facility
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :return: (list) A row (p, coverage, percentage of demand and ids) for each p where the coverage increases
+    """
+    return CoverageCurve(coverage_dict, model_type, solver, delineator, use_serviceable_demand).table(max_facilities)
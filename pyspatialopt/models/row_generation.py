@@ -0,0 +1,126 @@
+# -*- coding: UTF-8 -*-
+import logging
+
+import numpy as np
+import pulp
+
+from pyspatialopt import profiling
+from pyspatialopt.models import covering, heuristics, lagrangian, utilities
+
+
+def _covering_matrix(index):
+    """
+    Converts the facilities covering each demand unit to a compressed sparse row layout
+
+    :param index: (dictionary) The indexed coverage (heuristics.index_coverage)
+    :return: (tuple) The demand position of each non zero, the facility position of each non zero
+        and the number of facilities covering each demand unit
+    """
+    num_covering = np.fromiter((len(covering_facilities) for covering_facilities in index["demandFacilities"]),
+                               dtype=np.int64, count=len(index["demandFacilities"]))
+    rows = np.repeat(np.arange(len(num_covering), dtype=np.int64), num_covering)
+    columns = np.fromiter((j for covering_facilities in index["demandFacilities"] for j, a in covering_facilities),
+                          dtype=np.int64, count=int(num_covering.sum()))
+    return rows, columns, num_covering
+
+
+def solve_lscp(coverage_dict, solver=None, initial_rows=1000, max_new_rows=None, max_iterations=None,
+               warm_start=False, delineator="$", callback=None):
+    """
+    Solves the LSCP by row generation. The model starts with the covering constraints of the demand units
+    covered by the fewest facilities. After each solve every demand unit is checked against the solution at
+    once and the constraints of the uncovered demand units are added, until the solution covers all demand.
+    Only the constraints needed to define the optimal solution are given to the solver
+
+    :param coverage_dict: (dictionary) The binary coverage
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param initial_rows: (int) The number of covering constraints to start with
+    :param max_new_rows: (int) The maximum number of constraints to add per iteration (the hardest to cover
+        first), None to add every violated constraint
+    :param max_iterations: (int) The maximum number of solves, None for no limit
+    :param warm_start: (bool) Start each solve from the previous solution repaired to cover all demand
+        (for solvers supporting MIP starts such as CBC)
+    :param delineator: (string) The character(s) to use to delineate the layer from the ids
+    :param callback: (function) Called after each solve with (iteration, number of constraints, number violated)
+    :return: (dictionary) The status, ids keyed by facility type, objective, number of solves ('iterations'),
+        number of covering constraints ('rows') and the problem
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    covering.validate_coverage(coverage_dict, ["coverage"], ["binary"])
+    if solver is None:
+        solver = pulp.GLPK()
+    index = heuristics.index_coverage(coverage_dict)
+    demand_ids = index["demandIds"]
+    facilities = index["facilities"]
+    rows, columns, num_covering = _covering_matrix(index)
+    if np.any(num_covering == 0):
+        logging.getLogger().info("Some demand is not covered by any facility")
+        return {
+            "status": "Infeasible",
+            "ids": {},
+            "objective": None,
+            "iterations": 0,
+            "rows": 0,
+            "problem": None
+        }
+    # The demand covered by the fewest facilities is the most likely to be binding
+    order = np.argsort(num_covering, kind="stable")
+    in_model = np.zeros(len(demand_ids), dtype=bool)
+    in_model[order[:initial_rows]] = True
+    prob = covering.create_lscp_model(coverage_dict, delineator=delineator,
+                                      demand_ids=[demand_ids[i] for i in order[:initial_rows]])
+    variables = prob.variablesDict()
+    facility_vars = [variables["{}{}{}".format(facility_type, delineator, facility_id)]
+                     for facility_type, facility_id in facilities]
+    status = "Not Solved"
+    chosen = np.zeros(len(facilities), dtype=bool)
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        iteration += 1
+        with profiling.phase("row_generation.solve_lscp/solve"):
+            prob.solve(solver)
+        status = pulp.LpStatus[prob.status]
+        if status != "Optimal":
+            break
+        chosen = np.fromiter(((var.varValue or 0) > 0.5 for var in facility_vars), dtype=bool,
+                             count=len(facility_vars))
+        # Check every demand unit against the solution in one pass
+        covered = np.bincount(rows, weights=chosen[columns], minlength=len(demand_ids))
+        violated = np.flatnonzero((covered < 1) & ~in_model)
+        if callback is not None:
+            callback(iteration, int(in_model.sum()), len(violated))
+        logging.getLogger().info("Iteration {}: {} constraints, {} violated".format(iteration, int(in_model.sum()),
+                                                                                   len(violated)))
+        if len(violated) == 0:
+            break
+        if max_new_rows is not None and len(violated) > max_new_rows:
+            violated = violated[np.argsort(num_covering[violated], kind="stable")[:max_new_rows]]
+        for i in violated:
+            demand_id = demand_ids[i]
+            prob += pulp.lpSum(facility_vars[j] for j, a in index["demandFacilities"][i]) >= 1, "D{}".format(
+                demand_id)
+        in_model[violated] = True
+        status = "Not Solved"
+        if warm_start:
+            cover = lagrangian.repair_cover(index["facilityDemand"], index["demandFacilities"],
+                                            np.flatnonzero(chosen).tolist())
+            for var in facility_vars:
+                var.setInitialValue(0)
+            for j in cover:
+                facility_vars[j].setInitialValue(1)
+            solver = utilities.enable_warm_start(solver)
+    ids = {facility_type: [] for facility_type in coverage_dict["facilities"]}
+    if status == "Optimal":
+        for j in np.flatnonzero(chosen):
+            ids[facilities[j][0]].append(facilities[j][1])
+        for facility_type in ids:
+            ids[facility_type].sort()
+    return {
+        "status": status,
+        "ids": ids,
+        "objective": int(chosen.sum()) if status == "Optimal" else None,
+        "iterations": iteration,
+        "rows": int(in_model.sum()),
+        "problem": prob
+    }
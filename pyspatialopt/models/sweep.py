@@ -0,0 +1,220 @@
+# -*- coding: UTF-8 -*-
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+import pulp
+
+from pyspatialopt import profiling
+from pyspatialopt.models import covering, utilities
+
+# The named parameters (other than num_fac) of each model type
+MODEL_PARAMETERS = {
+    "mclp": [],
+    "mclp_cc": [],
+    "threshold": ["psi"],
+    "cc_threshold": ["psi"],
+    "backup": [],
+    "bclpcc": ["backup_weight"],
+    "lscp": [],
+    "traumah": ["num_ad", "num_tc"]
+}
+
+# Model types that take a num_fac dictionary
+NUM_FAC_MODELS = ["mclp", "mclp_cc", "backup", "bclpcc"]
+
+# State loaded once per worker process
+_worker_state = {}
+
+
+def create_model(coverage_dict, model_type, parameters, delineator="$", use_serviceable_demand=False,
+                 warm_start=None):
+    """
+    Creates a covering model of the given type
+
+    :param coverage_dict: (dictionary) The coverage to use to generate the model
+    :param model_type: (string) One of the keys of MODEL_PARAMETERS
+    :param parameters: (dictionary) The model parameters (num_fac, psi, backup_weight, num_ad, num_tc)
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility type
+    :return: (Pulp problem) The problem to solve
+    """
+    if model_type == "mclp":
+        return covering.create_mclp_model(coverage_dict, parameters["num_fac"], delineator=delineator,
+                                          use_serviceable_demand=use_serviceable_demand, warm_start=warm_start)
+    elif model_type == "mclp_cc":
+        return covering.create_mclp_cc_model(coverage_dict, parameters["num_fac"], delineator=delineator,
+                                             use_serviceable_demand=use_serviceable_demand, warm_start=warm_start)
+    elif model_type == "threshold":
+        return covering.create_threshold_model(coverage_dict, parameters["psi"], delineator=delineator,
+                                               use_serviceable_demand=use_serviceable_demand, warm_start=warm_start)
+    elif model_type == "cc_threshold":
+        return covering.create_cc_threshold_model(coverage_dict, parameters["psi"], delineator=delineator,
+                                                  use_serviceable_demand=use_serviceable_demand, warm_start=warm_start)
+    elif model_type == "backup":
+        return covering.create_backup_model(coverage_dict, parameters["num_fac"], delineator=delineator,
+                                            use_serviceable_demand=use_serviceable_demand, warm_start=warm_start)
+    elif model_type == "bclpcc":
+        return covering.create_bclpcc_model(coverage_dict, parameters["num_fac"], parameters["backup_weight"],
+                                            delineator=delineator, use_serviceable_demand=use_serviceable_demand,
+                                            warm_start=warm_start)
+    elif model_type == "lscp":
+        return covering.create_lscp_model(coverage_dict, delineator=delineator, warm_start=warm_start)
+    elif model_type == "traumah":
+        return covering.create_traumah_model(coverage_dict, parameters["num_ad"], parameters["num_tc"],
+                                             delineator=delineator, warm_start=warm_start)
+    raise ValueError("'{}' is not a valid model type".format(model_type))
+
+
+def expand_grid(model_type, parameter_grid):
+    """
+    Expands a parameter grid into the list of parameter combinations to solve.
+    Keys that are not named parameters of the model ('total' and facility types) are combined
+    into the num_fac dictionary
+
+    :param model_type: (string) One of the keys of MODEL_PARAMETERS
+    :param parameter_grid: (dictionary) A list of values keyed by parameter name
+    :return: (list) A list of parameter dictionaries
+    """
+    if model_type not in MODEL_PARAMETERS:
+        raise ValueError("'{}' is not a valid model type".format(model_type))
+    if not isinstance(parameter_grid, dict):
+        raise TypeError("parameter_grid is not a dictionary")
+    names = sorted(parameter_grid.keys())
+    for name in names:
+        if model_type not in NUM_FAC_MODELS and name not in MODEL_PARAMETERS[model_type]:
+            raise ValueError("'{}' is not a parameter of the {} model".format(name, model_type))
+    for name in MODEL_PARAMETERS[model_type]:
+        if name not in parameter_grid:
+            raise ValueError("'{}' was not specified for the {} model".format(name, model_type))
+    grid = []
+    for values in itertools.product(*[parameter_grid[name] for name in names]):
+        parameters = {}
+        num_fac = {}
+        for name, value in zip(names, values):
+            if name == "num_fac":
+                num_fac.update(value)
+            elif name in MODEL_PARAMETERS[model_type]:
+                parameters[name] = value
+            else:
+                num_fac[name] = value
+        if model_type in NUM_FAC_MODELS:
+            if "total" not in num_fac:
+                raise ValueError("The total number of facilities was not specified")
+            parameters["num_fac"] = num_fac
+        grid.append(parameters)
+    return grid
+
+
+def solve_parameters(coverage_dict, model_type, parameters, solver=None, delineator="$",
+                     use_serviceable_demand=False, warm_start=None):
+    """
+    Creates and solves a model for one set of parameters
+
+    :param coverage_dict: (dictionary) The coverage to use to generate the model
+    :param model_type: (string) One of the keys of MODEL_PARAMETERS
+    :param parameters: (dictionary) The model parameters
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility type
+        to pass to the solver as a MIP start
+    :return: (dictionary) The parameters, status, solution status (pulp.LpSolution), objective, chosen ids,
+        build time and solve time
+    """
+    if solver is None:
+        solver = pulp.GLPK()
+    if warm_start is not None:
+        solver = utilities.enable_warm_start(solver)
+    start = time.time()
+    prob = create_model(coverage_dict, model_type, parameters, delineator, use_serviceable_demand, warm_start)
+    build_time = time.time() - start
+    start = time.time()
+    with profiling.phase("sweep.solve_parameters/solve"):
+        prob.solve(solver)
+    solve_time = time.time() - start
+    ids = {}
+    if prob.status == pulp.LpStatusOptimal:
+        ids = utilities.SolutionView(prob, coverage_dict, delineator).selected()
+    return {
+        "parameters": parameters,
+        "status": pulp.LpStatus[prob.status],
+        "solutionStatus": prob.sol_status,
+        "objective": pulp.value(prob.objective) if prob.status == pulp.LpStatusOptimal else None,
+        "ids": ids,
+        "buildTime": build_time,
+        "solveTime": solve_time
+    }
+
+
+def _init_worker(coverage_file, model_type, solver, delineator, use_serviceable_demand, warm_start):
+    """
+    Loads the coverage once per worker process from the temporary coverage file
+    """
+    with open(coverage_file, "r") as f:
+        _worker_state["coverage"] = json.load(f)
+    _worker_state["model_type"] = model_type
+    _worker_state["solver"] = solver
+    _worker_state["delineator"] = delineator
+    _worker_state["use_serviceable_demand"] = use_serviceable_demand
+    _worker_state["warm_start"] = warm_start
+
+
+def _solve_worker(parameters):
+    """
+    Solves one grid point using the coverage loaded by _init_worker
+    """
+    return solve_parameters(_worker_state["coverage"], _worker_state["model_type"], parameters,
+                            _worker_state["solver"], _worker_state["delineator"],
+                            _worker_state["use_serviceable_demand"], _worker_state["warm_start"])
+
+
+def run_sweep(coverage_dict, model_type, parameter_grid, solver=None, processes=None, delineator="$",
+              use_serviceable_demand=False, warm_start=None):
+    """
+    Solves a model for every combination of parameters in a grid using a pool of processes.
+    The coverage is written once to a temporary file that each worker loads when it starts rather than
+    being pickled with every task, so only the parameters are sent with each task
+
+    Example grid for the MCLP: {"total": [1, 2, 3], "facility2_service_areas": [0, 1]}
+
+    :param coverage_dict: (dictionary) The coverage to use to generate the models
+    :param model_type: (string) One of the keys of MODEL_PARAMETERS
+    :param parameter_grid: (dictionary) A list of values keyed by parameter name. 'total' and
+        facility type keys are combined to form num_fac
+    :param solver: (Pulp solver) The solver to use, defaults to GLPK
+    :param processes: (int) The number of worker processes, defaults to the number of cpus. 1 solves in process
+    :param delineator: (string) The character/symbol used to delineate facility and id
+    :param use_serviceable_demand: (bool) Should we use the serviceable demand rather than demand
+    :param warm_start: (string or dictionary) 'greedy' or the ids of a prior solution keyed by facility type
+        to pass to the solver as a MIP start for every grid point
+    :return: (list) A table of results (one dictionary per grid point, in grid order)
+    """
+    if not isinstance(coverage_dict, dict):
+        raise TypeError("coverage_dict is not a dictionary")
+    grid = expand_grid(model_type, parameter_grid)
+    logging.getLogger().info("Solving {} {} models...".format(len(grid), model_type))
+    if processes == 1:
+        return [solve_parameters(coverage_dict, model_type, parameters, solver, delineator, use_serviceable_demand,
+                                 warm_start) for parameters in grid]
+    fd, coverage_file = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(coverage_dict, f)
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (coverage_file, model_type, solver, delineator, use_serviceable_demand,
+                                     warm_start))
+        try:
+            results = pool.map(_solve_worker, grid, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        os.remove(coverage_file)
+    logging.getLogger().info("Sweep successfully solved.")
+    return results
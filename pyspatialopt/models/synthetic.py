@@ -0,0 +1,164 @@
+# -*- coding: UTF-8 -*-
+import numpy as np
+
+from pyspatialopt import version
+
+
+def _points(rng, count):
+    return rng.random((count, 2))
+
+
+def _radius(density):
+    # A disc of this radius covers the given fraction of the unit square (ignoring the edges)
+    return float(np.sqrt(density / np.pi))
+
+
+def _within(demand_points, facility_points, radius, chunk_size=1024):
+    """
+    Yields (demand position, facility position, squared distance) for every pair closer than radius
+    """
+    radius_squared = radius * radius
+    for start in range(0, len(demand_points), chunk_size):
+        chunk = demand_points[start:start + chunk_size]
+        distances = ((chunk[:, None, :] - facility_points[None, :, :]) ** 2).sum(axis=2)
+        rows, columns = np.nonzero(distances < radius_squared)
+        for i, j in zip(rows.tolist(), columns.tolist()):
+            yield start + i, j, float(distances[i, j])
+
+
+def _demand(rng, num_demand, demand_range):
+    return np.round(rng.uniform(demand_range[0], demand_range[1], num_demand))
+
+
+def generate_coverage(num_demand, num_facilities, density=0.05, coverage_type="binary",
+                      facility_type="facility_service_areas", cover_all=False, demand_range=(100, 5000), seed=None):
+    """
+    Generates a random binary or partial coverage. Demand units and facilities are points in the unit square
+    and a facility covers the demand units within a radius chosen so each facility covers about the density
+    fraction of the demand. The coverage has the same structure as the arcpy/pyqgis coverages
+
+    :param num_demand: (int) The number of demand units
+    :param num_facilities: (int) The number of facilities
+    :param density: (float) The expected fraction of demand units covered by each facility (0-1)
+    :param coverage_type: (string) 'binary' or 'partial'. Partial coverage decreases with distance
+    :param facility_type: (string) The facility type name
+    :param cover_all: (bool) Cover every demand unit by at least its nearest facility, so the LSCP is feasible
+    :param demand_range: (tuple) The smallest and largest demand of a demand unit
+    :param seed: (int) The random seed, the same seed gives the same coverage
+    :return: (dictionary) The coverage
+    """
+    if not isinstance(num_demand, int) or not isinstance(num_facilities, int):
+        raise TypeError("num_demand and num_facilities must be integers")
+    if num_demand < 1 or num_facilities < 1:
+        raise ValueError("num_demand and num_facilities must be positive")
+    if not 0 < density <= 1:
+        raise ValueError("density must be between 0 and 1")
+    if coverage_type not in ["binary", "partial"]:
+        raise ValueError("'{}' is not a valid coverage type".format(coverage_type))
+    rng = np.random.default_rng(seed)
+    demand_points = _points(rng, num_demand)
+    facility_points = _points(rng, num_facilities)
+    demand = _demand(rng, num_demand, demand_range)
+    radius = _radius(density)
+    output = {
+        "version": version.__version__,
+        "type": {
+            "mode": "coverage",
+            "type": coverage_type
+        },
+        "demand": {},
+        "totalDemand": 0.0,
+        "totalServiceableDemand": 0.0,
+        "facilities": {facility_type: [str(j) for j in range(num_facilities)]}
+    }
+    coverages = [{} for _ in range(num_demand)]
+    for i, j, distance_squared in _within(demand_points, facility_points, radius):
+        if coverage_type == "binary":
+            coverages[i][str(j)] = 1
+        else:
+            coverages[i][str(j)] = max(1.0, float(np.floor(demand[i] * (1 - distance_squared / radius ** 2))))
+    if cover_all:
+        for i, covered in enumerate(coverages):
+            if not covered:
+                j = int(((facility_points - demand_points[i]) ** 2).sum(axis=1).argmin())
+                covered[str(j)] = 1 if coverage_type == "binary" else float(demand[i])
+    for i, covered in enumerate(coverages):
+        if coverage_type == "binary":
+            serviceable_demand = float(demand[i]) if covered else 0.0
+        else:
+            serviceable_demand = min(float(demand[i]), sum(covered.values()))
+        output["demand"][str(i)] = {
+            "area": 0.0,
+            "demand": float(demand[i]),
+            "serviceableDemand": serviceable_demand,
+            "coverage": {facility_type: covered}
+        }
+        output["totalDemand"] += float(demand[i])
+        output["totalServiceableDemand"] += serviceable_demand
+    return output
+
+
+def generate_traumah_coverage(num_demand, num_tc, num_ad, density=0.05, air_density=0.05, demand_range=(100, 5000),
+                              seed=None):
+    """
+    Generates a random TRAUMAH coverage. A trauma center covers the demand within the ground radius (density)
+    and an air depot/trauma center pair covers the demand within the air radius (air_density) of the air
+    depot when the trauma center is within the air radius of the air depot
+
+    :param num_demand: (int) The number of demand units
+    :param num_tc: (int) The number of trauma centers
+    :param num_ad: (int) The number of air depots
+    :param density: (float) The expected fraction of demand units covered by each trauma center by ground (0-1)
+    :param air_density: (float) The fraction of the area reachable by air from each air depot (0-1)
+    :param demand_range: (tuple) The smallest and largest demand of a demand unit
+    :param seed: (int) The random seed, the same seed gives the same coverage
+    :return: (dictionary) The coverage
+    """
+    if not isinstance(num_demand, int) or not isinstance(num_tc, int) or not isinstance(num_ad, int):
+        raise TypeError("num_demand, num_tc and num_ad must be integers")
+    if num_demand < 1 or num_tc < 1 or num_ad < 1:
+        raise ValueError("num_demand, num_tc and num_ad must be positive")
+    if not 0 < density <= 1 or not 0 < air_density <= 1:
+        raise ValueError("density and air_density must be between 0 and 1")
+    rng = np.random.default_rng(seed)
+    demand_points = _points(rng, num_demand)
+    tc_points = _points(rng, num_tc)
+    ad_points = _points(rng, num_ad)
+    demand = _demand(rng, num_demand, demand_range)
+    air_radius = _radius(air_density)
+    output = {
+        "version": version.__version__,
+        "type": {
+            "mode": "coverage",
+            "type": "traumah"
+        },
+        "demand": {},
+        "totalDemand": 0.0,
+        "totalServiceableDemand": 0.0,
+        "facilities": {
+            "AirDepot": [str(k) for k in range(num_ad)],
+            "TraumaCenter": [str(j) for j in range(num_tc)]
+        }
+    }
+    ground = [[] for _ in range(num_demand)]
+    for i, j, _ in _within(demand_points, tc_points, _radius(density)):
+        ground[i].append({"TraumaCenter": str(j)})
+    reachable = [[] for _ in range(num_ad)]
+    for k, j, _ in _within(ad_points, tc_points, air_radius):
+        reachable[k].append(str(j))
+    air = [[] for _ in range(num_demand)]
+    for i, k, _ in _within(demand_points, ad_points, air_radius):
+        for tc_id in reachable[k]:
+            air[i].append({"AirDepot": str(k), "TraumaCenter": tc_id})
+    for i in range(num_demand):
+        output["demand"][str(i)] = {
+            "area": 0.0,
+            "demand": float(demand[i]),
+            "serviceableDemand": 0.0,
+            "coverage": {
+                "ADTCPair": air[i],
+                "TraumaCenter": ground[i]
+            }
+        }
+        output["totalDemand"] += float(demand[i])
+    return output
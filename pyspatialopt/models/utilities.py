@@ -1,4 +1,5 @@
 # -*- coding: UTF-8 -*-
+import copy
 
 
 def get_ids(problem, variable_name, threshold=1.0, delineator="$"):
@@ -11,8 +12,146 @@ def get_ids(problem, variable_name, threshold=1.0, delineator="$"):
     :return: (array) A array of the ids (as strings) that meet or exceed the threshold
     """
     ids = []
+    prefix = variable_name + delineator
     for var in problem.variables():
-        if var.name.split(delineator)[0] == variable_name:
-            if var.varValue >= threshold:
-                ids.append(var.name.split("$")[1])
+        if var.name.startswith(prefix):
+            if var.varValue is not None and var.varValue >= threshold:
+                ids.append(var.name[len(prefix):])
     return ids
+
+
+class SolutionView(object):
+    """
+    An index of the variables of a solved problem by variable name (facility type or demand variable such as
+    Y, U or W) and id, built in one pass over the variables. The values are read when the view is created,
+    so create a new view after solving the problem again
+
+        solution = utilities.SolutionView(mclp, coverage)
+        ids = solution.selected()
+        covered = solution.demand()
+    """
+
+    def __init__(self, problem, coverage_dict=None, delineator="$"):
+        """
+        :param problem: (pulp problem) The solved problem to extract results from
+        :param coverage_dict: (dictionary) The coverage the problem was created from, used to know which
+            variable names are facility types. Defaults to none, selected() then needs the facility types
+        :param delineator: (string) The string used to split demand and facilities from ids
+        """
+        if not isinstance(delineator, str):
+            raise TypeError("delineator is not a string")
+        self.delineator = delineator
+        self.facility_types = None
+        if coverage_dict is not None:
+            self.facility_types = list(coverage_dict["facilities"].keys())
+        self.status = problem.status
+        self.objective = problem.objective.value() if problem.objective is not None else None
+        # The ids and values of each variable name, in the order of problem.variables() (as get_ids)
+        self._ids = {}
+        self._values = {}
+        for var in problem.variables():
+            name, found, variable_id = var.name.partition(delineator)
+            if not found:
+                continue
+            if name not in self._ids:
+                self._ids[name] = []
+                self._values[name] = []
+            self._ids[name].append(variable_id)
+            self._values[name].append(var.varValue if var.varValue is not None else 0.0)
+
+    def names(self):
+        """
+        :return: (list) The variable names (facility types and demand variables) of the problem
+        """
+        return list(self._ids.keys())
+
+    def ids(self, variable_name, threshold=1.0):
+        """
+        :param variable_name: (string) The variable name (facility type) to extract
+        :param threshold: (float) The minimum value to use when choosing ids
+        :return: (list) The ids (as strings) that meet or exceed the threshold, as get_ids
+        """
+        return [variable_id for variable_id, value in zip(self._ids.get(variable_name, []),
+                                                          self._values.get(variable_name, []))
+                if value >= threshold]
+
+    def values(self, variable_name, as_array=False):
+        """
+        :param variable_name: (string) The variable name (facility type or demand variable)
+        :param as_array: (bool) Return the ids and values as NumPy arrays
+        :return: (dictionary) The value of each id, or a tuple of the id and value arrays
+        """
+        ids = self._ids.get(variable_name, [])
+        values = self._values.get(variable_name, [])
+        if as_array:
+            import numpy as np
+            return np.array(ids, dtype=object), np.array(values, dtype=np.float64)
+        return dict(zip(ids, values))
+
+    def selected(self, facility_types=None, threshold=1.0, as_array=False):
+        """
+        The chosen ids of every facility type
+
+        :param facility_types: (list) The facility types, defaults to the facility types of the coverage
+        :param threshold: (float) The minimum value to use when choosing ids
+        :param as_array: (bool) Return NumPy arrays of the ids rather than lists
+        :return: (dictionary) The ids (as strings) that meet or exceed the threshold keyed by facility type
+        """
+        if facility_types is None:
+            facility_types = self.facility_types
+        if facility_types is None:
+            raise ValueError("facility_types must be given when the view has no coverage")
+        selected = {}
+        for facility_type in facility_types:
+            selected[facility_type] = self.ids(facility_type, threshold)
+            if as_array:
+                import numpy as np
+                selected[facility_type] = np.array(selected[facility_type], dtype=object)
+        return selected
+
+    def demand(self, variable_name="Y", threshold=1.0, as_array=False):
+        """
+        The coverage of each demand unit
+
+        :param variable_name: (string) The demand variable (Y for the MCLP, threshold, LSCP and TRAUMAH models,
+            U for the BCLP, Y or W for the BCLPCC)
+        :param threshold: (float) The minimum value for a demand unit to count as covered
+        :param as_array: (bool) Return NumPy arrays rather than lists
+        :return: (dictionary) The demand ids, the value of each demand variable and whether it is covered
+        """
+        ids = self._ids.get(variable_name, [])
+        values = self._values.get(variable_name, [])
+        if as_array:
+            import numpy as np
+            values = np.array(values, dtype=np.float64)
+            return {"ids": np.array(ids, dtype=object), "values": values, "covered": values >= threshold}
+        return {"ids": list(ids), "values": list(values), "covered": [value >= threshold for value in values]}
+
+
+def get_constraint(problem, name):
+    """
+    helper to look up a named constraint across pulp versions
+    :param problem: (pulp problem) The problem containing the constraint
+    :param name: (string) The name of the constraint
+    :return: (pulp constraint) The constraint or None if the problem has no constraint with that name
+    """
+    if hasattr(problem, "get_constraint_by_name"):
+        return problem.get_constraint_by_name(name)
+    return problem.constraints.get(name)
+
+
+def enable_warm_start(solver):
+    """
+    helper to make a solver use the initial values of the variables as a MIP start.
+    Solvers that pulp can't pass a MIP start to (GLPK) ignore the option. The solver is copied (keeping
+    its time limit and options) so later solves with the caller's solver don't use MIP starts. The option is set
+    both as the attribute read by pulp 2.2 and in the optionsDict read by later versions
+    :param solver: (pulp solver) The solver to copy
+    :return: (pulp solver) A copy of the solver with warm starts enabled
+    """
+    solver = copy.copy(solver)
+    solver.warmStart = True
+    if hasattr(solver, "optionsDict"):
+        solver.optionsDict = dict(solver.optionsDict)
+        solver.optionsDict["warmStart"] = True
+    return solver
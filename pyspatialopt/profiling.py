@@ -0,0 +1,232 @@
+# -*- coding: UTF-8 -*-
+import json
+import threading
+import time
+
+_profiler = None
+
+
+class Profiler(object):
+    """
+    Accumulates the wall time, CPU time, number of calls and counts of each phase and passes each recorded
+    phase to the callbacks. Phases are named '<module>.<function>/<phase>' and the totals of a function are
+    recorded under '<module>.<function>'
+
+        profiler = profiling.enable()
+        mclp = covering.create_mclp_model(coverage, {"total": 5})
+        profiling.disable()
+        print(profiler.to_json())
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.callbacks = []
+        self._lock = threading.Lock()
+
+    def _entry(self, name):
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = {"calls": 0, "wallTime": 0.0, "cpuTime": 0.0, "counts": {}}
+            self.phases[name] = entry
+        return entry
+
+    def record(self, name, wall_time, cpu_time):
+        """
+        Adds a call of a phase
+
+        :param name: (string) The phase name
+        :param wall_time: (float) The elapsed seconds
+        :param cpu_time: (float) The process CPU seconds
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["wallTime"] += wall_time
+            entry["cpuTime"] += cpu_time
+        for callback in self.callbacks:
+            callback(name, wall_time, cpu_time)
+
+    def count(self, name, key, value=1):
+        """
+        Adds to a count of a phase (features read, pair tests, constraints...)
+
+        :param name: (string) The phase name
+        :param key: (string) The name of the count
+        :param value: (int or float) The amount to add
+        """
+        with self._lock:
+            counts = self._entry(name)["counts"]
+            counts[key] = counts.get(key, 0) + value
+
+    def add_callback(self, callback):
+        """
+        :param callback: (function) Called with (name, wall time, cpu time) each time a phase is recorded
+        """
+        self.callbacks.append(callback)
+
+    def reset(self):
+        """
+        Removes the recorded phases
+        """
+        with self._lock:
+            self.phases = {}
+
+    def to_dict(self):
+        """
+        :return: (dictionary) The calls, wall time, CPU time and counts of each phase keyed by phase name
+        """
+        with self._lock:
+            return {"phases": dict((name, {"calls": entry["calls"],
+                                           "wallTime": entry["wallTime"],
+                                           "cpuTime": entry["cpuTime"],
+                                           "counts": dict(entry["counts"])})
+                                   for name, entry in self.phases.items())}
+
+    def to_json(self, path=None, indent=2):
+        """
+        :param path: (string) The file to write, None to only return the JSON
+        :param indent: (int) The JSON indent
+        :return: (string) The recorded phases as JSON
+        """
+        encoded = json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(encoded)
+        return encoded
+
+
+class _Null(object):
+    """
+    Stands in for a phase or phases when profiling is disabled
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def next(self, name):
+        pass
+
+    def count(self, key, value=1):
+        pass
+
+    def end(self):
+        pass
+
+
+_NULL = _Null()
+
+
+class _Phase(object):
+    """
+    Times the body of a with statement
+    """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, time.time() - self.wall, time.process_time() - self.cpu)
+        return False
+
+    def count(self, key, value=1):
+        self.profiler.count(self.name, key, value)
+
+
+class _Phases(object):
+    """
+    Times consecutive phases of a function, each phase ends when the next starts
+    """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start_wall = self.wall = time.time()
+        self.start_cpu = self.cpu = time.process_time()
+        self.current = None
+
+    def _stop(self, wall, cpu):
+        if self.current is not None:
+            self.profiler.record("{}/{}".format(self.name, self.current), wall - self.wall, cpu - self.cpu)
+        self.wall = wall
+        self.cpu = cpu
+
+    def next(self, name):
+        self._stop(time.time(), time.process_time())
+        self.current = name
+
+    def count(self, key, value=1):
+        self.profiler.count(self.name, key, value)
+
+    def end(self):
+        wall = time.time()
+        cpu = time.process_time()
+        self._stop(wall, cpu)
+        self.current = None
+        self.profiler.record(self.name, wall - self.start_wall, cpu - self.start_cpu)
+
+
+def enable(profiler=None):
+    """
+    Starts recording phases
+
+    :param profiler: (Profiler) The profiler to record to, defaults to a new profiler
+    :return: (Profiler) The profiler
+    """
+    global _profiler
+    if profiler is None:
+        profiler = Profiler()
+    _profiler = profiler
+    return profiler
+
+
+def disable():
+    """
+    Stops recording phases
+
+    :return: (Profiler) The profiler that was recording, None if profiling was disabled
+    """
+    global _profiler
+    profiler = _profiler
+    _profiler = None
+    return profiler
+
+
+def get_profiler():
+    """
+    :return: (Profiler) The profiler that is recording, None if profiling is disabled
+    """
+    return _profiler
+
+
+def phase(name):
+    """
+    Times a with statement: with profiling.phase("solve"): ...
+
+    :param name: (string) The phase name
+    :return: A context manager
+    """
+    if _profiler is None:
+        return _NULL
+    return _Phase(_profiler, name)
+
+
+def phases(name):
+    """
+    Times the consecutive phases of a function. Call next(phase) as each phase starts, count(key, value)
+    to add counts and end() when the function is done
+
+    :param name: (string) The function name
+    :return: The phases
+    """
+    if _profiler is None:
+        return _NULL
+    return _Phases(_profiler, name)
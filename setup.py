@@ -9,7 +9,7 @@ setup(name='PySpatialOpt',
     packages=['pyspatialopt', 'pyspatialopt.models',
               'pyspatialopt/analysis'],
     license='MIT',
-    install_requires=['pulp>=1.6.1'],
+    install_requires=['pulp>=2.2', 'numpy>=1.17.0'],
     classifiers=[
       'Intended Audience :: Developers/Researchers',
       'Programming Language :: Python :: 2.7'
@@ -0,0 +1,39 @@
+# -*- coding: UTF-8 -*-
+import subprocess
+import sys
+import unittest
+
+from pyspatialopt import analysis
+from pyspatialopt.analysis import shapefile
+
+
+class AnalysisTest(unittest.TestCase):
+    def tearDown(self):
+        analysis._backends.pop("test", None)
+        analysis._loaded.pop("test", None)
+        analysis._aliases.pop("test_alias", None)
+
+    def test_import_is_lazy(self):
+        modules = subprocess.check_output([sys.executable, "-c",
+                                           "import sys, pyspatialopt.analysis, pyspatialopt.models.covering; "
+                                           "print(' '.join(sys.modules))"]).decode().split()
+        for module in ["arcpy", "qgis", "pyspatialopt.analysis.arcpy_analysis",
+                       "pyspatialopt.analysis.pyqgis_analysis"]:
+            self.assertNotIn(module, modules)
+
+    def test_get_backend(self):
+        analysis.register_backend("test", "pyspatialopt.analysis.shapefile", aliases=["test_alias"])
+        self.assertNotIn("test", analysis._loaded)
+        self.assertIs(shapefile, analysis.get_backend("test"))
+        self.assertIs(shapefile, analysis.get_backend("test_alias"))
+        self.assertIn("test", analysis.available_backends())
+        self.assertRaises(ValueError, analysis.get_backend, "unknown")
+
+    def test_missing_backend(self):
+        analysis.register_backend("test", "pyspatialopt.analysis.missing", requires="pyspatialopt_missing")
+        self.assertNotIn("test", analysis.available_backends())
+        self.assertRaises(ImportError, analysis.get_backend, "test")
+
+
+if __name__ == '__main__':
+    unittest.main()
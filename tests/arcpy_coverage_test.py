@@ -93,6 +93,30 @@ class ArcpyCoverageTest(unittest.TestCase):
         self.assertEqual(self.serviceable_demand_point, serviceable_demand_point)
         self.assertEqual(self.serviceable_demand_polygon, serviceable_demand_polygon)
 
+    def test_serviceable_demand_cache(self):
+        for demand_fl, expected in [(self.demand_polygon_fl, self.serviceable_demand_polygon),
+                                    (self.demand_point_fl, self.serviceable_demand_point)]:
+            serviceable_demand_cache = arcpy_analysis.ServiceableDemandCache(demand_fl, "Population", "GEOID10")
+            # One layer and a combination of two layers match generate_serviceable_demand
+            for layers in [[self.facility_service_areas_fl],
+                           [self.facility2_service_areas_fl, self.facility_service_areas_fl]]:
+                serviceable_demand = arcpy_analysis.generate_serviceable_demand(demand_fl, "Population", "GEOID10",
+                                                                                *layers)
+                self.assertEqual(serviceable_demand, serviceable_demand_cache.generate(*layers))
+            # Each layer was only clipped once
+            self.assertEqual(2, serviceable_demand_cache.misses)
+            self.assertEqual(1, serviceable_demand_cache.hits)
+            serviceable_demand_cache.invalidate(self.facility_service_areas_fl)
+            serviceable_demand = serviceable_demand_cache.generate(self.facility2_service_areas_fl,
+                                                                   self.facility_service_areas_fl)
+            self.assertEqual(expected, serviceable_demand)
+            self.assertEqual(3, serviceable_demand_cache.misses)
+            self.assertEqual(2, serviceable_demand_cache.hits)
+            serviceable_demand_cache.invalidate()
+            self.assertEqual(serviceable_demand, serviceable_demand_cache.generate(self.facility2_service_areas_fl,
+                                                                                   self.facility_service_areas_fl))
+            self.assertEqual(5, serviceable_demand_cache.misses)
+
 
     def test_traumah_coverage(self):
         traumah_coverage = arcpy_analysis.generate_traumah_coverage(self.demand_point_fl, self.demand_polygon_fl,
@@ -0,0 +1,65 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import async_solver, covering, synthetic, utilities
+
+
+class AsyncSolverTest(unittest.TestCase):
+    def setUp(self):
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/partial_coverage1.json", "r") as f:
+            self.partial_coverage = json.load(f)
+
+    def test_solve(self):
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5})
+        result = asyncio.run(async_solver.solve(mclp, pulp.GLPK()))
+        self.assertEqual("Optimal", result["status"])
+        self.assertFalse(result["timedOut"])
+        self.assertEqual(['1', '4', '5', '6', '7'], utilities.get_ids(mclp, "facility_service_areas"))
+        self.assertAlmostEqual(pulp.value(mclp.objective), result["objective"])
+
+    def test_solve_many(self):
+        problems = [covering.create_mclp_model(self.binary_coverage_polygon, {"total": p}) for p in range(1, 6)]
+        problems.append(covering.create_mclp_cc_model(self.partial_coverage, {"total": 5}))
+        results = asyncio.run(async_solver.solve_many(problems, pulp.GLPK(), max_concurrent=2))
+        self.assertEqual(6, len(results))
+        self.assertEqual(['4'], utilities.get_ids(problems[0], "facility_service_areas"))
+        self.assertEqual(['1', '4', '5', '6', '7'], utilities.get_ids(problems[5], "facility_service_areas"))
+        objectives = [result["objective"] for result in results[:5]]
+        self.assertEqual(sorted(objectives), objectives)
+
+    def test_timeout(self):
+        coverage = synthetic.generate_coverage(4000, 400, 0.03, "partial", seed=0)
+        mclpcc = covering.create_mclp_cc_model(coverage, {"total": 40})
+        result = asyncio.run(async_solver.solve(mclpcc, pulp.GLPK(), timeout=0.5))
+        self.assertTrue(result["timedOut"])
+        self.assertEqual("Not Solved", result["status"])
+        self.assertIsNone(result["objective"])
+
+    def test_solver_command(self):
+        solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=5, presolve=False, cuts=True, gapRel=0.01)
+        args = async_solver.solver_command(solver, "model.mps", {"sol": "model.sol"}, maximize=True)
+        self.assertEqual(["model.mps", "-max", "-sec", "5", "-presolve", "off", "-gomory", "on", "knapsack", "on",
+                          "probing", "on", "-ratio", "0.01"], args[1:15])
+        self.assertEqual(["-solve", "-printingOptions", "all", "-solution", "model.sol"], args[-5:])
+        args = async_solver.solver_command(pulp.PULP_CBC_CMD(cuts=False), "model.mps", {"sol": "model.sol"})
+        self.assertEqual("off", args[args.index("-cuts") + 1])
+
+    def test_warm_start_enabled(self):
+        solver = pulp.PULP_CBC_CMD(msg=0)
+        self.assertFalse(async_solver.warm_start_enabled(solver))
+        solver.warmStart = True
+        self.assertTrue(async_solver.warm_start_enabled(solver))
+        self.assertTrue(async_solver.warm_start_enabled(pulp.PULP_CBC_CMD(msg=0, warmStart=True)))
+
+    def test_invalid_solver(self):
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5})
+        self.assertRaises(TypeError, asyncio.run, async_solver.solve(mclp, object()))
+
+
+if __name__ == '__main__':
+    unittest.main()
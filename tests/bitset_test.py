@@ -0,0 +1,59 @@
+# -*- coding: UTF-8 -*-
+import json
+import unittest
+
+from pyspatialopt.models import bitset, covering, heuristics
+
+
+class BitsetTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+
+    def test_greedy(self):
+        coverage = bitset.BitsetCoverage(self.binary_coverage_polygon)
+        chosen = coverage.greedy({"total": 5})
+        self.assertEqual(['1', '4', '5', '6', '7'], sorted(coverage.facilities[j][1] for j in chosen))
+        self.assertEqual(320453, coverage.covered_demand(chosen))
+        mask = coverage.covered(chosen)
+        gains = coverage.marginal_gains(mask)
+        for j in range(len(coverage.facilities)):
+            self.assertEqual(coverage.marginal_gain(j, mask), gains[j])
+        self.assertRaises(ValueError, bitset.BitsetCoverage, self.partial_coverage2)
+        # Weighting a word and a demand set at a time gives the same demand
+        blocked = bitset.BitsetCoverage(self.binary_coverage_polygon, block_words=1, block_bytes=1)
+        self.assertEqual(1, blocked.block_rows)
+        self.assertEqual(chosen, blocked.greedy({"total": 5}))
+        self.assertEqual(gains.tolist(), blocked.marginal_gains(mask).tolist())
+        self.assertEqual(coverage.weight_many(coverage.bits).tolist(), blocked.weight_many(blocked.bits).tolist())
+
+    def test_celf(self):
+        coverage = bitset.BitsetCoverage(self.binary_coverage_polygon)
+        for num_fac in [{"total": 3}, {"total": 5}]:
+            expected = heuristics.celf_mclp(self.binary_coverage_polygon, num_fac)
+            self.assertEqual(expected, heuristics.celf_mclp(self.binary_coverage_polygon, num_fac,
+                                                            bitset_coverage=coverage))
+
+    def test_k_coverage(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        coverage = bitset.BitsetCoverage(merged_dict)
+        ids = {facility_type: sorted(merged_dict["facilities"][facility_type])[:5] * 2
+               for facility_type in merged_dict["facilities"]}
+        counts = coverage.k_coverage_counts(coverage.positions(ids), 3)
+        sums = heuristics.coverage_sums(merged_dict, heuristics.counts_from_ids(ids))
+        for k in range(1, 4):
+            self.assertEqual(sum(1 for d in sums if sums[d] >= k), counts["count"][k - 1])
+            self.assertEqual(sum(merged_dict["demand"][d]["demand"] for d in sums if sums[d] >= k),
+                             counts["demand"][k - 1])
+        self.assertEqual(coverage.count(coverage.covered(coverage.positions(ids))), counts["count"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: UTF-8 -*-
+import json
+import os
+import pulp
+import shutil
+import tempfile
+import unittest
+
+from pyspatialopt.models import cache, covering, utilities
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_memory(self):
+        model_cache = cache.ModelCache()
+        mclp = model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}})
+        cached = model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}})
+        self.assertEqual(1, model_cache.hits)
+        # A hit returns the compiled model without building it again
+        self.assertIs(mclp, cached)
+        result = cached.solve(pulp.GLPK())
+        self.assertEqual("Optimal", result["status"])
+        self.assertEqual(['1', '4', '5', '6', '7'], sorted(result["ids"]["facility_service_areas"]))
+        prob = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5})
+        prob.solve(pulp.GLPK())
+        self.assertAlmostEqual(pulp.value(prob.objective), result["objective"])
+        # Solving doesn't change the compiled model
+        self.assertEqual(result, dict(cached.solve(pulp.GLPK()), solveTime=result["solveTime"]))
+        model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 4}})
+        self.assertEqual(2, model_cache.misses)
+        self.assertEqual(cache.coverage_hash(self.binary_coverage_polygon),
+                         cache.coverage_hash(json.loads(json.dumps(self.binary_coverage_polygon))))
+        # Changing the coverage in place is a different model
+        model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}},
+                                  use_serviceable_demand=True)
+        covering.update_serviceable_demand(self.binary_coverage_polygon, {
+            "demand": {demand_id: {"serviceableDemand": 0.0} for demand_id in self.binary_coverage_polygon["demand"]},
+            "type": {"mode": "serviceableDemand"}})
+        changed = model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}},
+                                            use_serviceable_demand=True)
+        self.assertEqual(4, model_cache.misses)
+        self.assertEqual(0, changed.solve(pulp.GLPK())["objective"])
+
+    def test_eviction(self):
+        model_cache = cache.ModelCache(max_bytes=1)
+        model_cache.compile_model(self.partial_coverage2, "mclp_cc", {"num_fac": {"total": 5}})
+        self.assertEqual(0, len(model_cache))
+        size = model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}}).size
+        model_cache = cache.ModelCache(max_bytes=size + 1)
+        model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}})
+        model_cache.compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 4}})
+        self.assertEqual(1, len(model_cache))
+
+    def test_disk(self):
+        cache.ModelCache(directory=self.directory).compile_model(self.partial_coverage2, "cc_threshold", {"psi": 80})
+        model_cache = cache.ModelCache(directory=self.directory)
+        cc_threshold = model_cache.compile_model(self.partial_coverage2, "cc_threshold", {"psi": 80})
+        self.assertEqual(1, model_cache.disk_hits)
+        self.assertEqual(0, model_cache.misses)
+        self.assertEqual("Optimal", cc_threshold.solve(pulp.GLPK())["status"])
+        model_cache.clear(disk=True)
+        model_cache.compile_model(self.partial_coverage2, "cc_threshold", {"psi": 80})
+        self.assertEqual(1, model_cache.misses)
+
+    def test_warm_start(self):
+        compiled = cache.ModelCache().compile_model(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}},
+                                                    warm_start="greedy")
+        self.assertTrue(compiled.initial_values)
+        solver = utilities.enable_warm_start(pulp.GLPK())
+        self.assertEqual(5, len(compiled.solve(solver)["ids"]["facility_service_areas"]))
+
+    def test_results(self):
+        path = os.path.join(self.directory, "results.db")
+        result_cache = cache.ResultCache(path)
+        result = result_cache.solve(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}}, pulp.GLPK())
+        self.assertFalse(result["cached"])
+        result_cache.close()
+        # A new store on the same database returns the stored result
+        result_cache = cache.ResultCache(path)
+        cached = result_cache.solve(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}}, pulp.GLPK())
+        self.assertTrue(cached["cached"])
+        self.assertEqual(1, result_cache.hits)
+        self.assertEqual(['1', '4', '5', '6', '7'], cached["ids"]["facility_service_areas"])
+        self.assertEqual(result["objective"], cached["objective"])
+        # Other parameters and solver options are different models
+        self.assertNotEqual(result_cache.key(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}},
+                                             pulp.GLPK()),
+                            result_cache.key(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}},
+                                             pulp.GLPK(timeLimit=10)))
+        result_cache.solve(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 4}}, pulp.GLPK())
+        self.assertEqual(2, len(result_cache))
+        self.assertEqual(2, result_cache.invalidate(cache.solver_version(pulp.GLPK())))
+        self.assertEqual(0, len(result_cache))
+
+    def test_is_final(self):
+        solver = pulp.GLPK()
+        result = cache.ResultCache(os.path.join(self.directory, "results.db")).solve(
+            self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}}, solver)
+        self.assertEqual(pulp.LpSolutionOptimal, result["solutionStatus"])
+        self.assertTrue(cache.is_final(result, solver))
+        # A solution found before the time limit is reported as Optimal by pulp
+        self.assertFalse(cache.is_final({"status": "Optimal", "solutionStatus": pulp.LpSolutionIntegerFeasible},
+                                        solver))
+        self.assertFalse(cache.is_final({"status": "Optimal", "solutionStatus": pulp.LpSolutionOptimal},
+                                        pulp.GLPK_CMD(timeLimit=10)))
+        self.assertTrue(cache.is_final({"status": "Infeasible", "solutionStatus": pulp.LpSolutionInfeasible},
+                                       solver))
+
+    def test_result_versions(self):
+        result_cache = cache.ResultCache(os.path.join(self.directory, "results.db"), max_entries=2)
+        for i in range(3):
+            result_cache.put(str(i), "1.0", {"status": "Optimal", "objective": i})
+        self.assertEqual(2, len(result_cache))
+        self.assertIsNone(result_cache.get("0", "1.0"))
+        self.assertEqual(2, result_cache.get("2", "1.0")["objective"])
+        self.assertIsNone(result_cache.get("2", "2.0"))
+        result_cache.put("3", "2.0", {"status": "Optimal", "objective": 3})
+        self.assertEqual(1, result_cache.invalidate(keep_version="2.0"))
+        self.assertEqual(3, result_cache.get("3", "2.0")["objective"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# -*- coding: UTF-8 -*-
+import copy
+import json
+import unittest
+
+from pyspatialopt.models import covering
+
+
+class CoveringTest(unittest.TestCase):
+    def setUp(self):
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage1.json", "r") as f:
+            self.partial_coverage = json.load(f)
+
+    def test_merge(self):
+        originals = copy.deepcopy([self.binary_coverage_point, self.binary_coverage_point2])
+        merged = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        # The inputs are unchanged
+        self.assertEqual(originals, [self.binary_coverage_point, self.binary_coverage_point2])
+        self.assertEqual(["facility_service_areas", "facility2_service_areas"], list(merged["facilities"].keys()))
+        total_serviceable_demand = 0.0
+        for demand_id, record in merged["demand"].items():
+            for coverage in originals:
+                for facility_type, covered in coverage["demand"][demand_id]["coverage"].items():
+                    self.assertEqual(covered, record["coverage"][facility_type])
+            covered = any(value == 1 for covered in record["coverage"].values() for value in covered.values())
+            self.assertEqual(record["demand"] if covered else 0.0, record["serviceableDemand"])
+            total_serviceable_demand += record["serviceableDemand"]
+        self.assertEqual(total_serviceable_demand, merged["totalServiceableDemand"])
+        self.assertTrue(merged["totalServiceableDemand"] > self.binary_coverage_point["totalServiceableDemand"])
+
+    def test_merge_in_place(self):
+        merged = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2], in_place=True)
+        self.assertIs(self.binary_coverage_point, merged)
+        self.assertIn("facility2_service_areas", self.binary_coverage_point["facilities"])
+        self.assertEqual(merged, covering.merge_coverages([merged]))
+
+    def test_merge_invalid(self):
+        self.assertRaises(ValueError, covering.merge_coverages,
+                          [self.binary_coverage_point, self.binary_coverage_point])
+        self.assertRaises(ValueError, covering.merge_coverages,
+                          [self.binary_coverage_point, self.partial_coverage])
+        del self.binary_coverage_point2["demand"][list(self.binary_coverage_point2["demand"].keys())[0]]
+        self.assertRaises(ValueError, covering.merge_coverages,
+                          [self.binary_coverage_point, self.binary_coverage_point2])
+        self.assertRaises(ValueError, covering.merge_coverages, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
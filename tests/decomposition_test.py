@@ -0,0 +1,61 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, decomposition
+
+
+class DecompositionTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+
+    def test_connected_components(self):
+        components = decomposition.connected_components(self.binary_coverage_polygon)
+        self.assertEqual([19, 15, 14, 12, 9], [len(component["demand"]) for component in components])
+        for component in components:
+            self.assertEqual(1, len(component["facilities"]["facility_service_areas"]))
+            self.assertEqual(sum(demand["demand"] for demand in component["demand"].values()),
+                             component["totalDemand"])
+        self.assertEqual(1, len(decomposition.connected_components(self.partial_coverage2)))
+
+    def test_lscp(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        result = decomposition.solve_lscp(merged_dict, pulp.GLPK(), processes=2)
+        self.assertEqual("Optimal", result["status"])
+        self.assertEqual(24, result["objective"])
+        self.assertEqual(4, result["components"])
+        self.assertEqual("Infeasible", decomposition.solve_lscp(self.binary_coverage_point2, pulp.GLPK())["status"])
+
+    def test_mclp(self):
+        result = decomposition.solve_mclp(self.binary_coverage_polygon, {"total": 2}, pulp.GLPK(), processes=1)
+        self.assertEqual(151206, result["objective"])
+        self.assertEqual(2, sum(result["allocation"]))
+        result = decomposition.solve_mclp(self.binary_coverage_polygon, {"total": 8}, pulp.GLPK(), processes=2)
+        self.assertEqual(['1', '4', '5', '6', '7'], result["ids"]["facility_service_areas"])
+        self.assertEqual(320453, result["objective"])
+        self.assertRaises(ValueError, decomposition.solve_mclp, self.binary_coverage_polygon,
+                          {"total": 2, "facility_service_areas": 1})
+
+    def test_threshold(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        result = decomposition.solve_threshold(merged_dict, 80, pulp.GLPK(), processes=1)
+        self.assertEqual(9, result["objective"])
+        self.assertGreaterEqual(result["coverage"], 80)
+        self.assertEqual(9, sum(len(ids) for ids in result["ids"].values()))
+        result = decomposition.solve_threshold(self.partial_coverage2, 80, pulp.GLPK(), processes=1)
+        self.assertEqual(14, result["objective"])
+        self.assertEqual("Infeasible",
+                         decomposition.solve_threshold(self.binary_coverage_polygon, 50, pulp.GLPK())["status"])
+
+
+if __name__ == '__main__':
+    unittest.main()
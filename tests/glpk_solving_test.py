@@ -99,6 +99,14 @@ class GLPKSolverTest(unittest.TestCase):
         self.assertEqual(['10', '12', '15', '16', '18', '19', '21', '22', '7', '9'], tc_ids)
         self.assertEqual(traumah_i.status, pulp.constants.LpStatusInfeasible)
 
+    def test_traumah_pairs(self):
+        traumah = covering.create_traumah_model(self.traumah_coverage, 5, 10)
+        pairs = set()
+        for demand in self.traumah_coverage["demand"].values():
+            for pair in demand["coverage"]["ADTCPair"]:
+                pairs.add("Z${}${}".format(pair["AirDepot"], pair["TraumaCenter"]))
+        self.assertEqual(pairs, set(var.name for var in traumah.variables() if var.name.startswith("Z$")))
+
     def test_bclpcc(self):
         merged_dict = covering.merge_coverages([self.partial_coverage, self.partial_coverage2])
         merged_dict = covering.update_serviceable_demand(merged_dict, self.serviceable_demand_polygon)
@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, heuristics
+
+
+class HeuristicsTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+        with open("valid_coverages/serviceable_demand_point.json", "r") as f:
+            self.serviceable_demand_point = json.load(f)
+        with open("valid_coverages/traumah_coverage.json", "r") as f:
+            self.traumah_coverage = json.load(f)
+
+    def assertFeasibleStart(self, prob):
+        for var in prob.variables():
+            self.assertIsNotNone(var.varValue, var.name)
+        for name, constraint in prob.constraints.items():
+            self.assertTrue(constraint.valid(1e-6), name)
+
+    def test_greedy_mclp(self):
+        counts = heuristics.greedy_solution(self.binary_coverage_polygon, "mclp", {"num_fac": {"total": 5}})
+        self.assertEqual(5, sum(counts["facility_service_areas"].values()))
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}, warm_start="greedy")
+        self.assertFeasibleStart(mclp)
+
+    def test_greedy_threshold(self):
+        threshold = covering.create_threshold_model(self.binary_coverage_point2, 30, warm_start="greedy")
+        self.assertFeasibleStart(threshold)
+        ccthreshold = covering.create_cc_threshold_model(self.partial_coverage2, 80, warm_start="greedy")
+        self.assertFeasibleStart(ccthreshold)
+        self.assertIsNone(heuristics.greedy_solution(self.binary_coverage_point2, "threshold", {"psi": 100}))
+
+    def test_greedy_backup_lscp(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        merged_dict = covering.update_serviceable_demand(merged_dict, self.serviceable_demand_point)
+        self.assertFeasibleStart(covering.create_backup_model(merged_dict, {"total": 30}, warm_start="greedy"))
+        self.assertFeasibleStart(covering.create_lscp_model(merged_dict, warm_start="greedy"))
+        self.assertIsNone(heuristics.greedy_solution(self.binary_coverage_point2, "lscp", {}))
+
+    def test_greedy_traumah(self):
+        traumah = covering.create_traumah_model(self.traumah_coverage, 5, 10, warm_start="greedy")
+        self.assertFeasibleStart(traumah)
+
+    def test_celf_mclp(self):
+        result = heuristics.celf_mclp(self.binary_coverage_polygon, {"total": 5})
+        self.assertEqual(['1', '4', '5', '6', '7'], result["ids"]["facility_service_areas"])
+        self.assertEqual(320453, result["objective"])
+        self.assertAlmostEqual(1 - 1 / 2.718281828459045, result["approximation"])
+        self.assertGreaterEqual(result["bound"], result["objective"])
+        result = heuristics.celf_mclp(self.binary_coverage_polygon, {"total": 5, "facility_service_areas": 2})
+        self.assertEqual(['4', '6'], result["ids"]["facility_service_areas"])
+        self.assertEqual(0.5, result["approximation"])
+        self.assertRaises(ValueError, heuristics.celf_mclp, self.partial_coverage2, {"total": 5})
+
+    def test_interchange(self):
+        result = heuristics.interchange(self.binary_coverage_polygon,
+                                        {"facility_service_areas": ['0', '1', '2', '3', '5']}, {"total": 5})
+        self.assertEqual(['1', '4', '5', '6', '7'], result["ids"]["facility_service_areas"])
+        self.assertEqual(320453, result["objective"])
+        self.assertGreater(result["swaps"], 0)
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        merged_dict = covering.update_serviceable_demand(merged_dict, self.serviceable_demand_point)
+        counts = heuristics.greedy_solution(merged_dict, "backup", {"num_fac": {"total": 30}})
+        ids = {}
+        for facility_type in counts:
+            ids[facility_type] = [facility_id for facility_id, count in counts[facility_type].items()
+                                  for _ in range(count)]
+        result = heuristics.interchange(merged_dict, ids, {"total": 30}, "backup")
+        sums = heuristics.coverage_sums(merged_dict, heuristics.counts_from_ids(result["ids"]))
+        self.assertTrue(all(s >= 1 for s in sums.values()))
+        self.assertEqual(sum(merged_dict["demand"][d]["demand"] for d in sums if sums[d] >= 2), result["objective"])
+
+    def test_prior_solution(self):
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5},
+                                          warm_start={"facility_service_areas": ['1', '4', '5', '6', '7']})
+        self.assertFeasibleStart(mclp)
+        self.assertEqual(320453, pulp.value(mclp.objective))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: UTF-8 -*-
+import json
+import unittest
+
+from pyspatialopt.models import covering, lagrangian
+
+
+class LagrangianTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+
+    def test_mclp(self):
+        iterations = []
+        result = lagrangian.solve_mclp(self.binary_coverage_polygon, {"total": 3},
+                                       callback=lambda i, bound, objective: iterations.append((bound, objective)))
+        self.assertEqual(['4', '6', '7'], result["ids"]["facility_service_areas"])
+        self.assertEqual(216535, result["objective"])
+        self.assertGreaterEqual(result["bound"], result["objective"])
+        self.assertEqual("Optimal", result["status"])
+        self.assertEqual(result["iterations"], len(iterations))
+        for bound, objective in iterations:
+            self.assertGreaterEqual(bound, 216535 - 1e-6)
+            self.assertLessEqual(objective, 216535)
+        # Stopping within a loose gap doesn't prove the solution is optimal
+        result = lagrangian.solve_mclp(self.binary_coverage_polygon, {"total": 3}, gap=0.5)
+        self.assertGreater(result["bound"], result["objective"])
+        self.assertEqual("Feasible", result["status"])
+
+    def test_lscp(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        result = lagrangian.solve_lscp(merged_dict)
+        self.assertEqual(24, result["objective"])
+        self.assertEqual(24, result["bound"])
+        self.assertEqual(24, sum(len(ids) for ids in result["ids"].values()))
+        self.assertEqual("Infeasible", lagrangian.solve_lscp(self.binary_coverage_point2)["status"])
+
+
+if __name__ == '__main__':
+    unittest.main()
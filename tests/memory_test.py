@@ -0,0 +1,45 @@
+# -*- coding: UTF-8 -*-
+import json
+import sys
+import unittest
+
+from pyspatialopt import memory
+from pyspatialopt.models import covering
+
+
+class MemoryTest(unittest.TestCase):
+    def setUp(self):
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+
+    def test_coverage_breakdown(self):
+        breakdown = memory.coverage_breakdown(self.binary_coverage_point)
+        entries = sum(len(demand["coverage"]["facility_service_areas"])
+                      for demand in self.binary_coverage_point["demand"].values())
+        self.assertEqual(entries, breakdown["entries"])
+        self.assertTrue(breakdown["demandRecords"] > 0)
+        self.assertTrue(breakdown["coverageEntries"] > 0)
+        self.assertTrue(breakdown["total"] >= breakdown["demandRecords"] + breakdown["coverageEntries"] +
+                        breakdown["facilities"])
+
+    def test_measure_model(self):
+        mclp, report = memory.measure(covering.create_mclp_model, self.binary_coverage_point, {"total": 5})
+        self.assertTrue(report["peak"] >= report["retained"] > 0)
+        model = report["model"]
+        self.assertEqual(sum(len(c) for c in mclp.constraints.values()), model["nonzeros"])
+        self.assertEqual(model["total"],
+                         model["variables"] + model["constraints"] + model["expressions"] + sys.getsizeof(mclp))
+        self.assertTrue(model["bytesPerNonzero"] > 0)
+        self.assertTrue(report["peakBytesPerNonzero"] > 0)
+
+    def test_measure_merge(self):
+        merged, report = memory.measure(covering.merge_coverages,
+                                        [self.binary_coverage_point, self.binary_coverage_point2])
+        self.assertIn("coverage", report)
+        self.assertTrue(report["retained"] > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: UTF-8 -*-
+import json
+import unittest
+
+from pyspatialopt.models import covering, heuristics, metaheuristics
+
+
+class MetaheuristicsTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+        with open("valid_coverages/serviceable_demand_point.json", "r") as f:
+            self.serviceable_demand_point = json.load(f)
+
+    def test_backup(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        merged_dict = covering.update_serviceable_demand(merged_dict, self.serviceable_demand_point)
+        result = metaheuristics.anneal(merged_dict, "backup", {"total": 30}, time_limit=None, max_iterations=20000,
+                                       seed=1)
+        self.assertTrue(result["feasible"])
+        self.assertEqual(867716, result["objective"])
+        self.assertEqual(20000, result["iterations"])
+        self.assertLessEqual(sum(len(ids) for ids in result["ids"].values()), 30)
+        sums = heuristics.coverage_sums(merged_dict, heuristics.counts_from_ids(result["ids"]))
+        self.assertEqual(sum(merged_dict["demand"][d]["demand"] for d in sums if sums[d] >= 2), result["objective"])
+        # The same seed gives the same solution
+        self.assertEqual(result, metaheuristics.anneal(merged_dict, "backup", {"total": 30}, time_limit=None,
+                                                       max_iterations=20000, seed=1))
+
+    def test_bclpcc(self):
+        greedy = metaheuristics.anneal(self.partial_coverage2, "bclpcc", {"total": 5}, backup_weight=0.5,
+                                       time_limit=None, max_iterations=0)
+        result = metaheuristics.anneal(self.partial_coverage2, "bclpcc", {"total": 5}, backup_weight=0.5,
+                                       time_limit=1, seed=2)
+        self.assertGreaterEqual(result["objective"], greedy["objective"])
+        self.assertLessEqual(sum(len(ids) for ids in result["ids"].values()), 5)
+        self.assertRaises(ValueError, metaheuristics.anneal, self.partial_coverage2, "bclpcc", {"total": 5},
+                          backup_weight=1.5)
+        self.assertRaises(ValueError, metaheuristics.anneal, self.binary_coverage_point, "bclpcc", {"total": 5},
+                          backup_weight=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, handle
+
+
+class ModelHandleTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+
+    def test_mclp_num_facilities(self):
+        mclp = handle.ModelHandle(covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}),
+                                  self.binary_coverage_polygon)
+        for p in [1, 3, 5]:
+            mclp.set_num_facilities(p)
+            mclp.solve(pulp.GLPK())
+            rebuilt = covering.create_mclp_model(self.binary_coverage_polygon, {"total": p})
+            rebuilt.solve(pulp.GLPK())
+            self.assertAlmostEqual(pulp.value(rebuilt.objective), pulp.value(mclp.problem.objective))
+
+    def test_mclp_per_type(self):
+        mclp = handle.ModelHandle(covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}),
+                                  self.binary_coverage_polygon)
+        mclp.set_num_facilities(5, {"facility_service_areas": 2})
+        mclp.solve(pulp.GLPK())
+        rebuilt = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 2})
+        rebuilt.solve(pulp.GLPK())
+        self.assertAlmostEqual(pulp.value(rebuilt.objective), pulp.value(mclp.problem.objective))
+        mclp.set_num_facilities(per_type={"facility_service_areas": None})
+        mclp.solve(pulp.GLPK())
+        self.assertGreater(pulp.value(mclp.problem.objective), pulp.value(rebuilt.objective))
+
+    def test_mclp_demand_weights(self):
+        mclp = handle.ModelHandle(covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}),
+                                  self.binary_coverage_polygon)
+        weights = {demand_id: 1 for demand_id in self.binary_coverage_polygon["demand"]}
+        mclp.set_demand_weights(weights)
+        mclp.solve(pulp.GLPK())
+        covered = [d for d in self.binary_coverage_polygon["demand"].values()
+                   if any(d["coverage"]["facility_service_areas"])]
+        self.assertEqual(len(covered), pulp.value(mclp.problem.objective))
+
+    def test_threshold(self):
+        threshold = handle.ModelHandle(covering.create_threshold_model(self.binary_coverage_point2, 30),
+                                       self.binary_coverage_point2)
+        threshold.solve(pulp.GLPK())
+        self.assertEqual(3, pulp.value(threshold.problem.objective))
+        threshold.set_threshold(100)
+        threshold.solve(pulp.GLPK())
+        self.assertEqual(threshold.problem.status, pulp.constants.LpStatusInfeasible)
+
+    def test_cc_threshold(self):
+        ccthreshold = handle.ModelHandle(covering.create_cc_threshold_model(self.partial_coverage2, 100),
+                                         self.partial_coverage2)
+        ccthreshold.set_threshold(80)
+        ccthreshold.solve(pulp.GLPK())
+        self.assertEqual(14, pulp.value(ccthreshold.problem.objective))
+        self.assertRaises(ValueError, ccthreshold.set_num_facilities, 5)
+        self.assertRaises(ValueError, ccthreshold.set_demand_weights, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, pareto
+
+
+class ParetoTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+        with open("valid_coverages/partial_coverage2.json", "r") as f:
+            self.partial_coverage2 = json.load(f)
+
+    def test_mclp_curve(self):
+        rows = pareto.pareto_curve(self.binary_coverage_polygon, solver=pulp.GLPK())
+        self.assertEqual([0, 1, 2, 3, 4, 5], [row["p"] for row in rows])
+        self.assertEqual(216535, rows[3]["coverage"])
+        self.assertEqual(['1', '4', '5', '6', '7'], rows[5]["ids"]["facility_service_areas"])
+        self.assertEqual(320453, rows[5]["coverage"])
+        for row in rows:
+            prob = covering.create_mclp_model(self.binary_coverage_polygon, {"total": row["p"]})
+            prob.solve(pulp.GLPK())
+            self.assertAlmostEqual(pulp.value(prob.objective) or 0, row["coverage"])
+
+    def test_threshold(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        curve = pareto.CoverageCurve(merged_dict, "threshold", pulp.GLPK())
+        self.assertEqual(9, curve.threshold(80)["p"])
+        self.assertEqual(15, curve.threshold(95)["p"])
+        self.assertLess(curve.solves, curve.num_facilities)
+        self.assertIsNone(pareto.CoverageCurve(self.binary_coverage_polygon, "threshold", pulp.GLPK()).threshold(50))
+        curve = pareto.CoverageCurve(self.partial_coverage2, "cc_threshold", pulp.GLPK())
+        self.assertEqual(14, curve.threshold(80)["p"])
+        rows = curve.table()
+        self.assertEqual(14, min(row["p"] for row in rows if row["percentage"] >= 80))
+        self.assertRaises(ValueError, pareto.CoverageCurve, self.partial_coverage2, "mclp")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: UTF-8 -*-
+import json
+import os
+import tempfile
+import unittest
+
+from pyspatialopt import profiling
+from pyspatialopt.models import covering
+
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_model_phases(self):
+        profiler = profiling.enable()
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}, model_file=None)
+        phases = profiler.to_dict()["phases"]
+        self.assertIn("covering.create_mclp_model", phases)
+        self.assertIn("covering.create_mclp_model/variables", phases)
+        self.assertIn("covering.create_mclp_model/constraints", phases)
+        self.assertEqual(1, phases["covering.create_mclp_model"]["calls"])
+        counts = phases["covering.create_mclp_model"]["counts"]
+        self.assertEqual(mclp.numVariables(), counts["variables"])
+        self.assertEqual(mclp.numConstraints(), counts["constraints"])
+
+    def test_disabled(self):
+        profiler = profiling.enable()
+        profiling.disable()
+        covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}, model_file=None)
+        self.assertEqual({}, profiler.to_dict()["phases"])
+        self.assertIsNone(profiling.get_profiler())
+
+    def test_callback_and_json(self):
+        profiler = profiling.enable()
+        recorded = []
+        profiler.add_callback(lambda name, wall_time, cpu_time: recorded.append(name))
+        with profiling.phase("test") as phase:
+            phase.count("items", 3)
+        self.assertEqual(["test"], recorded)
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            profiler.to_json(path)
+            with open(path, "r") as f:
+                self.assertEqual(profiler.to_dict(), json.load(f))
+        finally:
+            os.remove(path)
+        self.assertEqual(3, profiler.to_dict()["phases"]["test"]["counts"]["items"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, row_generation
+
+
+class RowGenerationTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_point1.json", "r") as f:
+            self.binary_coverage_point = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+
+    def test_lscp(self):
+        merged_dict = covering.merge_coverages([self.binary_coverage_point, self.binary_coverage_point2])
+        iterations = []
+        result = row_generation.solve_lscp(merged_dict, pulp.GLPK(), initial_rows=10,
+                                           callback=lambda i, rows, violated: iterations.append(violated))
+        self.assertEqual("Optimal", result["status"])
+        self.assertEqual(24, result["objective"])
+        self.assertEqual(24, sum(len(ids) for ids in result["ids"].values()))
+        self.assertLess(result["rows"], len(merged_dict["demand"]))
+        self.assertEqual(0, iterations[-1])
+        self.assertEqual(result["iterations"], len(iterations))
+        self.assertEqual("Infeasible", row_generation.solve_lscp(self.binary_coverage_point2, pulp.GLPK())["status"])
+
+    def test_demand_subset(self):
+        demand_ids = sorted(self.binary_coverage_point["demand"])[:5]
+        lscp = covering.create_lscp_model(self.binary_coverage_point, demand_ids=demand_ids)
+        self.assertEqual(sorted("D{}".format(demand_id) for demand_id in demand_ids), sorted(lscp.constraints))
+        self.assertRaises(ValueError, covering.create_lscp_model, self.binary_coverage_point, demand_ids=["missing"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# -*- coding: UTF-8 -*-
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyspatialopt.analysis import shapefile, synthetic
+
+
+class ShapefileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_points(self):
+        path = os.path.join(self.directory, "points.shp")
+        shapefile.write_shapefile(path, "Point", [(1.0, 2.0), (3.0, 4.0)], [("ID", "N", 10, 0)], [[1], [2]])
+        with open(path, "rb") as f:
+            shp = f.read()
+        self.assertEqual(9994, struct.unpack(">i", shp[0:4])[0])
+        self.assertEqual(len(shp) // 2, struct.unpack(">i", shp[24:28])[0])
+        self.assertEqual((1000, 1), struct.unpack("<2i", shp[28:36]))
+        self.assertEqual((1.0, 2.0, 3.0, 4.0), struct.unpack("<4d", shp[36:68]))
+        self.assertEqual((2, 10), struct.unpack(">2i", shp[128:136]))
+        self.assertEqual((1, 3.0, 4.0), struct.unpack("<i2d", shp[136:156]))
+        with open(os.path.join(self.directory, "points.shx"), "rb") as f:
+            shx = f.read()
+        self.assertEqual((50, 10, 64, 10), struct.unpack(">4i", shx[100:116]))
+        with open(os.path.join(self.directory, "points.dbf"), "rb") as f:
+            dbf = f.read()
+        self.assertEqual((2, 65, 11), struct.unpack("<IHH", dbf[4:12]))
+        self.assertEqual(b" " + b"2".rjust(10), dbf[65 + 11:65 + 22])
+
+    def test_write_polygons(self):
+        path = os.path.join(self.directory, "polygons.shp")
+        ring = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0), (0.0, 0.0)]
+        shapefile.write_shapefile(path, "Polygon", [[ring]], [("NAME", "C", 5, 0)], [["a"]], prj="PRJ")
+        with open(path, "rb") as f:
+            shp = f.read()
+        self.assertEqual(5, struct.unpack("<i", shp[32:36])[0])
+        self.assertEqual((5, 0.0, 0.0, 1.0, 1.0, 1, 5, 0), struct.unpack("<i4d3i", shp[108:156]))
+        self.assertEqual(len(shp), 156 + 16 * 5)
+        with open(os.path.join(self.directory, "polygons.prj"), "r") as f:
+            self.assertEqual("PRJ", f.read())
+        self.assertRaises(ValueError, shapefile.write_shapefile, path, "Polygon", [[ring]],
+                          [("NAME", "C", 1, 0)], [["abc"]])
+        self.assertRaises(ValueError, shapefile.write_shapefile, path, "Line", [[ring]], [], [[]])
+
+    def test_generate_layers(self):
+        layout = synthetic.generate_layers(self.directory, 100, 10, seed=1)
+        self.assertEqual(100, layout["numDemand"])
+        for name, path in layout["paths"].items():
+            for extension in [".shp", ".shx", ".dbf", ".prj"]:
+                self.assertTrue(os.path.exists(os.path.splitext(path)[0] + extension))
+        with open(layout["paths"]["demand_polygon"].replace(".shp", ".dbf"), "rb") as f:
+            self.assertEqual(100, struct.unpack("<I", f.read(8)[4:8])[0])
+
+    def test_read_points(self):
+        path = os.path.join(self.directory, "points.shp")
+        shapefile.write_shapefile(path, "Point", [(1.0, 2.0), (3.0, 4.0)],
+                                  [("ID", "N", 10, 0), ("NAME", "C", 5, 0), ("VALUE", "N", 10, 2)],
+                                  [[1, "a", 1.5], [2, "b", None]])
+        reader = shapefile.ShapefileReader(path)
+        self.assertEqual("Point", reader.shape_type)
+        self.assertEqual(2, len(reader))
+        self.assertEqual([[1.0, 2.0], [3.0, 4.0]], reader.coordinates.tolist())
+        # A view of the mapped file
+        self.assertIsNotNone(reader.coordinates.base)
+        self.assertEqual([[1.0, 2.0, 1.0, 2.0], [3.0, 4.0, 3.0, 4.0]], reader.bounding_boxes.tolist())
+        attributes = reader.attributes()
+        self.assertEqual(["ID", "NAME", "VALUE"], list(attributes.keys()))
+        self.assertEqual(np.int64, attributes["ID"].dtype)
+        self.assertEqual([1, 2], attributes["ID"].tolist())
+        self.assertEqual(["a", "b"], attributes["NAME"].tolist())
+        self.assertEqual(1.5, attributes["VALUE"][0])
+        self.assertTrue(np.isnan(attributes["VALUE"][1]))
+        self.assertEqual(["NAME"], list(reader.attributes(["NAME"]).keys()))
+        self.assertRaises(ValueError, reader.attributes, ["MISSING"])
+
+    def test_read_polygons(self):
+        path = os.path.join(self.directory, "polygons.shp")
+        square = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0), (0.0, 0.0)]
+        hole = [(0.2, 0.2), (0.4, 0.2), (0.4, 0.4), (0.2, 0.2)]
+        other = [(5.0, 5.0), (5.0, 7.0), (6.0, 5.0), (5.0, 5.0)]
+        shapefile.write_shapefile(path, "Polygon", [[square, hole], [other]], [("ID", "N", 10, 0)], [[1], [2]])
+        reader = shapefile.ShapefileReader(path)
+        self.assertEqual([0, 2, 3], reader.geometry_offsets.tolist())
+        self.assertEqual([0, 5, 9, 13], reader.part_offsets.tolist())
+        self.assertEqual(square + hole + other, [tuple(c) for c in reader.coordinates.tolist()])
+        self.assertEqual([[0.0, 0.0, 1.0, 1.0], [5.0, 5.0, 6.0, 7.0]], reader.bounding_boxes.tolist())
+        parts, points = reader.shape(1)
+        self.assertEqual([0], parts.tolist())
+        self.assertEqual(other, [tuple(c) for c in points.tolist()])
+        self.assertEqual((0.0, 0.0, 6.0, 7.0), reader.bounds)
+
+    def test_read_generated_layers(self):
+        layout = synthetic.generate_layers(self.directory, 100, 10, seed=1)
+        reader = shapefile.ShapefileReader(layout["paths"]["demand_polygon"])
+        self.assertEqual(100, len(reader))
+        self.assertTrue(np.allclose(reader.coordinates.min(axis=0), reader.bounds[:2]))
+        self.assertTrue(np.allclose(reader.bounding_boxes.max(axis=0)[2:], reader.bounds[2:]))
+        self.assertEqual(len(reader.coordinates), reader.part_offsets[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
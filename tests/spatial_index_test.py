@@ -0,0 +1,61 @@
+# -*- coding: UTF-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyspatialopt.analysis import shapefile, spatial_index, synthetic
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.layout = synthetic.generate_layers(self.directory, 400, 20, seed=2)
+        self.path = self.layout["paths"]["demand_polygon"]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_query(self):
+        boxes = shapefile.ShapefileReader(self.path).bounding_boxes
+        index = spatial_index.SpatialIndex.build(boxes, node_size=4)
+        queries = shapefile.ShapefileReader(self.layout["paths"]["facility_service_areas"]).bounding_boxes
+        query_ids, feature_ids = index.query_many(queries)
+        self.assertTrue(len(query_ids) > 0)
+        for i, box in enumerate(queries):
+            expected = np.flatnonzero((boxes[:, 0] <= box[2]) & (boxes[:, 2] >= box[0]) &
+                                      (boxes[:, 1] <= box[3]) & (boxes[:, 3] >= box[1]))
+            self.assertEqual(expected.tolist(), feature_ids[query_ids == i].tolist())
+        self.assertEqual(feature_ids[query_ids == 0].tolist(), index.query(queries[0]).tolist())
+
+    def test_null_boxes(self):
+        boxes = np.array([[0.0, 0.0, 1.0, 1.0], [np.nan] * 4, [2.0, 2.0, 3.0, 3.0]])
+        index = spatial_index.SpatialIndex.build(boxes, node_size=2)
+        self.assertEqual([0, 2], index.query((-1.0, -1.0, 5.0, 5.0)).tolist())
+        self.assertEqual([], spatial_index.SpatialIndex.build(np.zeros((0, 4))).query((0, 0, 1, 1)).tolist())
+        self.assertRaises(ValueError, spatial_index.SpatialIndex.build, boxes, 1)
+
+    def test_layer_index(self):
+        index = spatial_index.layer_index(self.path)
+        sidecar = spatial_index.sidecar_path(self.path)
+        self.assertTrue(os.path.exists(sidecar))
+        self.assertTrue(os.path.exists(sidecar.replace(".npy", ".json")))
+        cached = spatial_index.layer_index(self.path)
+        self.assertIsInstance(cached.entries, np.memmap)
+        box = (400000.0, 4480000.0, 420000.0, 4500000.0)
+        self.assertTrue(len(index.query(box)) > 0)
+        self.assertEqual(index.query(box).tolist(), cached.query(box).tolist())
+        # Touching the layer keeps the index, changing it rebuilds the index
+        os.utime(self.path)
+        self.assertIsInstance(spatial_index.layer_index(self.path).entries, np.memmap)
+        synthetic.generate_layers(self.directory, 100, 20, seed=3)
+        rebuilt = spatial_index.layer_index(self.path)
+        self.assertNotIsInstance(rebuilt.entries, np.memmap)
+        self.assertEqual(100, rebuilt.num_items)
+        self.assertNotIsInstance(spatial_index.layer_index(self.path, node_size=8).entries, np.memmap)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import sweep
+
+
+class SweepTest(unittest.TestCase):
+    def setUp(self):
+        # Read the coverages
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/binary_coverage_point2.json", "r") as f:
+            self.binary_coverage_point2 = json.load(f)
+
+    def test_expand_grid(self):
+        grid = sweep.expand_grid("mclp", {"total": [1, 2], "facility_service_areas": [1]})
+        self.assertEqual([{"num_fac": {"total": 1, "facility_service_areas": 1}},
+                          {"num_fac": {"total": 2, "facility_service_areas": 1}}], grid)
+        grid = sweep.expand_grid("traumah", {"num_ad": [1, 2], "num_tc": [3]})
+        self.assertEqual([{"num_ad": 1, "num_tc": 3}, {"num_ad": 2, "num_tc": 3}], grid)
+        self.assertRaises(ValueError, sweep.expand_grid, "threshold", {"total": [1]})
+        self.assertRaises(ValueError, sweep.expand_grid, "mclp", {"facility_service_areas": [1]})
+
+    def test_mclp_sweep(self):
+        results = sweep.run_sweep(self.binary_coverage_polygon, "mclp", {"total": [1, 5]}, pulp.GLPK(), processes=2)
+        self.assertEqual(2, len(results))
+        self.assertEqual(['4'], results[0]["ids"]["facility_service_areas"])
+        self.assertEqual(['1', '4', '5', '6', '7'], results[1]["ids"]["facility_service_areas"])
+        self.assertEqual("Optimal", results[1]["status"])
+
+    def test_threshold_sweep(self):
+        results = sweep.run_sweep(self.binary_coverage_point2, "threshold", {"psi": [30, 100]}, pulp.GLPK(),
+                                  processes=2)
+        self.assertEqual(3, results[0]["objective"])
+        self.assertEqual("Infeasible", results[1]["status"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: UTF-8 -*-
+import unittest
+
+import pulp
+
+from pyspatialopt.models import covering, synthetic
+
+
+class SyntheticTest(unittest.TestCase):
+    def test_binary(self):
+        coverage = synthetic.generate_coverage(200, 20, 0.1, seed=1)
+        self.assertEqual(coverage, synthetic.generate_coverage(200, 20, 0.1, seed=1))
+        self.assertNotEqual(coverage, synthetic.generate_coverage(200, 20, 0.1, seed=2))
+        covering.validate_coverage(coverage, ["coverage"], ["binary"])
+        self.assertEqual(200, len(coverage["demand"]))
+        self.assertEqual(20, len(coverage["facilities"]["facility_service_areas"]))
+        pairs = sum(len(demand["coverage"]["facility_service_areas"]) for demand in coverage["demand"].values())
+        # Each facility covers about 10% of the demand (less near the edges)
+        self.assertTrue(100 < pairs < 500)
+        self.assertAlmostEqual(sum(demand["demand"] for demand in coverage["demand"].values()),
+                               coverage["totalDemand"])
+
+    def test_partial(self):
+        coverage = synthetic.generate_coverage(200, 20, 0.1, "partial", seed=1)
+        covering.validate_coverage(coverage, ["coverage"], ["partial"])
+        for demand in coverage["demand"].values():
+            for value in demand["coverage"]["facility_service_areas"].values():
+                self.assertTrue(0 < value <= demand["demand"])
+            self.assertTrue(demand["serviceableDemand"] <= demand["demand"])
+
+    def test_cover_all(self):
+        coverage = synthetic.generate_coverage(300, 10, 0.01, cover_all=True, seed=3)
+        for demand in coverage["demand"].values():
+            self.assertTrue(demand["coverage"]["facility_service_areas"])
+        lscp = covering.create_lscp_model(coverage)
+        lscp.solve(pulp.GLPK())
+        self.assertEqual(pulp.LpStatusOptimal, lscp.status)
+
+    def test_traumah(self):
+        coverage = synthetic.generate_traumah_coverage(200, 20, 5, 0.1, 0.2, seed=1)
+        covering.validate_coverage(coverage, ["coverage"], ["traumah"])
+        self.assertEqual(5, len(coverage["facilities"]["AirDepot"]))
+        traumah = covering.create_traumah_model(coverage, 2, 5)
+        traumah.solve(pulp.GLPK())
+        self.assertEqual(pulp.LpStatusOptimal, traumah.status)
+
+
+if __name__ == '__main__':
+    unittest.main()
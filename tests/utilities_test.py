@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+import json
+import pulp
+import unittest
+
+from pyspatialopt.models import covering, utilities
+
+
+class UtilitiesTest(unittest.TestCase):
+    def setUp(self):
+        with open("valid_coverages/binary_coverage_polygon1.json", "r") as f:
+            self.binary_coverage_polygon = json.load(f)
+        with open("valid_coverages/traumah_coverage.json", "r") as f:
+            self.traumah_coverage = json.load(f)
+
+    def test_get_ids_delineator(self):
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5}, delineator="#")
+        mclp.solve(pulp.GLPK())
+        ids = utilities.get_ids(mclp, "facility_service_areas", delineator="#")
+        self.assertEqual(['1', '4', '5', '6', '7'], ids)
+
+    def test_solution_view(self):
+        mclp = covering.create_mclp_model(self.binary_coverage_polygon, {"total": 5})
+        mclp.solve(pulp.GLPK())
+        solution = utilities.SolutionView(mclp, self.binary_coverage_polygon)
+        self.assertEqual({"facility_service_areas": utilities.get_ids(mclp, "facility_service_areas")},
+                         solution.selected())
+        self.assertEqual(set(["Y", "facility_service_areas"]), set(solution.names()))
+        demand = solution.demand()
+        self.assertEqual(len(self.binary_coverage_polygon["demand"]), len(demand["ids"]))
+        covered = sum(self.binary_coverage_polygon["demand"][demand_id]["demand"]
+                      for demand_id, flag in zip(demand["ids"], demand["covered"]) if flag)
+        self.assertAlmostEqual(pulp.value(mclp.objective), covered)
+        ids, values = solution.values("facility_service_areas", as_array=True)
+        self.assertEqual(5, values.sum())
+        self.assertEqual(['1', '4', '5', '6', '7'], list(solution.selected(as_array=True)["facility_service_areas"]))
+        self.assertEqual(demand["covered"], list(solution.demand(as_array=True)["covered"]))
+        self.assertRaises(ValueError, utilities.SolutionView(mclp).selected)
+
+    def test_solution_view_pairs(self):
+        traumah = covering.create_traumah_model(self.traumah_coverage, 5, 10, delineator="#")
+        traumah.solve(pulp.GLPK())
+        solution = utilities.SolutionView(traumah, self.traumah_coverage, "#")
+        self.assertEqual(5, len(solution.selected()["AirDepot"]))
+        for pair in solution.values("Z"):
+            self.assertEqual(2, len(pair.split("#")))
+
+    def test_enable_warm_start(self):
+        solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=10)
+        warm_solver = utilities.enable_warm_start(solver)
+        self.assertTrue(warm_solver.optionsDict["warmStart"])
+        self.assertTrue(warm_solver.warmStart)
+        self.assertEqual(10, warm_solver.timeLimit)
+        # The caller's solver is unchanged
+        self.assertFalse(solver.optionsDict.get("warmStart", False))
+        self.assertFalse(getattr(solver, "warmStart", False))
+
+
+if __name__ == '__main__':
+    unittest.main()